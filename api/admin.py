@@ -1,8 +1,10 @@
+import re
 from django.contrib import admin
 from django.urls import path
 from django.http import HttpResponseRedirect
 from django.core.cache import cache
 from django.contrib import messages
+from .cache_manager import invalidate_data_type, invalidate_project, local_cache
 
 class GitlabAdminSite(admin.AdminSite):
     site_header = 'Gerador de Métricas GitLab - Administração'
@@ -17,8 +19,30 @@ class GitlabAdminSite(admin.AdminSite):
         return custom_urls + urls
 
     def clear_cache_view(self, request):
-        """View para limpar o cache"""
+        """
+        View para limpar o cache: todo, apenas o de um projeto (?project_id=)
+        ou apenas um tipo de dados (?data_type=, ex.: projects)
+        """
+        data_type = request.GET.get('data_type')
+        if data_type:
+            if not re.fullmatch(r'[a-z_]+', data_type):
+                messages.error(request, 'data_type inválido.')
+                return HttpResponseRedirect('../')
+            invalidate_data_type(data_type)
+            messages.success(request, f'Cache de {data_type} limpo com sucesso!')
+            return HttpResponseRedirect('../')
+        
+        project_id = request.GET.get('project_id')
+        if project_id:
+            if not project_id.isdigit():
+                messages.error(request, 'project_id inválido.')
+                return HttpResponseRedirect('../')
+            invalidate_project(int(project_id))
+            messages.success(request, f'Cache do projeto {project_id} limpo com sucesso!')
+            return HttpResponseRedirect('../')
+        
         cache.clear()
+        local_cache.clear()
         messages.success(request, 'Cache limpo com sucesso!')
         return HttpResponseRedirect('../')
 
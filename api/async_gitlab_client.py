@@ -0,0 +1,208 @@
+"""
+Cliente assíncrono (asyncio + httpx) para o pipeline de estatísticas do GitLab
+"""
+
+import asyncio
+import time
+import httpx
+from django.conf import settings
+from .code_parser import CodeParser
+from .commit_stats import CommitStatsMixin
+from .commit_table import CommitTable
+from .diff_store import get_diff_store
+from .performance_config import PERFORMANCE_CONFIG
+from .rate_limiter import get_limiter
+from .records import CommitRecord
+from .timeout_config import TIMEOUT_CONFIG
+
+PER_PAGE = 100  # Máximo de itens por página aceito pelo GitLab
+PREFERRED_BRANCHES = ['main', 'master', 'develop']
+
+
+class AsyncGitlabClient(CommitStatsMixin):
+    """
+    Versão assíncrona das operações usadas por get_developer_stats.
+
+    Todas as requisições passam por um semáforo, limitando quantas ficam em
+    andamento ao mesmo tempo, e pelo limitador adaptativo (AIMD) da instância,
+    compartilhado com o cliente síncrono. A leitura e a gravação dos diffs em
+    disco rodam em threads, fora do event loop. Deve ser usado como context
+    manager assíncrono:
+
+        async with AsyncGitlabClient(token) as client:
+            stats = await client.get_developer_stats(project_id, since, until)
+    """
+
+    def __init__(self, token, url=None, max_concurrency=None):
+        self.token = token
+        self.url = (url or settings.GITLAB_API_URL).rstrip('/')
+        self.code_parser = CodeParser()
+        self.semaphore = asyncio.Semaphore(
+            max_concurrency or PERFORMANCE_CONFIG['ASYNC_MAX_CONCURRENCY']
+        )
+        self.limiter = None
+        if PERFORMANCE_CONFIG['ADAPTIVE_RATE_LIMIT']:
+            # Mesma chave do GitlabClient: os dois clientes dividem o limite da instância
+            self.limiter = get_limiter(url or settings.GITLAB_API_URL)
+        self.client = httpx.AsyncClient(
+            base_url=f"{self.url}/api/v4",
+            headers={'PRIVATE-TOKEN': token},
+            verify=getattr(settings, 'GITLAB_SSL_VERIFY', False),
+            timeout=PERFORMANCE_CONFIG['API_TIMEOUT'],
+            limits=httpx.Limits(max_connections=PERFORMANCE_CONFIG['ASYNC_MAX_CONCURRENCY']),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Fecha as conexões HTTP abertas"""
+        await self.client.aclose()
+
+    async def _get(self, path, params=None, timeout=None):
+        """Executa um GET limitado pelo semáforo (e pelo limitador adaptativo) e retorna (json, headers)"""
+        async with self.semaphore:
+            if self.limiter is None:
+                response = await self.client.get(path, params=params, timeout=timeout)
+            else:
+                async with self.limiter.async_slot():
+                    started = time.monotonic()
+                    try:
+                        # Sem stream, o corpo já foi lido: a latência inclui o download
+                        response = await self.client.get(path, params=params, timeout=timeout)
+                    except httpx.TransportError:
+                        self.limiter.record(None, latency=time.monotonic() - started)
+                        raise
+                    self.limiter.record(response.status_code, response.headers, time.monotonic() - started)
+        response.raise_for_status()
+        return response.json(), response.headers
+
+    async def _get_all(self, path, params=None, timeout=None):
+        """Busca todas as páginas de uma listagem; páginas restantes são buscadas em paralelo"""
+        params = dict(params or {})
+        params.setdefault('per_page', PER_PAGE)
+        params['page'] = 1
+
+        items, headers = await self._get(path, params, timeout)
+        total_pages = headers.get('X-Total-Pages')
+
+        if total_pages and int(total_pages) > 1:
+            # Total conhecido: buscar as demais páginas concorrentemente
+            pages = await asyncio.gather(*[
+                self._get(path, {**params, 'page': page}, timeout)
+                for page in range(2, int(total_pages) + 1)
+            ])
+            for page_items, _ in pages:
+                items.extend(page_items)
+            return items
+
+        # Sem X-Total-Pages (listagens grandes): seguir X-Next-Page em sequência
+        next_page = headers.get('X-Next-Page')
+        while next_page:
+            page_items, headers = await self._get(path, {**params, 'page': next_page}, timeout)
+            items.extend(page_items)
+            next_page = headers.get('X-Next-Page')
+
+        return items
+
+    async def get_project(self, project_id):
+        """Busca um projeto específico por ID"""
+        project, _ = await self._get(
+            f"/projects/{project_id}", timeout=TIMEOUT_CONFIG['GET_PROJECT_TIMEOUT']
+        )
+        return project
+
+    async def get_branches(self, project_id):
+        """Lista as branches de um projeto"""
+        return await self._get_all(
+            f"/projects/{project_id}/repository/branches",
+            timeout=TIMEOUT_CONFIG['LIST_BRANCHES_TIMEOUT'],
+        )
+
+    async def get_project_commits(self, project_id, since=None, until=None, with_stats=False):
+        """Busca commits de um projeto no período, com a mesma estratégia de fallback do cliente síncrono"""
+        params = {}
+        # Período inclusivo em dias locais, como no cliente síncrono
+        since, until = self._date_range_bounds(since, until)
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        if with_stats:
+            params['with_stats'] = 'true'
+
+        path = f"/projects/{project_id}/repository/commits"
+        timeout = TIMEOUT_CONFIG['LIST_COMMITS_TIMEOUT']
+
+        # Listagem geral e branches são independentes: buscar juntas
+        commits, branches = await asyncio.gather(
+            self._get_all(path, params, timeout),
+            self.get_branches(project_id),
+        )
+        if commits:
+            return [CommitRecord.from_dict(commit, 'multiple') for commit in commits]
+
+        # Fallback: branch preferencial (ou a primeira disponível)
+        branch_names = [branch['name'] for branch in branches]
+        preferred = next((name for name in PREFERRED_BRANCHES if name in branch_names), None)
+        if preferred is None and branch_names:
+            preferred = branch_names[0]
+        if preferred is None:
+            return []
+
+        commits = await self._get_all(path, {**params, 'ref_name': preferred}, timeout)
+        return [CommitRecord.from_dict(commit, preferred) for commit in commits]
+
+    async def get_commit_diff(self, project_id, commit_id):
+        """Obtém o diff de um commit específico (None em caso de erro), usando o DiffStore"""
+        diff_store = get_diff_store()
+        # Leitura do gzip em disco: em thread, para não bloquear o event loop
+        diff = await asyncio.to_thread(diff_store.get, project_id, commit_id)
+        if diff is not None:
+            return diff
+
+        try:
+            diff = await self._get_all(
+                f"/projects/{project_id}/repository/commits/{commit_id}/diff",
+                timeout=TIMEOUT_CONFIG['GET_COMMIT_DIFF_TIMEOUT'],
+            )
+        except (httpx.HTTPError, ValueError):
+            return None
+
+        await asyncio.to_thread(diff_store.set, project_id, commit_id, diff)
+        return diff
+
+    async def get_developer_stats(self, project_id, since=None, until=None):
+        """Calcula estatísticas de desenvolvedores em um período, com todos os diffs em paralelo"""
+        since, until = self._normalize_date_range(since, until)
+        with_stats = PERFORMANCE_CONFIG['STATS_MODE'] == 'with_stats'
+
+        try:
+            commits = await self.get_project_commits(project_id, since, until, with_stats=with_stats)
+        except (httpx.HTTPError, ValueError):
+            return []
+
+        if not commits:
+            return []
+
+        # Buscar os diffs necessários concorrentemente (limitados pelo semáforo)
+        sample_commits = self._select_sample_commits(commits)
+        diff_ids = list(dict.fromkeys(
+            commit.id for commit in commits if self._should_use_real_diff(commit, sample_commits)
+        ))
+        diff_list = await asyncio.gather(*[
+            self.get_commit_diff(project_id, commit_id) for commit_id in diff_ids
+        ])
+        diffs = dict(zip(diff_ids, diff_list))
+
+        table = CommitTable()
+        for commit in commits:
+            try:
+                table.append(commit, self._commit_line_stats(commit, diffs.get(commit.id)))
+            except Exception as e:
+                continue
+
+        return table.aggregate()
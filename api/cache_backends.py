@@ -0,0 +1,558 @@
+"""
+Backends de cache: SQLite compartilhado entre os workers do gunicorn,
+servidor com protocolo Redis (RESP) e memória local limitada por bytes
+(LRU com cotas por prefixo)
+"""
+
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from .performance_config import PERFORMANCE_CONFIG
+
+_MISSING = object()
+
+
+class SizedLRU:
+    """
+    Mapa LRU limitado pelo tamanho (em bytes) das entradas, não pela quantidade.
+
+    Além do limite total, cada prefixo de chave em quotas (fração do total,
+    ex.: {'commits': 0.5}) tem seu próprio teto: ao exceder, são removidas
+    primeiro as entradas menos usadas do mesmo prefixo. Entradas com
+    expires_at (time.time()) vencido são descartadas na leitura.
+    """
+
+    def __init__(self, max_bytes, quotas=None):
+        self.max_bytes = max_bytes
+        # Prefixos mais longos primeiro: 'commits_cards' antes de 'commits'
+        self.quotas = sorted(
+            ((prefix, int(max_bytes * fraction)) for prefix, fraction in (quotas or {}).items()),
+            key=lambda item: len(item[0]), reverse=True
+        )
+        self.total_bytes = 0
+        self.prefix_bytes = {}
+        self.lock = threading.RLock()
+        self._entries = OrderedDict()
+
+    def _prefix_of(self, key):
+        for prefix, limit in self.quotas:
+            if key.startswith(prefix):
+                return prefix, limit
+        return None, None
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self._entries.get(key)
+            if item is None:
+                return default
+            value, size, prefix, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key, value, size, expires_at=None, quota_key=None):
+        """
+        Guarda a entrada e remove LRU até respeitar a cota do prefixo e o limite total.
+        quota_key (padrão: a própria chave) define o prefixo considerado nas cotas.
+        """
+        with self.lock:
+            self._remove(key)
+            prefix, limit = self._prefix_of(quota_key or key)
+            if size > self.max_bytes or (limit is not None and size > limit):
+                return False
+
+            self._entries[key] = (value, size, prefix, expires_at)
+            self.total_bytes += size
+            if prefix is not None:
+                self.prefix_bytes[prefix] = self.prefix_bytes.get(prefix, 0) + size
+                if self.prefix_bytes[prefix] > limit:
+                    for candidate in list(self._entries):
+                        if candidate != key and self._entries[candidate][2] == prefix:
+                            self._remove(candidate)
+                            if self.prefix_bytes[prefix] <= limit:
+                                break
+
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def expires_at(self, key):
+        with self.lock:
+            item = self._entries.get(key)
+            return item[3] if item is not None else None
+
+    def touch(self, key, expires_at):
+        with self.lock:
+            item = self._entries.get(key)
+            if item is None or (item[3] is not None and item[3] <= time.time()):
+                return False
+            self._entries[key] = item[:3] + (expires_at,)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            return self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self.prefix_bytes.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return False
+        self.total_bytes -= item[1]
+        if item[2] is not None:
+            self.prefix_bytes[item[2]] -= item[1]
+        return True
+
+
+class SizedLocMemCache(BaseCache):
+    """
+    Cache em memória do processo (como o LocMemCache), mas limitado por
+    bytes: cada valor é serializado uma vez e o tamanho do pickle conta no
+    orçamento MAX_BYTES, com as cotas por prefixo de CACHE_PREFIX_QUOTAS.
+    """
+
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        max_bytes = int(options.get('MAX_BYTES', 128 * 1024 * 1024))
+        quotas = options.get('QUOTAS', PERFORMANCE_CONFIG['CACHE_PREFIX_QUOTAS'])
+        # Instâncias com o mesmo LOCATION compartilham o armazenamento (como o LocMemCache)
+        with self._caches_lock:
+            self._store = self._caches.setdefault(name, SizedLRU(max_bytes, quotas))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        internal_key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._store.lock:
+            if internal_key in self._store:
+                return False
+            return self._store.set(
+                internal_key, pickled, len(pickled), self.get_backend_timeout(timeout), quota_key=key
+            )
+
+    def get(self, key, default=None, version=None):
+        internal_key = self.make_and_validate_key(key, version=version)
+        pickled = self._store.get(internal_key)
+        if pickled is None:
+            return default
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        internal_key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._store.set(internal_key, pickled, len(pickled), self.get_backend_timeout(timeout), quota_key=key)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        internal_key = self.make_and_validate_key(key, version=version)
+        return self._store.touch(internal_key, self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        internal_key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            pickled = self._store.get(internal_key)
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(pickled) + delta
+            pickled = pickle.dumps(new_value, pickle.HIGHEST_PROTOCOL)
+            self._store.set(
+                internal_key, pickled, len(pickled), self._store.expires_at(internal_key), quota_key=key
+            )
+        return new_value
+
+    def has_key(self, key, version=None):
+        return self.make_and_validate_key(key, version=version) in self._store
+
+    def delete(self, key, version=None):
+        return self._store.delete(self.make_and_validate_key(key, version=version))
+
+    def clear(self):
+        self._store.clear()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+) WITHOUT ROWID
+"""
+EXPIRES_INDEX = "CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)"
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache em um arquivo SQLite (LOCATION) visível para todos os processos.
+
+    O banco usa WAL, então leituras não bloqueiam escritas; cada thread
+    mantém sua própria conexão. add() é atômico entre processos (usado
+    pelos locks do cache_manager), e as entradas expiradas são removidas
+    em lote a cada CULL_INTERVAL escritas em vez de uma a uma na leitura.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5.0))
+        self.cull_interval = int(options.get('CULL_INTERVAL', 200))
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+    def _connection(self):
+        """Conexão da thread atual (recriada após fork do worker)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(SCHEMA)
+        connection.execute(EXPIRES_INDEX)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _encode(self, value):
+        return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def _after_write(self):
+        """Limpeza em lote: expiradas e, acima de MAX_ENTRIES, as mais próximas de expirar"""
+        with self._writes_lock:
+            self._writes += 1
+            if self._writes < self.cull_interval:
+                return
+            self._writes = 0
+        self._cull(self._connection())
+
+    def _cull(self, connection):
+        connection.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries:
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache_entries')
+                return
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                'SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,)
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._connection().execute(
+            'INSERT INTO cache_entries (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout), now)
+        )
+        added = cursor.rowcount > 0
+        if added:
+            self._after_write()
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        placeholders = ','.join('?' * len(key_map))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache_entries WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires > ?)',
+            (*key_map, time.time())
+        ).fetchall()
+        return {key_map[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout))
+        )
+        self._after_write()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._encode(value), expires)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)', rows
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._after_write()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Incremento atômico entre processos (transação com lock de escrita)"""
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?', (self._encode(new_value), key)
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return new_value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            placeholders = ','.join('?' * len(keys))
+            self._connection().execute(f'DELETE FROM cache_entries WHERE key IN ({placeholders})', keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+    def close(self, **kwargs):
+        # Conexões são reutilizadas entre requisições (uma por thread)
+        pass
+
+
+class RESPError(Exception):
+    """Erro devolvido pelo servidor (resposta '-')"""
+
+
+class RESPCache(BaseCache):
+    """
+    Cache em um servidor que fala o protocolo do Redis (RESP), sem depender
+    do pacote redis: LOCATION é redis://[:senha@]host[:porta][/db].
+
+    Cada thread mantém sua própria conexão (recriada após fork do worker).
+    Os valores são pickles, exceto inteiros, guardados como texto para que
+    incr() seja o INCRBY atômico do servidor; a expiração fica a cargo do
+    servidor (PX), e add() é SET NX, atômico entre processos.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        url = urlparse(location)
+        self.host = url.hostname or 'localhost'
+        self.port = url.port or 6379
+        self.password = unquote(url.password) if url.password else None
+        self.db = int(url.path.strip('/') or 0)
+        self.socket_timeout = float(options.get('SOCKET_TIMEOUT', 5.0))
+        self._local = threading.local()
+
+    def _connection(self):
+        """Conexão da thread atual (recriada após fork do worker)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        connection = (sock, sock.makefile('rb'))
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        if self.password:
+            self._command('AUTH', self.password)
+        if self.db:
+            self._command('SELECT', self.db)
+        return connection
+
+    def _command(self, *args):
+        sock, reader = self._connection()
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        try:
+            sock.sendall(b''.join(parts))
+            reply = self._read_reply(reader)
+        except OSError:
+            # Conexão em estado desconhecido: a próxima chamada abre outra
+            self._local.connection = None
+            sock.close()
+            raise
+        if isinstance(reply, RESPError):
+            raise reply
+        return reply
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Conexão encerrada pelo servidor de cache')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            return RESPError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise ConnectionError('Resposta inválida do servidor de cache: %r' % line)
+
+    def _encode(self, value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, data):
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _ttl_ms(self, timeout):
+        """Validade em milissegundos (None: sem expiração)"""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    def _set(self, key, value, timeout, only_new=False):
+        ttl = self._ttl_ms(timeout)
+        if ttl == 0:
+            # Timeout 0 ou negativo: o valor já nasce expirado
+            if not only_new:
+                self._command('DEL', key)
+            return False
+        args = ['SET', key, self._encode(value)]
+        if ttl is not None:
+            args += ['PX', ttl]
+        if only_new:
+            args.append('NX')
+        return self._command(*args) is not None
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._set(key, value, timeout, only_new=True)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data = self._command('GET', key)
+        return default if data is None else self._decode(data)
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        values = self._command('MGET', *key_map)
+        return {
+            key_map[key]: self._decode(data) for key, data in zip(key_map, values) if data is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._set(key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        ttl = self._ttl_ms(timeout)
+        if ttl is None:
+            return self._command('PERSIST', key) == 1 or self._command('EXISTS', key) == 1
+        if ttl == 0:
+            return self._command('DEL', key) == 1
+        return self._command('PEXPIRE', key, ttl) == 1
+
+    def incr(self, key, delta=1, version=None):
+        """Incremento atômico no servidor; como no LocMemCache, a chave precisa existir"""
+        key = self.make_and_validate_key(key, version=version)
+        if not self._command('EXISTS', key):
+            raise ValueError("Key '%s' not found" % key)
+        return self._command('INCRBY', key, delta)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._command('DEL', key) == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._command('DEL', *keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._command('EXISTS', key) == 1
+
+    def clear(self):
+        self._command('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Conexões são reutilizadas entre requisições (uma por thread)
+        pass
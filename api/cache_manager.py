@@ -1,62 +1,419 @@
+import inspect
+import math
+import pickle
+import random
 import time
 import logging
+import threading
 from functools import wraps
 from django.core.cache import cache
+from .cache_backends import SizedLRU
+from .performance_config import PERFORMANCE_CONFIG
 
 logger = logging.getLogger(__name__)
 
 # Tempos de cache em segundos (otimizados para performance máxima)
 CACHE_TIMES = {
-    'projects': 7200,   # 2 horas para lista de projetos (dados raramente mudam)
-    'project': 3600,    # 1 hora para detalhes de projeto
+    'projects': 300,    # 5 minutos; depois disso a lista é revalidada via ETag (api/http_cache.py)
+    'project': 300,     # 5 minutos; depois disso revalidado via ETag
     'commits': 3600,    # 1 hora para commits (dados históricos)
     'commits_cards': 900, # 15 minutos para commits de cards (mais frequentes)
     'stats': 4800,      # 1.3 horas para estatísticas (cálculos pesados)
-    'branches': 1800,   # 30 minutos para branches (podem mudar mais frequentemente)
-    'commit_diff': 1800, # 30 minutos para diffs de commits (dados que podem mudar)
+    'branches': 300,    # 5 minutos; depois disso revalidado via ETag
 }
 
-def cache_result(cache_key_prefix, timeout=None):
+# Janela (após a expiração) em que o valor antigo ainda é servido enquanto
+# uma atualização roda em segundo plano, inclusive se o GitLab falhar
+STALE_TIMES = {
+    'projects': 86400,  # Lista de projetos: até 1 dia servindo a versão anterior
+    'project': 86400,
+    'commits': 3600,
+    'commits_cards': 3600,
+    'stats': 3600,
+    'branches': 86400,
+}
+
+# Recomputação antecipada probabilística (XFetch): quanto maior, mais cedo
+XFETCH_BETA = 1.0
+
+# Incrementar quando o formato dos valores guardados mudar (ex.: commits como CommitRecord)
+KEY_SCHEMA_VERSION = 3
+
+# Single-flight: chamadas idênticas simultâneas esperam o resultado da primeira
+SINGLE_FLIGHT_LOCK_TIMEOUT = 120  # Validade do lock compartilhado entre processos
+SINGLE_FLIGHT_WAIT = 60           # Espera máxima pelo resultado de outro processo
+SINGLE_FLIGHT_POLL_INTERVAL = 0.1 # Intervalo entre consultas ao cache durante a espera
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class LocalObjectCache:
+    """
+    Cache L1 do processo: guarda as entradas já desserializadas do cache
+    compartilhado (L2), evitando unpickle a cada leitura.
+
+    Limitado por bytes (o tamanho serializado vem da entrada) e por TTL, com
+    remoção LRU e cotas por prefixo (SizedLRU). Cada entrada é associada à
+    versão lida do L2; quem usa o L1 confere a versão atual (uma chave
+    pequena) antes de aproveitar o objeto, no máximo uma vez a cada
+    version_check_interval segundos por entrada.
+    """
+    
+    def __init__(self, max_bytes=None, ttl=None, quotas=None, version_check_interval=None):
+        self.ttl = ttl if ttl is not None else PERFORMANCE_CONFIG['L1_CACHE_TTL']
+        self.version_check_interval = (
+            version_check_interval if version_check_interval is not None
+            else PERFORMANCE_CONFIG['L1_VERSION_CHECK_INTERVAL']
+        )
+        self._lru = SizedLRU(
+            max_bytes if max_bytes is not None else PERFORMANCE_CONFIG['L1_CACHE_MAX_BYTES'],
+            quotas if quotas is not None else PERFORMANCE_CONFIG['CACHE_PREFIX_QUOTAS'],
+        )
+    
+    @property
+    def total_bytes(self):
+        return self._lru.total_bytes
+    
+    def get(self, key):
+        """Retorna [versão, entrada, última conferência da versão] ou None se ausente/expirada"""
+        return self._lru.get(key)
+    
+    def set(self, key, version, entry, size):
+        self._lru.set(key, [version, entry, time.monotonic()], size, time.time() + self.ttl)
+    
+    def delete(self, key):
+        self._lru.delete(key)
+    
+    def clear(self):
+        self._lru.clear()
+
+
+local_cache = LocalObjectCache()
+
+
+def _version_key(cache_key):
+    return f"{cache_key}_version"
+
+
+class _InFlightCall:
+    """Chamada em andamento cujo resultado é compartilhado com as threads em espera"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _single_flight(cache_key, compute):
+    """
+    Executa compute() uma única vez por chave dentro do processo.
+    Threads que chegam enquanto a chamada está em andamento recebem o mesmo
+    resultado (ou a mesma exceção).
+    """
+    with _in_flight_lock:
+        call = _in_flight.get(cache_key)
+        is_leader = call is None
+        if is_leader:
+            call = _in_flight[cache_key] = _InFlightCall()
+    
+    if not is_leader:
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    
+    try:
+        call.result = compute()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(cache_key, None)
+        call.event.set()
+
+
+def _read_entry(cache_key):
+    """
+    Lê a entrada {'value', 'expires_at', 'delta', 'version'} (None se ausente).
+    
+    Usa o L1 quando a versão guardada no cache compartilhado ainda é a mesma
+    (conferida há menos de version_check_interval segundos, ou relida agora);
+    caso contrário lê do cache compartilhado, desserializa o valor e
+    atualiza o L1.
+    """
+    local = local_cache.get(cache_key)
+    if local is not None:
+        version, entry, checked_at = local
+        now = time.monotonic()
+        if now - checked_at < local_cache.version_check_interval:
+            return entry
+        if cache.get(_version_key(cache_key)) == version:
+            local[2] = now
+            return entry
+        local_cache.delete(cache_key)
+    
+    stored = cache.get(cache_key)
+    if not isinstance(stored, dict) or 'payload' not in stored:
+        return None
+    entry = {
+        'value': pickle.loads(stored['payload']),
+        'expires_at': stored['expires_at'],
+        'delta': stored['delta'],
+        'version': stored['version'],
+    }
+    local_cache.set(cache_key, entry['version'], entry, len(stored['payload']))
+    return entry
+
+
+def _write_entry(cache_key, value, logical_timeout, physical_timeout, delta):
+    """
+    Grava a entrada no cache compartilhado com uma nova versão e a mantém no L1.
+    
+    O valor é serializado uma única vez: o pickle vai para o L2 como bytes
+    (payload) e o seu tamanho é o custo da entrada no L1.
+    """
+    payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    version = time.time_ns()
+    expires_at = time.time() + logical_timeout
+    cache.set(
+        cache_key,
+        {'payload': payload, 'expires_at': expires_at, 'delta': delta, 'version': version},
+        physical_timeout,
+    )
+    cache.set(_version_key(cache_key), version, physical_timeout)
+    entry = {'value': value, 'expires_at': expires_at, 'delta': delta, 'version': version}
+    local_cache.set(cache_key, version, entry, len(payload))
+
+
+def _compute_with_shared_lock(cache_key, compute):
+    """
+    Coordena processos diferentes por meio de um lock no cache compartilhado:
+    quem obtém o lock calcula; os demais aguardam o valor aparecer no cache.
+    """
+    lock_key = f"{cache_key}_lock"
+    if cache.add(lock_key, 1, SINGLE_FLIGHT_LOCK_TIMEOUT):
+        try:
+            # Outro processo pode ter terminado entre a leitura e o lock
+            entry = _read_entry(cache_key)
+            if entry is not None and entry['expires_at'] > time.time():
+                return entry['value']
+            return compute()
+        finally:
+            cache.delete(lock_key)
+    
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        entry = _read_entry(cache_key)
+        if entry is not None and entry['expires_at'] > time.time():
+            return entry['value']
+        if cache.get(lock_key) is None:
+            # O outro processo terminou sem resultado (erro): calcular aqui
+            break
+    
+    return compute()
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_in_background(cache_key, compute):
+    """
+    Atualiza a entrada no pool de tarefas curtas (jobs.run_in_background),
+    no máximo uma atualização por chave entre processos
+    """
+    from .jobs import run_in_background
+
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+    
+    lock_key = f"{cache_key}_refresh"
+    if not cache.add(lock_key, 1, SINGLE_FLIGHT_LOCK_TIMEOUT):
+        # Outro processo já está atualizando esta chave
+        with _refreshing_lock:
+            _refreshing.discard(cache_key)
+        return
+    
+    def release():
+        cache.delete(lock_key)
+        with _refreshing_lock:
+            _refreshing.discard(cache_key)
+    
+    def refresh():
+        try:
+            compute()
+        except Exception as e:
+            # O valor antigo continua sendo servido até o fim da janela de stale
+            logger.warning("Falha ao atualizar cache %s em segundo plano: %s", cache_key, e)
+        finally:
+            release()
+    
+    try:
+        run_in_background(refresh)
+    except RuntimeError:
+        # Pool encerrado (desligamento do processo): a próxima leitura tenta de novo
+        release()
+
+
+TAG_KEY_PREFIX = 'cache_tag'
+
+
+def _tag_key(tag):
+    return f"{TAG_KEY_PREFIX}_{tag}"
+
+
+def _tag_generations(tags):
+    """
+    Geração atual de cada tag (contador guardado no cache compartilhado).
+    
+    Uma tag sem contador começa com um valor baseado no relógio, para que
+    chaves de gerações antigas nunca voltem a ser válidas se o contador for
+    removido do cache.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_tag(tag):
+    """Invalida de uma vez todas as chaves associadas à tag (O(1): só avança a geração)"""
+    key = _tag_key(tag)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def project_tag(project_id):
+    return f"project:{project_id}"
+
+
+def invalidate_project(project_id):
+    """Invalida todos os dados em cache (commits, projeto, etc.) de um projeto"""
+    invalidate_tag(project_tag(project_id))
+
+
+def data_type_tag(cache_key_prefix):
+    return f"type:{cache_key_prefix}"
+
+
+def invalidate_data_type(cache_key_prefix):
+    """Invalida todas as chaves de um tipo de dados (ex.: 'projects'), em todos os projetos"""
+    invalidate_tag(data_type_tag(cache_key_prefix))
+
+
+def _key_part(value):
+    """Representação do argumento na chave: objetos do GitLab entram pelo id, não pelo repr"""
+    if isinstance(value, (str, int, float, bool)):
+        return str(value)
+    return str(getattr(value, 'id', value))
+
+
+def _should_refresh_early(entry, now, beta):
+    """XFetch: antecipa a recomputação com probabilidade crescente perto da expiração"""
+    delta = entry.get('delta') or 0
+    if delta <= 0 or beta <= 0:
+        return False
+    return now - delta * beta * math.log(1.0 - random.random()) >= entry['expires_at']
+
+
+def cache_result(cache_key_prefix, timeout=None, stale_timeout=None, beta=XFETCH_BETA, project_arg=None):
     """
     Decorator para cache de resultados de funções.
     
+    As leituras passam primeiro pelo L1 do processo (objetos já
+    desserializados) e depois pelo cache compartilhado.
+    
+    Em caso de miss, chamadas concorrentes com a mesma chave (no processo ou
+    em outros workers que usam o mesmo cache) aguardam e compartilham o
+    resultado da primeira, em vez de repetir a chamada ao GitLab.
+    
+    Depois de expirado, o valor continua sendo servido por stale_timeout
+    segundos enquanto uma atualização roda em segundo plano (se ela falhar,
+    o valor antigo segue disponível). Antes da expiração, a atualização pode
+    ser antecipada de forma probabilística (XFetch), proporcional ao tempo
+    que o cálculo levou.
+    
+    A chave inclui a geração da tag do tipo de dados e, com project_arg, a
+    do projeto: invalidate_data_type() e invalidate_project() tornam todas
+    as chaves correspondentes inacessíveis sem precisar conhecê-las.
+    
     Args:
         cache_key_prefix: Prefixo para a chave de cache
         timeout: Tempo em segundos para expiração do cache (se None, usa o padrão do tipo)
+        stale_timeout: Janela de stale-while-revalidate (se None, usa STALE_TIMES)
+        beta: Agressividade da recomputação antecipada (0 desativa)
+        project_arg: Nome do parâmetro com o projeto (id ou objeto), para a tag do projeto
     """
     def decorator(func):
+        signature = inspect.signature(func) if project_arg else None
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Determina o tipo de dados para definir timeout padrão
-            data_type = cache_key_prefix.split('_')[0] if '_' in cache_key_prefix else 'default'
+            if cache_key_prefix in CACHE_TIMES:
+                data_type = cache_key_prefix
+            else:
+                data_type = cache_key_prefix.split('_')[0]
             cache_timeout = timeout or CACHE_TIMES.get(data_type, 300)  # 5 min default
+            stale_window = stale_timeout if stale_timeout is not None else STALE_TIMES.get(data_type, 0)
             
             # Constrói a chave de cache com base nos argumentos
             cache_parts = [cache_key_prefix]
             
             # Adiciona argumentos não-self à chave
             if len(args) > 1:  # primeiro arg é self
-                cache_parts.extend([str(arg) for arg in args[1:]])
+                cache_parts.extend([_key_part(arg) for arg in args[1:]])
             
             # Adiciona kwargs ordenados à chave
             if kwargs:
                 for key in sorted(kwargs.keys()):
                     if kwargs[key] is not None:
-                        cache_parts.append(f"{key}:{kwargs[key]}")
+                        cache_parts.append(f"{key}:{_key_part(kwargs[key])}")
             
-            cache_key = "_".join(cache_parts)
+            # Gerações das tags (tipo de dados e projeto) fazem parte da chave,
+            # lidas com uma única consulta ao cache compartilhado
+            tags = [data_type_tag(cache_key_prefix)]
+            if signature is not None:
+                project = signature.bind_partial(*args, **kwargs).arguments.get(project_arg)
+                if project is not None:
+                    tags.append(project_tag(_key_part(project)))
+            generations = _tag_generations(tags)
+            cache_parts.append(f"v{KEY_SCHEMA_VERSION}")
+            cache_parts.append("gen:" + ".".join(str(generation) for generation in generations))
             
-            # Tenta obter do cache
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
+            cache_key = "_".join(cache_parts)
             
-            # Se não estiver em cache, executa a função
-            result = func(*args, **kwargs)
+            def compute():
+                # Executa a função medindo o custo (usado pelo XFetch)
+                started = time.monotonic()
+                result = func(*args, **kwargs)
+                delta = time.monotonic() - started
+                
+                # Armazena no cache; o valor fica disponível também durante a janela de stale
+                if result is not None:
+                    _write_entry(cache_key, result, cache_timeout, cache_timeout + stale_window, delta)
+                
+                return result
             
-            # Armazena no cache
-            cache.set(cache_key, result, cache_timeout)
+            # Tenta obter do cache
+            entry = _read_entry(cache_key)
+            if entry is not None:
+                now = time.time()
+                if now >= entry['expires_at'] or _should_refresh_early(entry, now, beta):
+                    # Expirado (stale) ou perto de expirar: servir e atualizar em segundo plano
+                    _refresh_in_background(cache_key, compute)
+                return entry['value']
             
-            return result
+            return _single_flight(cache_key, lambda: _compute_with_shared_lock(cache_key, compute))
         return wrapper
     return decorator
@@ -0,0 +1,79 @@
+"""
+Pool de GitlabClient por processo, indexado por token e URL base
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from .gitlab_client import GitlabClient
+from .performance_config import PERFORMANCE_CONFIG
+
+_clients = {}  # (token, url) -> [client, último uso, leases ativos]
+_lock = threading.Lock()
+
+
+def get_gitlab_client(token, url=None):
+    """
+    Retorna um GitlabClient reutilizável para o token e a URL base.
+
+    Reaproveitar o cliente mantém a sessão HTTP (conexões keep-alive) e evita
+    autenticar de novo a cada requisição. Clientes ociosos por mais de
+    CLIENT_POOL_IDLE_TIMEOUT segundos são descartados, exceto os que estão
+    reservados com leased_gitlab_client(). Serve para usos curtos (uma
+    requisição); tarefas longas devem reservar o cliente.
+    """
+    with _lock:
+        entry, expired = _checkout(token, url)
+    _close_clients(expired)
+    return entry[0]
+
+
+@contextmanager
+def leased_gitlab_client(token, url=None):
+    """
+    Cliente do pool reservado durante o bloco (jobs, streams, tarefas em
+    segundo plano): enquanto houver reservas, ele não é descartado por
+    ociosidade, e o tempo ocioso só começa a contar quando a última termina.
+    """
+    with _lock:
+        entry, expired = _checkout(token, url)
+        entry[2] += 1
+    _close_clients(expired)
+
+    try:
+        yield entry[0]
+    finally:
+        with _lock:
+            entry[2] -= 1
+            entry[1] = time.monotonic()
+
+
+def _checkout(token, url):
+    """Busca (ou cria) a entrada do pool e remove as ociosas (chamar com o lock adquirido)"""
+    url = url or settings.GITLAB_API_URL
+    key = (token, url)
+    now = time.monotonic()
+
+    expired = _pop_idle_clients(now)
+    entry = _clients.get(key)
+    if entry is None:
+        entry = _clients[key] = [GitlabClient(token, url=url), now, 0]
+    entry[1] = now
+    return entry, expired
+
+
+def _pop_idle_clients(now):
+    """Remove do pool os clientes ociosos e sem reservas (chamar com o lock adquirido)"""
+    idle_timeout = PERFORMANCE_CONFIG['CLIENT_POOL_IDLE_TIMEOUT']
+    idle_keys = [
+        key for key, (_, last_used, leases) in _clients.items()
+        if not leases and now - last_used > idle_timeout
+    ]
+    return [_clients.pop(key)[0] for key in idle_keys]
+
+
+def _close_clients(clients):
+    """Fecha as conexões fora do lock"""
+    for client in clients:
+        client.close()
@@ -1,100 +1,219 @@
 import re
+from collections import Counter
 from typing import Dict, List, Tuple
 
+# Tipos de token reconhecidos pelo scanner
+LINE_COMMENT = 'line_comment'          # Comentário até o fim da linha (#, //, --)
+BLOCK_COMMENT = 'block_comment'        # Comentário com delimitador de fechamento (/* */, <!-- -->)
+BLOCK_CLOSER = 'block_closer'          # Fechamento de comentário de bloco fora de um comentário
+LINE_START_BLOCK = 'line_start_block'  # Bloco delimitado no início da linha (=begin/=end do Ruby)
+STRING = 'string'                      # String que termina na mesma linha
+MULTILINE_STRING = 'multiline_string'  # String que pode continuar nas linhas seguintes
+DOCSTRING = 'docstring'                # String multilinha que, no início da linha, conta como comentário
+
+
+class LanguageSyntax:
+    """
+    Descritor da sintaxe de comentários e strings de uma linguagem.
+
+    strings é uma sequência de (delimitador, multilinha, aceita escape com \\);
+    docstrings lista os delimitadores de strings que, quando são o primeiro
+    elemento da linha, contam como comentário (docstrings do Python).
+
+    multiline_re consome, sem voltar ao Python, tudo o que se resolve na
+    própria linha (código, strings de uma linha e comentários de linha) e
+    captura o próximo delimitador que pode atravessar linhas: abertura ou
+    fechamento de comentário de bloco, string multilinha ou docstring. Um
+    comentário de linha não precisa ser removido: a linha é de comentário
+    quando, sem os comentários de várias linhas, começa por ele
+    (counted_line_re).
+    """
+
+    __slots__ = ('tokens', 'line_comments', 'multiline_tokens', 'multiline_re', 'counted_line_re',
+                 'line_start_closers')
+
+    def __init__(self, line_comments=(), block_comments=(), strings=(), docstrings=(), line_start_blocks=()):
+        tokens = {}
+        for delimiter in line_comments:
+            tokens[delimiter] = (LINE_COMMENT, None, False)
+        for opener, closer in block_comments:
+            tokens[opener] = (BLOCK_COMMENT, closer, False)
+            tokens[closer] = (BLOCK_CLOSER, closer, False)
+        for opener, closer in line_start_blocks:
+            tokens[opener] = (LINE_START_BLOCK, closer, False)
+        for delimiter, multiline, escapes in strings:
+            if delimiter in docstrings:
+                kind = DOCSTRING
+            else:
+                kind = MULTILINE_STRING if multiline else STRING
+            tokens[delimiter] = (kind, delimiter, escapes)
+
+        self.tokens = tokens
+        self.line_comments = tuple(line_comments)
+        # Trechos consumidos pela regex: o que não começa nenhum delimitador e,
+        # inteiros (padrão desenrolado e possessivo, sem retrocesso), os
+        # comentários de linha e as strings de uma linha
+        first_chars = ''.join(re.escape(char) for char in sorted({token[0] for token in tokens}))
+        skipped = [rf'[^{first_chars}\n]++', r'\n'] if tokens else []
+        multiline = []
+        for token in sorted(tokens, key=len, reverse=True):
+            kind, _, escapes = tokens[token]
+            quote = re.escape(token)
+            # '"' não consome o início de '"""': delimitadores mais longos primeiro
+            longer = [re.escape(other[len(token):]) for other in tokens if other != token and other.startswith(token)]
+            quote += '(?!' + '|'.join(longer) + ')' if longer else ''
+            if kind == LINE_COMMENT:
+                skipped.append(rf'{quote}[^\n]*+')
+            elif kind == STRING and escapes:
+                skipped.append(rf'{quote}[^{re.escape(token)}\\\n]*+(?:\\.[^{re.escape(token)}\\\n]*+)*+{re.escape(token)}?')
+            elif kind == STRING:
+                skipped.append(rf'{quote}[^{re.escape(token)}\n]*+{re.escape(token)}?')
+            else:
+                multiline.append(token)
+        # Caracteres iniciais de delimitadores que aparecem sozinhos ('/' de uma divisão)
+        for char in sorted({token[0] for token in tokens} - set(tokens)):
+            suffixes = [re.escape(token[1:]) for token in tokens if token[0] == char]
+            skipped.append(re.escape(char) + '(?!' + '|'.join(suffixes) + ')')
+        self.multiline_tokens = tuple(multiline)
+        self.multiline_re = re.compile(
+            '(?:' + '|'.join(skipped) + ')*+(' + '|'.join(map(re.escape, multiline)) + ')'
+        ) if multiline else None
+        # Linhas contadas de um diff brancas ou de comentário: (marcador,
+        # marcas de linha esvaziada pelo scanner, comentário de linha), os dois
+        # últimos vazios para as linhas brancas
+        comment_start = (
+            '(?:(' + '|'.join(map(re.escape, line_comments)) + r')|(?![^\n]))' if line_comments else r'()(?![^\n])'
+        )
+        self.counted_line_re = re.compile(r'\n([+-])[ \t\r\f\v]*+((?:\x00[ \t\r\f\v]*+)*+)' + comment_start)
+        # Fechamentos que só valem no início da linha: no texto sem marcadores
+        # e nas linhas de cada lado do diff
+        self.line_start_closers = {
+            closer: {
+                '': re.compile('\n' + re.escape(closer)),
+                '+': re.compile('\n[+ ]' + re.escape(closer)),
+                '-': re.compile('\n[- ]' + re.escape(closer)),
+            }
+            for _, closer in line_start_blocks
+        }
+
+
+_C_STYLE = dict(line_comments=('//',), block_comments=(('/*', '*/'),))
+_MARKUP = dict(block_comments=(('<!--', '-->'),))
+
+# O diff é percorrido inteiro, uma vez para cada lado: as linhas do lado
+# contado ('+' nas adições, '-' nas remoções) e as de contexto (' ') são
+# lidas, as do outro lado são ignoradas. Cada hunk começa em um cabeçalho. O
+# texto começa com '\n' para que todo padrão comece por um literal
+_HUNK_HEADER = '\n@@'
+_OTHER_SIDE = {'+': '-', '-': '+'}
+# Marcadores das linhas contadas brancas. Possessivo: sem retrocesso nos
+# espaços de indentação das linhas que não são brancas
+_COUNTED_BLANK_RE = re.compile(r'\n([+-])[ \t\r\f\v]*+(?![^\n])')
+# Conteúdo das linhas não brancas de cada lado (sem marcador, '+' ou '-'):
+# dentro de um comentário removido vira _EMPTIED (no texto sem marcadores,
+# nada) e dentro de uma string de várias linhas vira 's' (código). Lookbehind e
+# substituição literal: sem expansão de template por ocorrência
+_SIDE_LINE_RES = {
+    marker: re.compile(rf'(?<=\n{re.escape(marker)})[^\S\n]*+\S[^\n]*') for marker in ('', '+', '-')
+}
+# Blocos de linhas consecutivas de um lado do diff
+_SIDE_BLOCK_RES = {
+    marker: re.compile(rf'\n{re.escape(marker)}[^\n]*+(?:\n{re.escape(marker)}[^\n]*+)*+') for marker in ('+', '-')
+}
+# Marca das linhas de um diff esvaziadas pelo scanner: elas deixam de ser
+# código sem se confundir com as linhas brancas (counted_line_re)
+_EMPTIED = '\x00'
+
+
+def _find_closer(text, closer, pos, endpos, escapes, other_side=''):
+    """
+    Posição do delimitador de fechamento em [pos, endpos), ignorando os
+    escapados com \\ e os das linhas do outro lado do diff (other_side)
+    """
+    while True:
+        end = text.find(closer, pos, endpos)
+        if end == -1:
+            return end
+        if escapes:
+            index = end - 1
+            while index >= pos and text[index] == '\\':
+                index -= 1
+            if (end - 1 - index) % 2:
+                pos = end + 1
+                continue
+        if not other_side or text[text.rfind('\n', 0, end) + 1] != other_side:
+            return end
+        pos = end + 1
+
+
+def _count_delimiters(text, delimiter, pos, endpos, escapes, other_side=''):
+    """Quantidade de delimitadores (não escapados, fora das linhas de other_side) em [pos, endpos)"""
+    count = text.count(delimiter, pos, endpos)
+    if not count:
+        return count
+    if escapes and text.find('\\', pos, endpos) != -1:
+        count = 0
+        while True:
+            found = _find_closer(text, delimiter, pos, endpos, escapes, other_side)
+            if found == -1:
+                return count
+            count += 1
+            pos = found + len(delimiter)
+    if other_side:
+        # Descontados os dos blocos de linhas do outro lado
+        for block in _SIDE_BLOCK_RES[other_side].finditer(text, pos, endpos):
+            count -= text.count(delimiter, block.start(), block.end())
+    return count
+
 
 class CodeParser:
     """
     Parser para analisar código e distinguir entre linhas de código e comentários
+    
+    Cada linha é classificada por um scanner de estados dirigido pelo
+    descritor da linguagem (LANGUAGE_SYNTAX), que leva de uma linha para a
+    seguinte os comentários de bloco e as strings ainda abertos. Assim, as
+    linhas internas de um /* ... */ ou de uma docstring contam como
+    comentário, e um # dentro de uma string não.
     """
     
-    # Padrões de comentários para diferentes linguagens
-    COMMENT_PATTERNS = {
-        'python': [
-            r'^\s*#.*$',  # Comentários de linha única
-            r'^\s*""".*?"""\s*$',  # Docstrings de linha única
-            r'^\s*""".*$',  # Início de docstring multilinha
-            r'^.*?"""\s*$',  # Fim de docstring multilinha
-        ],
-        'javascript': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'java': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'cpp': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'c': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'php': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*#.*$',  # Comentários de linha única (estilo shell)
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'ruby': [
-            r'^\s*#.*$',  # Comentários de linha única
-            r'^\s*=begin.*$',  # Início de comentário de bloco
-            r'^.*=end\s*$',  # Fim de comentário de bloco
-        ],
-        'go': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'rust': [
-            r'^\s*//.*$',  # Comentários de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário de bloco
-        ],
-        'html': [
-            r'^\s*<!--.*?-->\s*$',  # Comentários HTML em linha única
-            r'^\s*<!--.*$',  # Início de comentário HTML
-            r'^.*?-->\s*$',  # Fim de comentário HTML
-        ],
-        'css': [
-            r'^\s*/\*.*?\*/\s*$',  # Comentários CSS em linha única
-            r'^\s*/\*.*$',  # Início de comentário CSS
-            r'^.*?\*/\s*$',  # Fim de comentário CSS
-        ],
-        'sql': [
-            r'^\s*--.*$',  # Comentários SQL de linha única
-            r'^\s*/\*.*?\*/\s*$',  # Comentários SQL de bloco em linha única
-            r'^\s*/\*.*$',  # Início de comentário SQL de bloco
-            r'^.*?\*/\s*$',  # Fim de comentário SQL de bloco
-        ],
-        'xml': [
-            r'^\s*<!--.*?-->\s*$',  # Comentários XML em linha única
-            r'^\s*<!--.*$',  # Início de comentário XML
-            r'^.*?-->\s*$',  # Fim de comentário XML
-        ],
-        'yaml': [
-            r'^\s*#.*$',  # Comentários YAML
-        ],
-        'json': [
-            r'^\s*//.*$',  # Comentários JSON (não padrão, mas usado)
-        ],
-        'markdown': [
-            r'^\s*<!--.*?-->\s*$',  # Comentários HTML em Markdown
-            r'^\s*<!--.*$',  # Início de comentário HTML
-            r'^.*?-->\s*$',  # Fim de comentário HTML
-        ],
+    # Sintaxe de comentários e strings de cada linguagem
+    LANGUAGE_SYNTAX = {
+        'python': LanguageSyntax(
+            line_comments=('#',),
+            strings=(('"""', True, True), ("'''", True, True), ('"', False, True), ("'", False, True)),
+            docstrings=('"""', "'''"),
+        ),
+        'javascript': LanguageSyntax(
+            strings=(('"', False, True), ("'", False, True), ('`', True, True)), **_C_STYLE
+        ),
+        'java': LanguageSyntax(strings=(('"', False, True), ("'", False, True)), **_C_STYLE),
+        'cpp': LanguageSyntax(strings=(('"', False, True), ("'", False, True)), **_C_STYLE),
+        'c': LanguageSyntax(strings=(('"', False, True), ("'", False, True)), **_C_STYLE),
+        'php': LanguageSyntax(
+            line_comments=('//', '#'),
+            block_comments=(('/*', '*/'),),
+            strings=(('"', True, True), ("'", True, True)),
+        ),
+        'ruby': LanguageSyntax(
+            line_comments=('#',),
+            line_start_blocks=(('=begin', '=end'),),
+            strings=(('"', False, True), ("'", False, True)),
+        ),
+        'go': LanguageSyntax(strings=(('"', False, True), ("'", False, True), ('`', True, False)), **_C_STYLE),
+        # Sem aspas simples: lifetimes ('a) abririam uma string
+        'rust': LanguageSyntax(strings=(('"', True, True),), **_C_STYLE),
+        'html': LanguageSyntax(**_MARKUP),
+        'css': LanguageSyntax(block_comments=(('/*', '*/'),), strings=(('"', False, True), ("'", False, True))),
+        'sql': LanguageSyntax(
+            line_comments=('--',),
+            block_comments=(('/*', '*/'),),
+            strings=(("'", False, False), ('"', False, False)),
+        ),
+        'xml': LanguageSyntax(**_MARKUP),
+        'yaml': LanguageSyntax(line_comments=('#',), strings=(('"', False, True), ("'", False, False))),
+        'json': LanguageSyntax(line_comments=('//',), strings=(('"', False, True),)),
+        'markdown': LanguageSyntax(**_MARKUP),
     }
     
     # Extensões de arquivo para cada linguagem
@@ -117,17 +236,6 @@ class CodeParser:
         'markdown': ['.md', '.markdown'],
     }
     
-    def __init__(self):
-        self.compiled_patterns = {}
-        self._compile_patterns()
-    
-    def _compile_patterns(self):
-        """Compila os padrões de regex para melhor performance"""
-        for language, patterns in self.COMMENT_PATTERNS.items():
-            self.compiled_patterns[language] = [
-                re.compile(pattern, re.MULTILINE | re.DOTALL) for pattern in patterns
-            ]
-    
     def detect_language(self, filename: str) -> str:
         """
         Detecta a linguagem de programação baseada na extensão do arquivo
@@ -148,23 +256,221 @@ class CodeParser:
         
         return 'unknown'
     
+    def _remove_comments(self, text: str, syntax: LanguageSyntax, may_start_inside: bool = False,
+                         marker: str = '') -> str:
+        """
+        Retorna o texto sem os comentários de várias linhas, mantendo as quebras de linha.
+        
+        Scanner de estados em uma única passada: os candidatos a delimitador
+        multilinha são achados com str.find e só a linha de cada um passa por
+        multiline_re, que pula as strings de uma linha e os comentários de
+        linha (as demais linhas não passam por regex nenhuma); dentro de um
+        comentário ou string, apenas o fechamento é procurado, não importa
+        quantas linhas o bloco ocupe. As linhas de uma string de várias linhas
+        viram 's', para que um '#' no início delas não pareça comentário. Uma
+        linha não branca no texto original que fica vazia aqui, ou que começa
+        por um comentário de linha (_is_comment_code), é uma linha de comentário.
+        
+        Com may_start_inside (início de um hunk, cujo estado anterior é
+        desconhecido), um fechamento de bloco encontrado antes de qualquer
+        abertura indica que o texto começou dentro de um comentário; o
+        primeiro delimitador de docstring do hunk também é tratado como
+        fechamento quando essa leitura é a consistente (_closes_docstring). Com
+        marker ('+' ou '-'), o texto é um diff que começa com '\\n': só as
+        linhas desse lado e as de contexto são lidas, só as desse lado são
+        alteradas (os marcadores são preservados) e cada hunk é percorrido com
+        estado próprio.
+        """
+        if syntax.multiline_re is None:
+            return text
+        # Próxima ocorrência (a partir de pos) de cada delimitador presente no texto
+        upcoming = []
+        for token in syntax.multiline_tokens:
+            found = text.find(token)
+            if found != -1:
+                upcoming.append([found, token])
+        if not upcoming:
+            return text
+        multiline_match = syntax.multiline_re.match
+        tokens = syntax.tokens
+        own_line = '\n' + marker
+        other_side = _OTHER_SIDE.get(marker, '')
+        side_lines_re = _SIDE_LINE_RES[marker]
+        emptied = _EMPTIED if marker else ''
+        offset = 1 if marker else 0
+        length = len(text)
+        pieces = []
+        kept_from = 0  # Início do trecho ainda não copiado
+        pos = 0
+        # Em um diff, cada hunk vai até o próximo cabeçalho: nenhum comentário
+        # ou string continua de um hunk para o seguinte
+        hunk_start = hunk_pieces = hunk_kept_from = 0
+        hunk_end = text.find(_HUNK_HEADER) if marker else -1
+        if hunk_end == -1:
+            hunk_end = length
+        own_end = hunk_end  # Fim da última linha do lado percorrido no hunk
+        starts_inside = may_start_inside
+        
+        while True:
+            # Candidato: a ocorrência mais próxima de um delimitador multilinha;
+            # as linhas e os hunks sem nenhum não passam pela regex
+            candidate = length
+            for entry in upcoming:
+                if entry[0] < pos:
+                    found = text.find(entry[1], pos)
+                    entry[0] = length if found == -1 else found
+                if entry[0] < candidate:
+                    candidate = entry[0]
+            if candidate == length:
+                break
+            if candidate > hunk_end:
+                # Vai direto ao hunk do candidato, pulando o cabeçalho; o estado
+                # no início do hunk é desconhecido
+                pos = text.find('\n', text.rfind(_HUNK_HEADER, 0, candidate) + 1)
+                if pos == -1:
+                    break
+                hunk_end = text.find(_HUNK_HEADER, pos)
+                if hunk_end == -1:
+                    hunk_end = length
+                last_own = text.rfind(own_line, pos, hunk_end)
+                if last_own == -1:
+                    # Hunk sem linhas do lado percorrido: nada a contar nele
+                    pos = hunk_end
+                    continue
+                own_end = text.find('\n', last_own + 1, hunk_end)
+                own_end = hunk_end if own_end == -1 else own_end
+                hunk_start, hunk_pieces, hunk_kept_from = pos, len(pieces), kept_from
+                may_start_inside = starts_inside
+                if candidate < pos:
+                    # Candidato no próprio cabeçalho
+                    continue
+            elif candidate > own_end and not may_start_inside:
+                # Depois da última linha do lado percorrido, com o estado do hunk
+                # já conhecido, nada mais muda no hunk
+                pos = hunk_end
+                continue
+            
+            line_start = text.rfind('\n', 0, candidate) + 1
+            line_end = text.find('\n', candidate, hunk_end)
+            line_end = hunk_end if line_end == -1 else line_end
+            if other_side and text[line_start] == other_side:
+                pos = line_end
+                continue
+            # A linha do candidato é lida pela regex, que pula as strings de uma
+            # linha e os comentários de linha (onde o candidato não vale)
+            match = multiline_match(text, max(pos, line_start + offset), line_end)
+            if match is None:
+                pos = line_end
+                continue
+            
+            start, pos = match.span(1)
+            kind, closer, escapes = tokens[match.group(1)]
+            
+            if kind == BLOCK_CLOSER:
+                if not may_start_inside:
+                    continue
+                # Tudo até aqui (desde o início do hunk) estava dentro de um comentário
+                may_start_inside = False
+                del pieces[hunk_pieces:]
+                kept_from = hunk_kept_from
+                start, end = hunk_start + 2 if marker else 0, pos
+            elif kind == DOCSTRING and may_start_inside and self._closes_docstring(
+                text, start, pos, hunk_end, closer, escapes, offset, other_side
+            ):
+                # Docstring aberta antes do hunk: o trecho até aqui era docstring
+                may_start_inside = False
+                del pieces[hunk_pieces:]
+                kept_from = hunk_kept_from
+                start, end = hunk_start + 2 if marker else 0, pos
+            elif kind == LINE_START_BLOCK:
+                if start != line_start + offset:
+                    continue
+                # O bloco vai até o fim da linha que começa com o fechamento
+                closing = syntax.line_start_closers[closer][marker].search(text, pos, hunk_end)
+                end = text.find('\n', closing.end(), hunk_end) if closing else -1
+                end = hunk_end if end == -1 else end
+            else:
+                if kind == DOCSTRING:
+                    # Lida como abertura por _closes_docstring: o estado do hunk é conhecido
+                    may_start_inside = False
+                end = text.find(closer, pos, hunk_end)
+                if end != -1 and (
+                    (escapes and text[end - 1] == '\\')
+                    or (other_side and text[text.rfind('\n', 0, end) + 1] == other_side)
+                ):
+                    end = _find_closer(text, closer, pos, hunk_end, escapes, other_side)
+                end = hunk_end if end == -1 else end + len(closer)
+                if kind == MULTILINE_STRING or (kind == DOCSTRING and text[line_start + offset:start].strip()):
+                    # String (código), mesmo que ocupe várias linhas; só a docstring
+                    # no início da linha conta como comentário
+                    line_break = text.find('\n', pos, end)
+                    if line_break != -1:
+                        pieces.append(text[kept_from:line_break])
+                        pieces.append(side_lines_re.sub('s', text[line_break:end]))
+                        kept_from = end
+                    pos = end
+                    continue
+                if kind == BLOCK_COMMENT:
+                    may_start_inside = False
+            
+            # Trecho removido: a primeira linha perde o que vem depois de start
+            # (se for do lado percorrido) e as seguintes, o conteúdo
+            line_break = text.find('\n', start, end)
+            first_line_end = end if line_break == -1 else line_break
+            if marker and text[text.rfind('\n', 0, start) + 1] != marker:
+                pieces.append(text[kept_from:first_line_end])
+            else:
+                pieces.append(text[kept_from:start])
+                if emptied and text[start:first_line_end].strip():
+                    pieces.append(emptied)
+            if line_break != -1:
+                pieces.append(side_lines_re.sub(emptied, text[line_break:end]))
+            kept_from = pos = end
+        
+        if not pieces:
+            return text
+        pieces.append(text[kept_from:])
+        return ''.join(pieces)
+    
+    def _is_comment_code(self, code: str, syntax: LanguageSyntax) -> bool:
+        """Linha (já sem os comentários de várias linhas) vazia ou começando por um comentário de linha"""
+        code = code.strip()
+        return not code or code.startswith(syntax.line_comments)
+    
+    def _closes_docstring(self, text: str, start: int, pos: int, endpos: int, closer: str,
+                          escapes: bool, offset: int, other_side: str = '') -> bool:
+        """
+        Decide se o primeiro delimitador de docstring de um hunk fecha uma
+        docstring aberta antes do hunk (em vez de abrir uma nova).
+        
+        As duas leituras são possíveis; prevalece a que deixa o hunk terminar
+        fora de strings, ou seja, quando os delimitadores restantes formam
+        pares. Com nenhum restante, um delimitador no início da linha seguido
+        de texto ("\"\"\"Resumo...") é lido como abertura de docstring.
+        """
+        remaining = _count_delimiters(text, closer, pos, endpos, escapes, other_side)
+        if remaining % 2:
+            return False
+        line_start = text.rfind('\n', 0, start) + 1 + offset
+        line_end = text.find('\n', pos, endpos)
+        at_line_start = not text[line_start:start].strip()
+        followed_by_text = bool(text[pos:endpos if line_end == -1 else line_end].strip())
+        return not (remaining == 0 and at_line_start and followed_by_text)
+    
     def is_comment_line(self, line: str, language: str) -> bool:
         """
-        Verifica se uma linha é um comentário
+        Verifica se uma linha é um comentário (analisada isoladamente, sem as linhas anteriores)
         """
-        if language not in self.compiled_patterns:
+        syntax = self.LANGUAGE_SYNTAX.get(language)
+        if syntax is None:
             return False
         
         # Verificar se a linha é apenas espaços em branco
         if not line.strip():
             return False
         
-        # Verificar padrões de comentário
-        for pattern in self.compiled_patterns[language]:
-            if pattern.match(line):
-                return True
-        
-        return False
+        # Isolada, a linha pode estar no meio de um comentário de bloco
+        return self._is_comment_code(self._remove_comments(line, syntax, may_start_inside=True), syntax)
     
     def is_blank_line(self, line: str) -> bool:
         """
@@ -187,8 +493,16 @@ class CodeParser:
     def analyze_diff(self, diff_content: str, filename: str) -> Dict[str, int]:
         """
         Analisa um diff e retorna estatísticas de linhas de código
+        
+        A contagem das linhas brancas e das que começam por um comentário de
+        linha é feita por regex sobre o texto inteiro do diff, sem laço em
+        Python por linha. Só quando o diff tem algum delimitador que pode
+        atravessar linhas (comentário de bloco, docstring, string multilinha)
+        o scanner percorre o diff, uma vez para o lado novo (contexto e
+        adições) e outra para o antigo (contexto e remoções), e as linhas são
+        contadas de novo sem esses comentários.
         """
-        language = self.detect_language(filename)
+        syntax = self.LANGUAGE_SYNTAX.get(self.detect_language(filename))
         
         stats = {
             'additions': 0,
@@ -204,42 +518,49 @@ class CodeParser:
         if not diff_content:
             return stats
         
-        lines = diff_content.split('\n')
+        text = '\n' + diff_content
+        totals = {'+': text.count('\n+'), '-': text.count('\n-')}
+        if syntax is not None and syntax.multiline_tokens and any(
+            token in text for token in syntax.multiline_tokens
+        ):
+            # Comentários de várias linhas: as linhas que o scanner esvazia
+            # também são de comentário
+            for marker in ('+', '-'):
+                if totals[marker]:
+                    text = self._remove_comments(text, syntax, may_start_inside=True, marker=marker)
+        blank, comments = self._count_marked_lines(text, syntax)
         
-        for line in lines:
-            if line.startswith('+'):
-                # Linha adicionada
-                content = line[1:]  # Remove o '+'
-                stats['additions'] += 1
-                
-                if self.is_blank_line(content):
-                    stats['additions_blank'] += 1
-                elif self.is_comment_line(content, language):
-                    stats['additions_comments'] += 1
-                else:
-                    stats['additions_code'] += 1
-                    stats['additions_code'] += 1  # Contar apenas código real
-                    
-            elif line.startswith('-'):
-                # Linha removida
-                content = line[1:]  # Remove o '-'
-                stats['deletions'] += 1
-                
-                if self.is_blank_line(content):
-                    stats['deletions_blank'] += 1
-                elif self.is_comment_line(content, language):
-                    stats['deletions_comments'] += 1
-                else:
-                    stats['deletions_code'] += 1
-                    stats['deletions_code'] += 1  # Contar apenas código real
+        for marker, prefix in (('+', 'additions'), ('-', 'deletions')):
+            stats[prefix] = totals[marker]
+            stats[prefix + '_code'] = totals[marker] - blank[marker] - comments[marker]
+            stats[prefix + '_comments'] = comments[marker]
+            stats[prefix + '_blank'] = blank[marker]
         
         return stats
     
+    def _count_marked_lines(self, text: str, syntax) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Linhas contadas ('+' e '-') brancas e de comentário (esvaziadas pelo
+        scanner ou que começam por um comentário de linha), por marcador, em um
+        único findall sobre o texto inteiro
+        """
+        blank = {'+': 0, '-': 0}
+        comments = {'+': 0, '-': 0}
+        if syntax is None:
+            blank.update(Counter(_COUNTED_BLANK_RE.findall(text)))
+            return blank, comments
+        for (marker, emptied, token), count in Counter(syntax.counted_line_re.findall(text)).items():
+            if emptied or token:
+                comments[marker] += count
+            else:
+                blank[marker] += count
+        return blank, comments
+    
     def analyze_file_content(self, content: str, filename: str) -> Dict[str, int]:
         """
         Analisa o conteúdo de um arquivo e retorna estatísticas
         """
-        language = self.detect_language(filename)
+        syntax = self.LANGUAGE_SYNTAX.get(self.detect_language(filename))
         
         stats = {
             'total_lines': 0,
@@ -252,13 +573,14 @@ class CodeParser:
             return stats
         
         lines = content.split('\n')
+        code_lines = self._remove_comments(content, syntax).split('\n') if syntax else lines
         
-        for line in lines:
+        for line, code in zip(lines, code_lines):
             stats['total_lines'] += 1
             
             if self.is_blank_line(line):
                 stats['blank_lines'] += 1
-            elif self.is_comment_line(line, language):
+            elif syntax and self._is_comment_code(code, syntax):
                 stats['comment_lines'] += 1
             else:
                 stats['code_lines'] += 1
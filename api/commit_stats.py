@@ -0,0 +1,269 @@
+"""
+Agregação de estatísticas de linhas por autor e branch, independente do transporte
+"""
+
+import datetime
+from collections import defaultdict
+from django.utils import timezone
+from .performance_config import PERFORMANCE_CONFIG, ESTIMATION_CONFIG
+
+# Ordem das contagens de linhas retornadas por _commit_line_stats
+LINE_STAT_KEYS = (
+    'additions',
+    'deletions',
+    'additions_code',
+    'deletions_code',
+    'additions_comments',
+    'deletions_comments',
+    'additions_blank',
+    'deletions_blank',
+)
+
+
+class CommitStatsMixin:
+    """
+    Cálculo e acumulação de estatísticas de commits.
+    
+    Compartilhado pelos clientes síncrono e assíncrono; nenhum método faz I/O.
+    A classe que usa o mixin deve definir self.code_parser.
+    """
+    
+    def _normalize_date_range(self, since, until):
+        """Normaliza since/until para o formato YYYY-MM-DD (padrão: últimos 30 dias)"""
+        try:
+            if since and isinstance(since, str):
+                since_date = datetime.datetime.strptime(since, '%Y-%m-%d')
+                since = since_date.strftime('%Y-%m-%d')
+            
+            if until and isinstance(until, str):
+                until_date = datetime.datetime.strptime(until, '%Y-%m-%d')
+                until = until_date.strftime('%Y-%m-%d')
+        except ValueError as e:
+            # Usar datas padrão em caso de erro
+            since = (datetime.datetime.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
+            until = datetime.datetime.now().strftime('%Y-%m-%d')
+        
+        return since, until
+    
+    def _date_range_bounds(self, since, until):
+        """
+        Limites do período como datetimes ISO 8601 no fuso local (TIME_ZONE):
+        since às 00:00:00 e until às 23:59:59, ambos inclusivos.
+        
+        É a mesma convenção do banco local (dias locais) e do mirror git, e
+        vale para os filtros since/until da API do GitLab, que sem horário
+        tratariam until como o início do dia (excluindo-o).
+        """
+        def bound(value, time):
+            if not value:
+                return None
+            if isinstance(value, datetime.datetime):
+                day = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+            elif isinstance(value, datetime.date):
+                day = value
+            else:
+                day = datetime.datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+            return timezone.make_aware(datetime.datetime.combine(day, time)).isoformat()
+        
+        return bound(since, datetime.time.min), bound(until, datetime.time(23, 59, 59))
+    
+    def _report_progress(self, progress, stage, done=0, total=0, **details):
+        """
+        Informa o andamento do cálculo ao callback progress(stage, done, total, **details).
+        Erros do callback não interrompem o cálculo.
+        """
+        if progress is None:
+            return
+        try:
+            progress(stage, done, total, **details)
+        except Exception:
+            pass
+    
+    def _new_stats(self):
+        """Cria a estrutura de estatísticas por autor (indexada por email)"""
+        return defaultdict(lambda: {
+            'name': '', 
+            'email': '', 
+            'additions': 0, 
+            'deletions': 0, 
+            'commits': 0,
+            'additions_code': 0,
+            'deletions_code': 0,
+            'additions_comments': 0,
+            'deletions_comments': 0,
+            'additions_blank': 0,
+            'deletions_blank': 0,
+        })
+    
+    def _select_sample_commits(self, commits):
+        """Seleciona os commits mais recentes que terão o diff real analisado"""
+        max_detailed = PERFORMANCE_CONFIG['MAX_COMMITS_FOR_DETAILED_ANALYSIS']
+        sample_size = max(1, min(max_detailed, len(commits) // 10))
+        sample_commits = set()
+        for i in range(min(sample_size, len(commits))):
+            sample_commits.add(commits[i].id)
+        return sample_commits
+    
+    def _should_use_real_diff(self, commit, sample_commits=None):
+        """Indica se o commit deve ter o diff real analisado"""
+        # Verificar se deve usar diff real baseado em critérios
+        if sample_commits and commit.id in sample_commits:
+            return True
+        
+        if hasattr(commit, 'created_at'):
+            # Usar diff real apenas para commits dos últimos N dias (configurável)
+            try:
+                recent_days = PERFORMANCE_CONFIG['USE_REAL_DIFF_FOR_RECENT_DAYS']
+                commit_date = datetime.datetime.fromisoformat(commit.created_at.replace('Z', '+00:00'))
+                if timezone.is_naive(commit_date):
+                    commit_date = timezone.make_aware(commit_date)
+                # Datas do GitLab têm fuso: comparar com o horário atual também aware
+                if commit_date > timezone.now() - datetime.timedelta(days=recent_days):
+                    return True
+            except (ValueError, TypeError, AttributeError):
+                pass
+        
+        return False
+    
+    def _commit_line_stats(self, commit, diff=None):
+        """Calcula as contagens de linhas de um commit a partir do diff ou por estimativa"""
+        listing_stats = self._listing_line_stats(commit)
+        
+        if diff and len(diff) > 0:
+            # Analisar diff real
+            totals = self._analyze_commit_diff(diff)
+            
+            # Usar estatísticas reais se disponíveis
+            if totals[0] > 0 or totals[1] > 0:
+                if listing_stats is None:
+                    return totals
+                
+                # Totais exatos da listagem; o diff define apenas a divisão código/comentário/branco
+                additions, deletions = listing_stats
+                return self._split_line_stats(additions, deletions, totals[2:])
+        
+        if listing_stats is not None:
+            additions, deletions = listing_stats
+            return self._split_line_stats(additions, deletions)
+        
+        # Fallback para estimativa inteligente
+        return self._estimate_commit_stats(commit)
+    
+    def _listing_line_stats(self, commit):
+        """Retorna (additions, deletions) exatos vindos da listagem com with_stats, se houver"""
+        commit_stats = getattr(commit, 'stats', None)
+        if not isinstance(commit_stats, dict) or 'additions' not in commit_stats:
+            return None
+        
+        try:
+            return int(commit_stats['additions']), int(commit_stats.get('deletions', 0))
+        except (TypeError, ValueError):
+            return None
+    
+    def _split_line_stats(self, additions, deletions, parsed_split=None):
+        """Divide totais exatos de linhas em código/comentários/branco
+        
+        parsed_split traz as contagens do CodeParser na ordem de LINE_STAT_KEYS[2:];
+        sem ele, usa a distribuição típica de ESTIMATION_CONFIG.
+        """
+        def split(total, code, comments, blank):
+            parsed_total = code + comments + blank
+            if parsed_total <= 0:
+                code = ESTIMATION_CONFIG['CODE_PERCENTAGE']
+                comments = ESTIMATION_CONFIG['COMMENTS_PERCENTAGE']
+                blank = ESTIMATION_CONFIG['BLANK_PERCENTAGE']
+                parsed_total = code + comments + blank
+            
+            total_comments = int(round(total * comments / parsed_total))
+            total_blank = int(round(total * blank / parsed_total))
+            total_code = max(0, total - total_comments - total_blank)
+            return total_code, total_comments, total_blank
+        
+        if parsed_split is None:
+            parsed_split = (0, 0, 0, 0, 0, 0)
+        additions_code, additions_comments, additions_blank = split(
+            additions, parsed_split[0], parsed_split[2], parsed_split[4]
+        )
+        deletions_code, deletions_comments, deletions_blank = split(
+            deletions, parsed_split[1], parsed_split[3], parsed_split[5]
+        )
+        
+        return additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank
+    
+    def _analyze_commit_diff(self, diff):
+        """Soma as estatísticas de linhas de todos os arquivos de um diff"""
+        totals = {key: 0 for key in LINE_STAT_KEYS}
+        
+        for file_diff in diff:
+            filename = file_diff.get('new_path', file_diff.get('old_path', 'unknown'))
+            diff_content = file_diff.get('diff', '')
+            
+            if diff_content:
+                file_stats = self.code_parser.analyze_diff(diff_content, filename)
+                for key in LINE_STAT_KEYS:
+                    totals[key] += file_stats[key]
+        
+        return tuple(totals[key] for key in LINE_STAT_KEYS)
+    
+    def _merge_developer_stats(self, stats_lists):
+        """
+        Une listas de estatísticas por autor (ex.: de projetos diferentes) pelo email.
+        
+        Contagens de branches com o mesmo nome são somadas. As listas de
+        entrada não são alteradas (podem vir do cache).
+        """
+        merged = self._new_stats()
+        for stats in stats_lists:
+            for author in stats:
+                author_stats = merged[author['email']]
+                author_stats['name'] = author.get('name') or author_stats['name']
+                author_stats['email'] = author['email']
+                author_stats['commits'] += author.get('commits', 0)
+                for key in LINE_STAT_KEYS:
+                    author_stats[key] += author.get(key, 0)
+                
+                branches = author_stats.setdefault('branches', {})
+                for branch_name, counts in (author.get('branches') or {}).items():
+                    branch_stats = branches.setdefault(branch_name, {'commits': 0})
+                    for key, value in counts.items():
+                        branch_stats[key] = branch_stats.get(key, 0) + value
+        
+        return list(merged.values())
+    
+    def _estimate_commit_stats(self, commit):
+        """Estima estatísticas de commit baseado em heurísticas inteligentes"""
+        commit_message = getattr(commit, 'message', '')
+        message_length = len(commit_message)
+        
+        # Usar configurações de estimativa
+        thresholds = ESTIMATION_CONFIG['MESSAGE_THRESHOLDS']
+        estimates = ESTIMATION_CONFIG['COMMIT_ESTIMATES']
+        
+        # Determinar tipo de commit baseado no tamanho da mensagem
+        if message_length > thresholds['LARGE_COMMIT']:
+            commit_type = 'LARGE'
+        elif message_length > thresholds['MEDIUM_COMMIT']:
+            commit_type = 'MEDIUM'
+        elif message_length > thresholds['SMALL_COMMIT']:
+            commit_type = 'SMALL'
+        else:
+            commit_type = 'TINY'
+        
+        # Obter estimativas baseadas no tipo
+        additions = estimates[commit_type]['additions']
+        deletions = estimates[commit_type]['deletions']
+        
+        # Usar configurações de distribuição
+        code_pct = ESTIMATION_CONFIG['CODE_PERCENTAGE']
+        comments_pct = ESTIMATION_CONFIG['COMMENTS_PERCENTAGE']
+        blank_pct = ESTIMATION_CONFIG['BLANK_PERCENTAGE']
+        
+        # Calcular distribuição
+        additions_code = int(additions * code_pct)
+        deletions_code = int(deletions * code_pct)
+        additions_comments = int(additions * comments_pct)
+        deletions_comments = int(deletions * comments_pct)
+        additions_blank = int(additions * blank_pct)
+        deletions_blank = int(deletions * blank_pct)
+        
+        return additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank
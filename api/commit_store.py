@@ -0,0 +1,514 @@
+"""
+Armazenamento local de commits com sincronização incremental por projeto e branch
+
+Escopo: só a branch padrão de cada projeto é sincronizada (e as branches
+acompanhadas por webhooks de push). A listagem da API sem ref_name também
+usa a branch padrão, mas recorre a outras branches quando ela não tem
+commits no período; pelo banco local esse período fica vazio.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .client_pool import leased_gitlab_client
+from .commit_stats import LINE_STAT_KEYS
+from .commit_table import CommitTable
+from .jobs import run_long_task
+from .models import Project, Commit, CommitFileStat, SyncState, DailyAuthorStat
+from .performance_config import PERFORMANCE_CONFIG
+from .timeout_config import TIMEOUT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_LOCK_PREFIX = 'store_backfill'
+
+
+class LocalStoreUnavailable(Exception):
+    """O banco local ainda não cobre o período pedido (responder pela API)"""
+
+
+def _local_state(client, project_id, branch_name=None):
+    """
+    Projeto da API, Project local e SyncState da branch (padrão: a principal),
+    criados se preciso. O Project só é regravado quando os dados da API mudam:
+    as leituras de estatísticas passam por aqui e não devem escrever no banco.
+    """
+    project = client.get_project(project_id)
+    branch_name = branch_name or client._get_main_branch(project) or 'master'
+
+    fields = {
+        'name': getattr(project, 'name', ''),
+        'path_with_namespace': getattr(project, 'path_with_namespace', ''),
+        'default_branch': getattr(project, 'default_branch', '') or '',
+    }
+    local_project, created = Project.objects.get_or_create(id=project.id, defaults=fields)
+    changed = [field for field, value in fields.items() if getattr(local_project, field) != value]
+    if not created and changed:
+        for field in changed:
+            setattr(local_project, field, fields[field])
+        local_project.save(update_fields=changed)
+
+    state, _ = SyncState.objects.get_or_create(project=local_project, branch_name=branch_name)
+    return project, local_project, state
+
+
+def get_covered_state(client, project_id, since, branch_name=None, force=False, progress=None):
+    """
+    SyncState atualizado de um projeto/branch cujo histórico local cobre since.
+
+    Se o banco ainda não tem os commits desde since (projeto nunca
+    sincronizado ou período anterior ao histórico), o backfill é agendado no
+    pool de jobs e LocalStoreUnavailable é levantada: quem chama responde
+    pela API em vez de devolver um período incompleto. progress é repassado
+    a sync_project_commits.
+    """
+    since = _as_date(since)
+    if since is None:
+        # Histórico completo: o banco guarda só LOCAL_STORE_HISTORY_DAYS dias
+        raise LocalStoreUnavailable("Período sem início não é atendido pelo banco local")
+    _, _, state = _local_state(client, project_id, branch_name)
+    if state.history_since is None or since < state.history_since:
+        schedule_backfill(client, project_id, state.branch_name, since)
+        raise LocalStoreUnavailable(
+            f"Histórico local de {project_id}@{state.branch_name} não cobre {since}; backfill agendado"
+        )
+    return sync_project_commits(client, project_id, state.branch_name, force=force, progress=progress)
+
+
+def sync_project_commits(client, project_id, branch_name=None, force=False, progress=None):
+    """
+    Sincroniza no banco local os commits novos de um projeto/branch.
+
+    São listados (com with_stats) os commits desde o último sincronizado,
+    menos LOCAL_STORE_SYNC_OVERLAP_DAYS: o cursor é a data do commit mais
+    novo, e um merge traz commits com datas anteriores a ele. Os já gravados
+    são descartados pelo SHA. Em seguida, uma parte dos commits ainda sem estatísticas
+    por arquivo tem o diff analisado, e os totais diários (DailyAuthorStat)
+    dos dias afetados são recalculados. Retorna o SyncState atualizado.
+    progress, se informado, recebe as etapas 'commits_listed' e 'diffs_fetched'
+    (mesmo formato de GitlabClient.get_developer_stats).
+
+    Um projeto/branch ainda sem histórico local não é listado aqui: a carga
+    inicial é feita por backfill_project_commits, fora das requisições.
+    """
+    project, local_project, state = _local_state(client, project_id, branch_name)
+    branch_name = state.branch_name
+
+    # Evitar ressincronizar a cada requisição
+    now = timezone.now()
+    interval = PERFORMANCE_CONFIG['LOCAL_STORE_SYNC_INTERVAL']
+    if not force and state.synced_at and (now - state.synced_at).total_seconds() < interval:
+        return state
+    if state.history_since is None:
+        return state
+
+    # Desde o último commit sincronizado, com sobreposição (ou, se o histórico
+    # carregado estava vazio, desde o seu início)
+    if state.last_committed_at:
+        overlap = datetime.timedelta(days=PERFORMANCE_CONFIG['LOCAL_STORE_SYNC_OVERLAP_DAYS'])
+        since = (state.last_committed_at - overlap).isoformat()
+    else:
+        since, _ = client._date_range_bounds(state.history_since, None)
+    listed = project.commits.list(
+        ref_name=branch_name,
+        since=since,
+        with_stats=True,
+        all=True,
+        per_page=PERFORMANCE_CONFIG['WITH_STATS_PER_PAGE'],
+        timeout=TIMEOUT_CONFIG['LIST_COMMITS_TIMEOUT']
+    )
+    client._report_progress(progress, 'commits_listed', len(listed), len(listed))
+
+    with transaction.atomic():
+        new_commits = _store_listed_commits(local_project, state, listed, branch_name)
+        state.synced_at = now
+        state.save()
+
+    _finish_sync(client, project, local_project, new_commits, progress)
+    return state
+
+
+def backfill_project_commits(client, project_id, since=None, branch_name=None):
+    """
+    Completa o histórico local de um projeto/branch a partir de since (data).
+
+    Lista, com with_stats, os commits entre since (no mínimo os últimos
+    LOCAL_STORE_HISTORY_DAYS dias) e o início do histórico já coberto, ou
+    até agora na primeira vez, e registra o novo início em
+    SyncState.history_since. Em projetos grandes pode levar minutos: roda no
+    pool de jobs (schedule_backfill) ou no comando warm_metrics_cache, nunca
+    dentro de uma requisição. Retorna o SyncState atualizado.
+    """
+    project, local_project, state = _local_state(client, project_id, branch_name)
+    branch_name = state.branch_name
+
+    oldest = timezone.localdate() - datetime.timedelta(days=PERFORMANCE_CONFIG['LOCAL_STORE_HISTORY_DAYS'])
+    since = min(_as_date(since) or oldest, oldest)
+    if state.history_since is not None and state.history_since <= since:
+        return state
+
+    since_bound, until_bound = client._date_range_bounds(since, state.history_since)
+    list_params = {'until': until_bound} if until_bound else {}
+    now = timezone.now()
+    listed = project.commits.list(
+        ref_name=branch_name,
+        since=since_bound,
+        with_stats=True,
+        all=True,
+        per_page=PERFORMANCE_CONFIG['WITH_STATS_PER_PAGE'],
+        timeout=TIMEOUT_CONFIG['LIST_COMMITS_TIMEOUT'],
+        **list_params
+    )
+
+    with transaction.atomic():
+        new_commits = _store_listed_commits(local_project, state, listed, branch_name)
+        if state.history_since is None:
+            # Primeira carga: listou até agora, vale como sincronização incremental
+            state.synced_at = now
+        state.history_since = since
+        state.save()
+
+    _finish_sync(client, project, local_project, new_commits)
+    return state
+
+
+def schedule_backfill(client, project_id, branch_name, since=None):
+    """
+    Agenda backfill_project_commits no pool de jobs (no máximo um por
+    projeto/branch em andamento, entre processos). Retorna se foi agendado.
+    """
+    lock_key = f"{BACKFILL_LOCK_PREFIX}_{project_id}_{branch_name}"
+    if not cache.add(lock_key, 1, PERFORMANCE_CONFIG['LOCAL_STORE_BACKFILL_LOCK_TIMEOUT']):
+        return False
+    run_long_task(_run_backfill, client.token, client.url, project_id, branch_name, since, lock_key)
+    return True
+
+
+def _run_backfill(token, url, project_id, branch_name, since, lock_key):
+    """Executa o backfill em segundo plano, com um cliente reservado do pool"""
+    try:
+        with leased_gitlab_client(token, url) as client:
+            state = backfill_project_commits(client, project_id, since, branch_name)
+        logger.info("Backfill de %s@%s concluído desde %s", project_id, branch_name, state.history_since)
+    finally:
+        cache.delete(lock_key)
+
+
+def _store_listed_commits(local_project, state, listed, branch_name):
+    """
+    Grava os commits listados que ainda não estão no banco e avança o
+    último commit sincronizado do SyncState (sem salvá-lo). Retorna os novos.
+    """
+    # Os filtros since/until do GitLab são inclusivos: ignorar o que já está no banco
+    listed_shas = [commit.id for commit in listed]
+    existing = set(
+        Commit.objects.filter(project=local_project, sha__in=listed_shas).values_list('sha', flat=True)
+    )
+    new_commits = [
+        _commit_from_gitlab(local_project, commit, branch_name)
+        for commit in listed if commit.id not in existing
+    ]
+    Commit.objects.bulk_create(new_commits, ignore_conflicts=True)
+
+    dated = [commit for commit in new_commits if commit.committed_date]
+    if dated:
+        newest = max(dated, key=lambda commit: commit.committed_date)
+        if not state.last_committed_at or newest.committed_date >= state.last_committed_at:
+            state.last_committed_at = newest.committed_date
+            state.last_commit_sha = newest.sha
+    return new_commits
+
+
+def _finish_sync(client, project, local_project, new_commits, progress=None):
+    """Analisa diffs pendentes e recalcula apenas os dias que receberam commits ou estatísticas"""
+    analyzed = _sync_file_stats(client, project, local_project, progress)
+    touched = {
+        (commit.branch_name, timezone.localdate(commit.committed_date))
+        for commit in new_commits + analyzed if commit.committed_date
+    }
+    refresh_daily_stats(client, local_project, touched)
+
+
+def _as_date(value):
+    """Data (date) a partir de date, datetime ou texto YYYY-MM-DD (None se vazio)"""
+    if not value:
+        return None
+    if isinstance(value, datetime.datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def is_tracked_branch(project, branch_name):
+    """
+    Se a branch é sincronizada no banco local: a branch padrão do projeto ou
+    uma já acompanhada (com SyncState). Pushes para outras branches são
+    ignorados, para que os commits delas não ocupem o SHA antes do merge na
+    branch padrão (Commit é único por projeto/SHA).
+    """
+    if branch_name == (getattr(project, 'default_branch', '') or ''):
+        return True
+    return SyncState.objects.filter(project_id=project.id, branch_name=branch_name).exists()
+
+
+def sync_pushed_commits(client, project_id, branch_name, shas):
+    """
+    Registra no banco local os commits recebidos por um webhook de push.
+
+    Só branches acompanhadas (is_tracked_branch) são consideradas. Cada SHA ainda desconhecido é buscado individualmente (a
+    resposta já traz as contagens de linhas), os diffs pendentes são
+    analisados e os totais diários dos dias afetados são recalculados.
+    Retorna a quantidade de commits novos.
+    """
+    project = client.get_project(project_id)
+    if not is_tracked_branch(project, branch_name):
+        return 0
+    default_branch = getattr(project, 'default_branch', '') or ''
+
+    local_project, _ = Project.objects.get_or_create(
+        id=project.id,
+        defaults={
+            'name': getattr(project, 'name', ''),
+            'path_with_namespace': getattr(project, 'path_with_namespace', ''),
+            'default_branch': default_branch,
+        }
+    )
+    existing = set(
+        Commit.objects.filter(project=local_project, sha__in=shas).values_list('sha', flat=True)
+    )
+    new_commits = []
+    for sha in dict.fromkeys(shas):
+        if sha in existing:
+            continue
+        commit = project.commits.get(sha, timeout=TIMEOUT_CONFIG['LIST_COMMITS_TIMEOUT'])
+        new_commits.append(_commit_from_gitlab(local_project, commit, branch_name))
+
+    with transaction.atomic():
+        Commit.objects.bulk_create(new_commits, ignore_conflicts=True)
+
+        state, _ = SyncState.objects.get_or_create(project=local_project, branch_name=branch_name)
+        dated = [commit for commit in new_commits if commit.committed_date]
+        if dated:
+            newest = max(dated, key=lambda commit: commit.committed_date)
+            if not state.last_committed_at or newest.committed_date >= state.last_committed_at:
+                state.last_committed_at = newest.committed_date
+                state.last_commit_sha = newest.sha
+                state.save()
+
+    _finish_sync(client, project, local_project, new_commits)
+    return len(new_commits)
+
+
+def _commit_from_gitlab(local_project, commit, branch_name):
+    """Cria (sem salvar) um Commit local a partir de um commit da API"""
+    commit_stats = getattr(commit, 'stats', None) or {}
+    return Commit(
+        project=local_project,
+        sha=commit.id,
+        short_id=getattr(commit, 'short_id', '') or '',
+        title=getattr(commit, 'title', '') or '',
+        message=getattr(commit, 'message', '') or '',
+        author_name=getattr(commit, 'author_name', '') or '',
+        author_email=getattr(commit, 'author_email', '') or '',
+        authored_date=_parse_date(getattr(commit, 'authored_date', None)),
+        committed_date=_parse_date(getattr(commit, 'committed_date', None)),
+        branch_name=branch_name,
+        additions=commit_stats.get('additions'),
+        deletions=commit_stats.get('deletions'),
+    )
+
+
+def _parse_date(value):
+    """Converte datas ISO 8601 da API em datetime (None se inválida)"""
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+
+def _sync_file_stats(client, project, local_project, progress=None):
+    """
+    Analisa os diffs de commits ainda sem estatísticas por arquivo (em lotes limitados).
+    Retorna os commits analisados; o andamento da busca vai para progress ('diffs_fetched').
+    """
+    pending = list(
+        Commit.objects.filter(project=local_project, file_stats_synced=False)
+        .order_by('-committed_date')[:PERFORMANCE_CONFIG['LOCAL_STORE_DIFFS_PER_SYNC']]
+    )
+    if not pending:
+        return []
+
+    diffs = client._fetch_commit_diffs(
+        project, [commit.sha for commit in pending],
+        lambda done, total: client._report_progress(progress, 'diffs_fetched', done, total)
+    )
+
+    file_stats = []
+    analyzed = []
+    for commit in pending:
+        diff = diffs.get(commit.sha)
+        if diff is None:
+            # Falha na busca: tentar novamente na próxima sincronização
+            continue
+
+        for file_diff in diff:
+            filename = file_diff.get('new_path', file_diff.get('old_path', 'unknown'))
+            diff_content = file_diff.get('diff', '')
+            if not diff_content:
+                continue
+
+            counts = client.code_parser.analyze_diff(diff_content, filename)
+            file_stats.append(CommitFileStat(
+                commit=commit,
+                path=filename,
+                language=client.code_parser.detect_language(filename),
+                **{key: counts[key] for key in LINE_STAT_KEYS}
+            ))
+        analyzed.append(commit)
+
+    with transaction.atomic():
+        CommitFileStat.objects.bulk_create(file_stats)
+        Commit.objects.filter(pk__in=[commit.pk for commit in analyzed]).update(file_stats_synced=True)
+
+    return analyzed
+
+
+def stored_line_stats(client, commit):
+    """Contagens de linhas de um Commit local, na ordem de LINE_STAT_KEYS"""
+    file_stats = list(commit.file_stats.all())
+    parsed = None
+    if file_stats:
+        parsed = tuple(sum(getattr(stat, key) for stat in file_stats) for key in LINE_STAT_KEYS)
+
+    if commit.additions is not None:
+        # Totais exatos da listagem; o diff (se analisado) define a divisão
+        return client._split_line_stats(
+            commit.additions, commit.deletions or 0, parsed[2:] if parsed else None
+        )
+
+    if parsed and (parsed[0] > 0 or parsed[1] > 0):
+        return parsed
+
+    return client._estimate_commit_stats(commit)
+
+
+def refresh_daily_stats(client, local_project, touched):
+    """
+    Recalcula os totais diários de um projeto para os pares (branch, dia) informados.
+
+    Cada dia é reconstruído a partir dos commits locais, então o resultado é o
+    mesmo independentemente da ordem em que commits e diffs foram sincronizados.
+    """
+    days_by_branch = defaultdict(set)
+    for branch_name, day in touched:
+        days_by_branch[branch_name].add(day)
+
+    for branch_name, days in days_by_branch.items():
+        commits = (
+            Commit.objects
+            .filter(project=local_project, branch_name=branch_name, committed_date__date__in=days)
+            .prefetch_related('file_stats')
+        )
+
+        totals = {}
+        for commit in commits:
+            key = (timezone.localdate(commit.committed_date), commit.author_email)
+            row = totals.get(key)
+            if row is None:
+                row = totals[key] = DailyAuthorStat(
+                    project=local_project,
+                    author_email=commit.author_email,
+                    author_name=commit.author_name,
+                    branch_name=branch_name,
+                    day=key[0],
+                )
+            row.commits += 1
+            for stat_key, value in zip(LINE_STAT_KEYS, stored_line_stats(client, commit)):
+                setattr(row, stat_key, getattr(row, stat_key) + value)
+
+        with transaction.atomic():
+            DailyAuthorStat.objects.filter(
+                project=local_project, branch_name=branch_name, day__in=days
+            ).delete()
+            DailyAuthorStat.objects.bulk_create(totals.values())
+
+
+def get_stored_developer_stats(client, project_id, since, until, branch_name=None, progress=None, force=False):
+    """
+    Calcula as estatísticas por autor a partir dos totais diários locais.
+
+    Sincroniza o projeto antes (incrementalmente); o período é resolvido
+    somando no máximo um registro por dia/autor, com since e until inclusivos
+    (dias locais). Levanta LocalStoreUnavailable se o histórico local ainda
+    não cobre since; progress acompanha a sincronização. force=True
+    sincroniza mesmo dentro de LOCAL_STORE_SYNC_INTERVAL.
+    """
+    state = get_covered_state(client, project_id, since, branch_name, force=force, progress=progress)
+
+    rows = (
+        DailyAuthorStat.objects
+        .filter(
+            project_id=state.project_id,
+            branch_name=state.branch_name,
+            day__gte=since,
+            day__lte=until,
+        )
+        .values('author_email', 'branch_name')
+        .annotate(
+            name=Max('author_name'),
+            total_commits=Sum('commits'),
+            **{f'total_{key}': Sum(key) for key in LINE_STAT_KEYS}
+        )
+    )
+
+    stats = client._new_stats()
+    for row in rows:
+        author_stats = stats[row['author_email']]
+        author_stats['name'] = row['name']
+        author_stats['email'] = row['author_email']
+        author_stats['commits'] += row['total_commits']
+
+        branch_stats = author_stats.setdefault('branches', {}).setdefault(
+            row['branch_name'], {'commits': 0, **{key: 0 for key in LINE_STAT_KEYS}}
+        )
+        branch_stats['commits'] += row['total_commits']
+        for key in LINE_STAT_KEYS:
+            author_stats[key] += row[f'total_{key}']
+            branch_stats[key] += row[f'total_{key}']
+
+    return list(stats.values())
+
+
+def get_stored_commit_table(client, project_id, since, until, branch_name=None, progress=None):
+    """
+    CommitTable com os totais diários locais do período (uma linha por
+    dia/autor, since e until inclusivos), para agrupar em várias janelas sem
+    reconsultar o banco. Levanta LocalStoreUnavailable como
+    get_stored_developer_stats.
+    """
+    state = get_covered_state(client, project_id, since, branch_name, progress=progress)
+
+    rows = (
+        DailyAuthorStat.objects
+        .filter(
+            project_id=state.project_id,
+            branch_name=state.branch_name,
+            day__gte=since,
+            day__lte=until,
+        )
+        .order_by('day')
+        .values_list('author_email', 'author_name', 'branch_name', 'day', 'commits', *LINE_STAT_KEYS)
+    )
+
+    table = CommitTable()
+    for author_email, author_name, row_branch, day, commits, *line_stats in rows:
+        table.append_row(author_email, author_name, row_branch, day, line_stats, commits=commits)
+    return table
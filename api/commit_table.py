@@ -0,0 +1,266 @@
+"""
+Tabela colunar de commits com agregação vetorizada (NumPy)
+"""
+
+import datetime
+import numpy as np
+from django.utils import timezone
+from .commit_stats import LINE_STAT_KEYS
+
+SECONDS_PER_DAY = 86400
+GRANULARITIES = ('day', 'week', 'month')
+
+
+class CommitTable:
+    """
+    Lote de commits em colunas: ids internos de autor e branch, data do
+    commit e as oito contagens de LINE_STAT_KEYS.
+
+    Os commits entram um a um com append() (ou já somados, como os totais
+    diários do banco local, com append_row()); os totais por autor e por
+    autor/branch (no lote todo ou em janelas de datas) são calculados de uma
+    vez com np.bincount, sem laços em Python por commit. O resultado de
+    aggregate() tem o formato das estatísticas por autor (DeveloperStatSerializer).
+    """
+
+    def __init__(self):
+        self._author_ids = {}
+        self._author_emails = []
+        self._author_names = []
+        self._branch_ids = {}
+        self._branch_names = []
+        self._authors = []
+        self._branches = []
+        self._timestamps = []
+        self._counters = []
+        self._weights = []
+        self._frozen = None
+        self._days = None
+
+    def __len__(self):
+        return len(self._authors)
+
+    def append(self, commit, line_stats, branch_name=None):
+        """Adiciona um commit (line_stats na ordem de LINE_STAT_KEYS)"""
+        if branch_name is None:
+            branch_name = getattr(commit, 'branch_name', None) or getattr(commit, 'ref_name', None) or 'unknown'
+        self.append_row(
+            getattr(commit, 'author_email', 'unknown@example.com'),
+            getattr(commit, 'author_name', 'Unknown'),
+            branch_name,
+            # Datas são convertidas só se houver agrupamento por janelas (em lote)
+            getattr(commit, 'committed_date', None) or getattr(commit, 'authored_date', None),
+            line_stats,
+        )
+
+    def append_row(self, author_email, author_name, branch_name, date, line_stats, commits=1):
+        """
+        Adiciona uma linha já agregada: commits commits do autor na branch e data
+        informadas (datetime, data ISO ou date local, para totais diários)
+        """
+        author_id = self._author_ids.get(author_email)
+        if author_id is None:
+            author_id = self._author_ids[author_email] = len(self._author_emails)
+            self._author_emails.append(author_email)
+            self._author_names.append('')
+        # Prevalece o nome do último commit do autor
+        self._author_names[author_id] = author_name
+
+        branch_id = self._branch_ids.get(branch_name)
+        if branch_id is None:
+            branch_id = self._branch_ids[branch_name] = len(self._branch_names)
+            self._branch_names.append(branch_name)
+
+        self._authors.append(author_id)
+        self._branches.append(branch_id)
+        self._timestamps.append(date)
+        self._counters.append(line_stats)
+        self._weights.append(commits)
+        self._frozen = None
+        self._days = None
+
+    def _columns(self):
+        """Converte as listas acumuladas em arrays (uma vez por lote)"""
+        if self._frozen is None:
+            self._frozen = (
+                np.asarray(self._authors, dtype=np.int64),
+                np.asarray(self._branches, dtype=np.int64),
+                np.asarray(self._counters, dtype=np.int64).reshape(-1, len(LINE_STAT_KEYS)),
+                np.asarray(self._weights, dtype=np.int64),
+            )
+        return self._frozen
+
+    def _local_days(self):
+        """Dia local (TIME_ZONE) de cada commit, em dias desde a época"""
+        if self._days is None:
+            self._days = _local_days(self._timestamps)
+        return self._days
+
+    @staticmethod
+    def _group_sums(group_ids, counters, size):
+        """Soma das colunas de contagem por grupo (um bincount por coluna)"""
+        return np.column_stack([
+            np.bincount(group_ids, weights=counters[:, column], minlength=size)
+            for column in range(counters.shape[1])
+        ]).astype(np.int64)
+
+    def aggregate(self, mask=None):
+        """
+        Totais por autor (e por branch de cada autor), no formato da API.
+
+        mask (array booleano por commit) restringe o cálculo a parte do lote.
+        """
+        if not self._authors:
+            return []
+
+        authors, branches, counters, weights = self._columns()
+        if mask is not None:
+            authors, branches, counters, weights = authors[mask], branches[mask], counters[mask], weights[mask]
+            if authors.size == 0:
+                return []
+
+        author_count = len(self._author_emails)
+        commits = np.bincount(authors, weights=weights, minlength=author_count).astype(np.int64)
+        totals = self._group_sums(authors, counters, author_count)
+
+        # Pares (autor, branch) na ordem em que aparecem pela primeira vez
+        pairs = authors * len(self._branch_names) + branches
+        unique_pairs, first_index, inverse = np.unique(pairs, return_index=True, return_inverse=True)
+        pair_commits = np.bincount(inverse, weights=weights, minlength=unique_pairs.size).astype(np.int64)
+        pair_totals = self._group_sums(inverse, counters, unique_pairs.size)
+
+        # Autores na ordem de primeira aparição, como no defaultdict original
+        _, first_author_index = np.unique(authors, return_index=True)
+        author_order = authors[np.sort(first_author_index)].tolist()
+
+        totals_list = totals.tolist()
+        commits_list = commits.tolist()
+        result = {}
+        for author_id in author_order:
+            counts = dict(zip(LINE_STAT_KEYS, totals_list[author_id]))
+            entry = {
+                'name': self._author_names[author_id],
+                'email': self._author_emails[author_id],
+                'additions': counts.pop('additions'),
+                'deletions': counts.pop('deletions'),
+                'commits': commits_list[author_id],
+            }
+            entry.update(counts)
+            entry['branches'] = {}
+            result[author_id] = entry
+
+        pair_totals_list = pair_totals.tolist()
+        pair_commits_list = pair_commits.tolist()
+        branch_count = len(self._branch_names)
+        for position in np.argsort(first_index, kind='stable').tolist():
+            author_id, branch_id = divmod(int(unique_pairs[position]), branch_count)
+            branch_stats = {'commits': pair_commits_list[position]}
+            branch_stats.update(zip(LINE_STAT_KEYS, pair_totals_list[position]))
+            result[author_id]['branches'][self._branch_names[branch_id]] = branch_stats
+
+        return list(result.values())
+
+    def aggregate_windows(self, windows):
+        """
+        Estatísticas por autor de cada janela (início, fim) de datas locais,
+        ambos inclusivos. As janelas podem se sobrepor; o lote é percorrido
+        uma única vez para as datas e cada janela custa apenas uma máscara.
+        """
+        if not self._authors:
+            return [[] for _ in windows]
+
+        days = self._local_days()
+        epoch = datetime.date(1970, 1, 1)
+        return [
+            self.aggregate((days >= (start - epoch).days) & (days <= (end - epoch).days))
+            for start, end in windows
+        ]
+
+
+def period_windows(since, until, granularity, limit=None):
+    """
+    Divide o intervalo [since, until] (datas) em janelas de dia, semana
+    (começando na segunda) ou mês, recortando a primeira e a última ao intervalo.
+    Com limit, para ao passar de limit janelas (o chamador detecta o excesso
+    sem gerar o intervalo inteiro).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity}")
+
+    windows = []
+    start = since
+    while start <= until:
+        if limit is not None and len(windows) > limit:
+            break
+        try:
+            if granularity == 'day':
+                next_start = start + datetime.timedelta(days=1)
+            elif granularity == 'week':
+                next_start = start + datetime.timedelta(days=7 - start.weekday())
+            else:
+                next_start = (start.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        except OverflowError:
+            # Última janela antes de date.max
+            windows.append((start, until))
+            break
+        windows.append((start, min(next_start - datetime.timedelta(days=1), until)))
+        start = next_start
+    return windows
+
+
+def _local_days(values):
+    """
+    Converte datas ISO 8601 (ou datetimes) em dias locais desde a época.
+
+    A parte de data/hora é interpretada pelo NumPy de uma vez; o deslocamento
+    de cada valor e o do fuso local (um por dia distinto) são aplicados em lote.
+    """
+    count = len(values)
+    seconds = np.zeros(count, dtype=np.int64)
+    offsets = np.zeros(count, dtype=np.int64)
+    parseable = np.zeros(count, dtype=bool)
+    texts = []
+    for index, value in enumerate(values):
+        if not isinstance(value, datetime.datetime) and isinstance(value, datetime.date):
+            # Data local (totais diários): meio-dia local cai no mesmo dia
+            value = timezone.make_aware(datetime.datetime.combine(value, datetime.time(12)))
+        if isinstance(value, datetime.datetime):
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            value = value.isoformat()
+        if not value or not isinstance(value, str) or len(value) < 19:
+            texts.append('1970-01-01T00:00:00')
+            continue
+        texts.append(value[:19])
+        offsets[index] = _utc_offset_seconds(value[19:])
+        parseable[index] = True
+
+    if count:
+        seconds = np.array(texts, dtype='datetime64[s]').astype(np.int64) - offsets
+
+    # Deslocamento do fuso local por dia UTC distinto (poucas chamadas ao zoneinfo)
+    utc_days = seconds // SECONDS_PER_DAY
+    unique_days, inverse = np.unique(utc_days, return_inverse=True)
+    current_tz = timezone.get_current_timezone()
+    local_offsets = np.array([
+        datetime.datetime.fromtimestamp(int(day) * SECONDS_PER_DAY + SECONDS_PER_DAY // 2, current_tz)
+        .utcoffset().total_seconds()
+        for day in unique_days.tolist()
+    ], dtype=np.int64)
+
+    days = (seconds + local_offsets[inverse]) // SECONDS_PER_DAY
+    days[~parseable] = 0
+    return days
+
+
+def _utc_offset_seconds(suffix):
+    """Deslocamento do sufixo de uma data ISO (ex.: '.123+03:00', 'Z') em segundos"""
+    for sign_char, sign in (('+', 1), ('-', -1)):
+        position = suffix.rfind(sign_char)
+        if position != -1:
+            hours, _, minutes = suffix[position + 1:].partition(':')
+            try:
+                return sign * (int(hours[:2]) * 3600 + int(minutes or hours[2:4] or 0) * 60)
+            except ValueError:
+                return 0
+    return 0
@@ -0,0 +1,148 @@
+"""
+Armazenamento em disco de diffs de commits, endereçado por projeto e SHA
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from django.conf import settings
+
+# SHAs válidos (evita caminhos arbitrários a partir da chave)
+SHA_PATTERN = re.compile(r'^[0-9a-fA-F]{7,64}$')
+
+
+class DiffStore:
+    """
+    Diffs de commits persistidos em disco, sem expiração.
+
+    O diff de um SHA é imutável, então a chave é apenas (project_id, sha).
+    O tamanho total é limitado a max_bytes: ao ultrapassar, os arquivos menos
+    usados recentemente (mtime, atualizado a cada leitura) são removidos.
+    Seguro para várias threads e vários processos usando o mesmo diretório.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Calculado sob demanda (varredura do diretório)
+
+    def _path(self, project_id, sha):
+        """Caminho do arquivo de um diff (None se a chave for inválida)"""
+        if not SHA_PATTERN.match(str(sha)):
+            return None
+        try:
+            project_id = int(project_id)
+        except (TypeError, ValueError):
+            return None
+        sha = str(sha).lower()
+        return self.directory / str(project_id) / sha[:2] / f"{sha}.json.gz"
+
+    def get(self, project_id, sha):
+        """Retorna o diff armazenado ou None"""
+        path = self._path(project_id, sha)
+        if path is None:
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                diff = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Marcar como usado recentemente (ordem LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return diff
+
+    def set(self, project_id, sha, diff):
+        """Armazena o diff de um commit (escrita atômica)"""
+        path = self._path(project_id, sha)
+        if path is None or diff is None:
+            return
+
+        data = gzip.compress(json.dumps(diff).encode('utf-8'))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            # Ao sobrescrever, o arquivo anterior deixa de contar no total
+            try:
+                previous_size = path.stat().st_size
+            except FileNotFoundError:
+                previous_size = 0
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # O temporário não entra na contagem nem na remoção LRU: não deixar para trás
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total()
+            else:
+                self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Lista (mtime, tamanho, caminho) de todos os diffs armazenados"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_total(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Remove os diffs menos usados até ficar abaixo de 90% do limite"""
+        # Nova varredura: corrige o total quando outros processos também escrevem
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+        self._total_bytes = total
+
+
+_diff_store = None
+_diff_store_lock = threading.Lock()
+
+
+def get_diff_store():
+    """Retorna a instância do DiffStore do processo, criada a partir das settings"""
+    global _diff_store
+    if _diff_store is None:
+        with _diff_store_lock:
+            if _diff_store is None:
+                _diff_store = DiffStore(settings.DIFF_STORE_DIR, settings.DIFF_STORE_MAX_BYTES)
+    return _diff_store
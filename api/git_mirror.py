@@ -0,0 +1,292 @@
+"""
+Backend de estatísticas baseado em mirrors git locais (git log --patch / --numstat)
+"""
+
+import base64
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from .code_parser import CodeParser
+from .commit_stats import CommitStatsMixin, LINE_STAT_KEYS
+from .commit_table import CommitTable
+from .performance_config import PERFORMANCE_CONFIG
+from .records import CommitRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do processo
+    fcntl = None
+
+# Separadores do formato de saída do git log
+COMMIT_MARKER = '\x00\x00'
+FIELD_SEPARATOR = '\x1f'
+# Mesmos separadores, escritos com os escapes do git (argv não aceita bytes nulos)
+LOG_FORMAT = '%x00%x00' + '%x1f'.join(['%H', '%h', '%an', '%ae', '%aI', '%cI', '%s'])
+
+
+class GitMirrorError(Exception):
+    """Falha ao criar, atualizar ou ler um mirror git"""
+
+
+class GitMirrorBackend(CommitStatsMixin):
+    """
+    Calcula estatísticas por autor a partir de um mirror bare local.
+
+    O mirror é clonado uma vez e atualizado com git fetch incremental. Sem
+    blobs (--filter=blob:none) só por padrão quando o patch não é analisado
+    (GIT_MIRROR_ANALYZE_PATCH desligado): com --patch o git log buscaria os
+    blobs um a um no servidor. A saída do git log é processada
+    em streaming: com --patch cada arquivo passa pelo CodeParser; com
+    --numstat apenas os totais exatos são lidos.
+
+    O source pode ser uma URL HTTP(S) do GitLab ou um caminho local, o que
+    permite usar repositórios de fixture sem acesso à rede.
+    """
+
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, token=None, base_dir=None, blobless=None, code_parser=None):
+        self.token = token
+        self.base_dir = Path(base_dir or settings.GIT_MIRROR_DIR)
+        if blobless is None:
+            blobless = settings.GIT_MIRROR_BLOBLESS
+        if blobless is None:
+            blobless = not PERFORMANCE_CONFIG['GIT_MIRROR_ANALYZE_PATCH']
+        self.blobless = blobless
+        self.code_parser = code_parser or CodeParser()
+
+    def _lock_for(self, project_id):
+        """Lock por projeto: evita clones/fetches simultâneos do mesmo mirror no processo"""
+        with self._locks_guard:
+            return self._locks.setdefault(project_id, threading.Lock())
+
+    @contextmanager
+    def _mirror_lock(self, project_id):
+        """
+        Exclusão mútua no clone/fetch do mirror: entre as threads do processo
+        (_lock_for) e entre os workers do gunicorn (flock em <id>.lock no
+        diretório dos mirrors, liberado ao fechar o arquivo)
+        """
+        with self._lock_for(project_id):
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.base_dir / f"{project_id}.lock", 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def _git_env(self, source):
+        """
+        Ambiente do git com a configuração de autenticação/SSL em
+        GIT_CONFIG_COUNT/GIT_CONFIG_KEY_n/GIT_CONFIG_VALUE_n: o token não
+        aparece na linha de comando (visível em ps) nem fica gravado no mirror.
+        """
+        config = []
+        if str(source or '').startswith(('http://', 'https://')):
+            if self.token:
+                credentials = base64.b64encode(f"oauth2:{self.token}".encode()).decode()
+                config.append(('http.extraHeader', f"Authorization: Basic {credentials}"))
+            if not getattr(settings, 'GITLAB_SSL_VERIFY', False):
+                config.append(('http.sslVerify', 'false'))
+
+        env = os.environ.copy()
+        # Preservar entradas já definidas no ambiente do processo
+        start = int(env.get('GIT_CONFIG_COUNT') or 0)
+        for index, (key, value) in enumerate(config, start):
+            env[f'GIT_CONFIG_KEY_{index}'] = key
+            env[f'GIT_CONFIG_VALUE_{index}'] = value
+        env['GIT_CONFIG_COUNT'] = str(start + len(config))
+        return env
+
+    def _run(self, args, cwd=None, timeout=None, source=None):
+        """Executa um comando git e retorna a saída (levanta GitMirrorError em caso de falha)"""
+        try:
+            result = subprocess.run(
+                ['git'] + args,
+                cwd=cwd,
+                env=self._git_env(source),
+                capture_output=True,
+                text=True,
+                timeout=timeout or PERFORMANCE_CONFIG['GIT_MIRROR_TIMEOUT'],
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise GitMirrorError(f"Erro ao executar git {args[0]}: {str(e)}")
+        if result.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} falhou: {result.stderr.strip()}")
+        return result.stdout
+
+    def mirror_path(self, project_id):
+        return self.base_dir / f"{project_id}.git"
+
+    def ensure_mirror(self, project_id, source):
+        """Cria o mirror se não existir; caso contrário faz fetch incremental (com intervalo mínimo)"""
+        path = self.mirror_path(project_id)
+
+        with self._mirror_lock(project_id):
+            # Outro worker pode ter criado ou atualizado o mirror enquanto este esperava o lock
+            if not path.exists():
+                # Clonar em diretório temporário e renomear: nunca deixa mirror pela metade
+                tmp_dir = tempfile.mkdtemp(dir=self.base_dir, prefix=f".{project_id}-")
+                try:
+                    args = ['clone', '--mirror', '--quiet']
+                    if self.blobless:
+                        args.append('--filter=blob:none')
+                    self._run(args + [str(source), tmp_dir], source=source)
+                    # O clone conta como o último fetch para GIT_MIRROR_FETCH_INTERVAL
+                    Path(tmp_dir, 'FETCH_HEAD').touch()
+                    os.replace(tmp_dir, path)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                return path
+
+            fetch_head = path / 'FETCH_HEAD'
+            interval = PERFORMANCE_CONFIG['GIT_MIRROR_FETCH_INTERVAL']
+            if fetch_head.exists() and time.time() - fetch_head.stat().st_mtime < interval:
+                return path
+
+            self._run(
+                ['fetch', '--prune', '--quiet', str(source),
+                 '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*'],
+                cwd=path, source=source,
+            )
+            fetch_head.touch()
+        return path
+
+    def _default_branch(self, path):
+        try:
+            return self._run(['symbolic-ref', '--short', 'HEAD'], cwd=path).strip() or 'HEAD'
+        except GitMirrorError:
+            return 'HEAD'
+
+    def iter_commits(self, path, since=None, until=None, ref=None, patch=True, source=None):
+        """
+        Percorre o git log em streaming, retornando (commit, line_stats) por commit.
+
+        Com patch=True as contagens vêm do CodeParser aplicado a cada arquivo;
+        caso contrário, dos totais do --numstat divididos por estimativa.
+        O source só é usado para autenticar a busca de blobs em mirrors sem blobs.
+        """
+        # -M: um arquivo renomeado conta só as linhas alteradas, como nos diffs da API
+        args = ['git', 'log', '--no-color', '-M', f'--format={LOG_FORMAT}']
+        args.append('--patch' if patch else '--numstat')
+        # Limites explícitos no fuso local (TIME_ZONE), como na API e no banco local
+        since, until = self._date_range_bounds(since, until)
+        if since:
+            args.append(f'--since={since}')
+        if until:
+            args.append(f'--until={until}')
+        args.append(ref or 'HEAD')
+        args.append('--')
+
+        process = subprocess.Popen(
+            args, cwd=path, env=self._git_env(source), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', errors='replace',
+        )
+
+        commit = None
+        totals = None
+        filename = None
+        hunk_lines = []
+
+        def flush_file():
+            if filename and hunk_lines:
+                file_stats = self.code_parser.analyze_diff('\n'.join(hunk_lines), filename)
+                for key in LINE_STAT_KEYS:
+                    totals[key] += file_stats[key]
+
+        def finish_commit():
+            if patch:
+                return tuple(totals[key] for key in LINE_STAT_KEYS)
+            return self._split_line_stats(totals['additions'], totals['deletions'])
+
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\n')
+
+                if line.startswith(COMMIT_MARKER):
+                    if commit is not None:
+                        flush_file()
+                        yield commit, finish_commit()
+                    fields = line[len(COMMIT_MARKER):].split(FIELD_SEPARATOR)
+                    fields += [''] * (7 - len(fields))
+                    commit = CommitRecord(
+                        id=fields[0], short_id=fields[1], author_name=fields[2],
+                        author_email=fields[3], authored_date=fields[4],
+                        committed_date=fields[5], title=fields[6], message=fields[6],
+                    )
+                    totals = {key: 0 for key in LINE_STAT_KEYS}
+                    filename = None
+                    hunk_lines = []
+                    continue
+
+                if commit is None:
+                    continue
+
+                if not patch:
+                    # Formato numstat: "adições<TAB>remoções<TAB>arquivo" ("-" para binários)
+                    parts = line.split('\t', 2)
+                    if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+                        totals['additions'] += int(parts[0])
+                        totals['deletions'] += int(parts[1])
+                    continue
+
+                if line.startswith('diff --git '):
+                    flush_file()
+                    filename = line.rsplit(' b/', 1)[-1]
+                    hunk_lines = []
+                elif line.startswith('@@'):
+                    # Linhas do hunk: só a partir daqui +/- são conteúdo (não cabeçalho)
+                    hunk_lines.append(line)
+                elif hunk_lines:
+                    hunk_lines.append(line)
+
+            if commit is not None:
+                flush_file()
+                yield commit, finish_commit()
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    def get_developer_stats(self, project_id, source, since=None, until=None, ref=None, progress=None):
+        """Calcula estatísticas de desenvolvedores em um período a partir do mirror local"""
+        return self.get_commit_table(project_id, source, since, until, ref, progress).aggregate()
+
+    def get_commit_table(self, project_id, source, since=None, until=None, ref=None, progress=None):
+        """
+        CommitTable com os commits do período lidos do mirror local.
+
+        progress, se informado, recebe 'commits_listed' após o fetch (total
+        contado com git rev-list) e 'commits_processed' a cada commit lido,
+        com a tabela parcial em table.
+        """
+        since, until = self._normalize_date_range(since, until)
+        path = self.ensure_mirror(project_id, source)
+        branch_name = ref or self._default_branch(path)
+        patch = PERFORMANCE_CONFIG['GIT_MIRROR_ANALYZE_PATCH']
+
+        total = self.count_commits(path, since, until, ref) if progress else 0
+        self._report_progress(progress, 'commits_listed', total, total)
+
+        table = CommitTable()
+        for commit, line_stats in self.iter_commits(path, since, until, ref, patch=patch, source=source):
+            table.append(commit, line_stats, branch_name)
+            self._report_progress(progress, 'commits_processed', len(table), total, table=table)
+
+        return table
+
+    def count_commits(self, path, since=None, until=None, ref=None):
+        """Quantidade de commits que iter_commits percorre no período (sem ler diffs)"""
+        since, until = self._date_range_bounds(since, until)
+        args = ['rev-list', '--count']
+        if since:
+            args.append(f'--since={since}')
+        if until:
+            args.append(f'--until={until}')
+        args += [ref or 'HEAD', '--']
+        return int(self._run(args, cwd=path).strip() or 0)
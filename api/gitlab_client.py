@@ -1,11 +1,19 @@
-import gitlab
 import datetime
+import gitlab
+import threading
 import urllib3
 from django.conf import settings
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .cache_manager import cache_result
 from .code_parser import CodeParser
-from .performance_config import PERFORMANCE_CONFIG, ESTIMATION_CONFIG
+from .commit_stats import CommitStatsMixin
+from .commit_table import CommitTable
+from .diff_store import get_diff_store
+from .git_mirror import GitMirrorBackend
+from .records import CommitRecord
+from .http_cache import ConditionalCacheAdapter
+from .rate_limiter import RateLimitedAdapter, get_limiter
+from .performance_config import PERFORMANCE_CONFIG
 from .timeout_config import TIMEOUT_CONFIG
 
 
@@ -13,15 +21,18 @@ from .timeout_config import TIMEOUT_CONFIG
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Configurações para otimização
-MAX_WORKERS = 3  # Reduzido para evitar sobrecarga
+MAX_WORKERS = 8  # Limite absoluto de threads para chamadas paralelas ao GitLab
 MAX_PAGES = 3    # Reduzido para limitar chamadas
 PER_PAGE = 50    # Reduzido para respostas mais rápidas
 
-class GitlabClient:
-    def __init__(self, token):
+
+class GitlabClient(CommitStatsMixin):
+    def __init__(self, token, url=None):
         self.token = token
-        self.url = settings.GITLAB_API_URL
+        self.url = url or settings.GITLAB_API_URL
         self.code_parser = CodeParser()
+        self._auth_lock = threading.Lock()
+        self._authenticated = False
 
         self.client = gitlab.Gitlab(
             self.url, 
@@ -32,17 +43,38 @@ class GitlabClient:
             retry_transient_errors=True,  # Retry automático para erros temporários
             keep_base_url=True  # Manter a URL base fornecida pelo usuário
         )
+        # Sessão HTTP reaproveitada entre chamadas paralelas (keep-alive). Toda chamada
+        # passa pelo limitador adaptativo da instância e, quando habilitado, pela
+        # revalidação condicional (ETag) dos GETs
+        limiter = get_limiter(self.url) if PERFORMANCE_CONFIG['ADAPTIVE_RATE_LIMIT'] else None
+        if PERFORMANCE_CONFIG['HTTP_CONDITIONAL_CACHE']:
+            adapter = ConditionalCacheAdapter(limiter=limiter, pool_connections=4, pool_maxsize=MAX_WORKERS)
+        else:
+            adapter = RateLimitedAdapter(limiter=limiter, pool_connections=4, pool_maxsize=MAX_WORKERS)
+        self.client.session.mount('https://', adapter)
+        self.client.session.mount('http://', adapter)
+    
+    def _ensure_authenticated(self):
+        """Autentica (GET /user) apenas uma vez, sob demanda"""
+        if self._authenticated:
+            return
+        with self._auth_lock:
+            if not self._authenticated:
+                self.client.auth()
+                self._authenticated = True
+    
+    def close(self):
+        """Fecha as conexões HTTP do cliente"""
         try:
-            # Tentar autenticar para garantir que o cliente está funcionando
-            self.client.auth()
+            self.client.session.close()
         except Exception as e:
-            # Log do erro mas não falha na inicialização
             pass
     
     def test_connectivity(self):
         """Testa a conectividade com o GitLab"""
         try:
             # Teste simples de conectividade
+            self._ensure_authenticated()
             user = self.client.user
             if user:
                 return True
@@ -67,7 +99,22 @@ class GitlabClient:
         except Exception as e:
             raise Exception(f"Erro ao buscar projetos: {str(e)}")
     
-    @cache_result('project')
+    @cache_result('projects_group')
+    def get_group_project_ids(self, group_id):
+        """IDs dos projetos de um grupo, incluindo subgrupos (com cache)"""
+        try:
+            group = self.client.groups.get(group_id, lazy=True)
+            projects = group.projects.list(
+                all=True,
+                include_subgroups=True,
+                archived=False,
+                timeout=TIMEOUT_CONFIG['LIST_PROJECTS_TIMEOUT']
+            )
+            return [project.id for project in projects]
+        except Exception as e:
+            raise Exception(f"Erro ao buscar projetos do grupo {group_id}: {str(e)}")
+    
+    @cache_result('project', project_arg='project_id')
     def get_project(self, project_id):
         """Busca um projeto específico por ID (com cache)"""
         try:
@@ -100,25 +147,36 @@ class GitlabClient:
 
             return "master"  # Fallback para master
     
-    @cache_result('commit_diff')
     def get_commit_diff(self, project, commit_id):
-        """Obtém o diff de um commit específico (com cache)"""
-        try:
-            commit = project.commits.get(commit_id)
-            diff = commit.diff(timeout=15)  # Timeout menor para diffs
+        """Obtém o diff de um commit específico (armazenado em disco por SHA, sem expiração)"""
+        project_id = getattr(project, 'id', project)
+        diff_store = get_diff_store()
+        
+        diff = diff_store.get(project_id, commit_id)
+        if diff is not None:
             return diff
+        
+        try:
+            commit = project.commits.get(commit_id, lazy=True)
+            diff = list(commit.diff(all=True, timeout=15))  # Timeout menor para diffs
         except Exception as e:
             return None
+        
+        diff_store.set(project_id, commit_id, diff)
+        return diff
     
-    @cache_result('commits')
-    def get_project_commits(self, project_id, since=None, until=None, limit=None, analyze_diffs=True):
-        """Busca commits de um projeto em um período específico (otimizado)"""
+    @cache_result('commits', project_arg='project_id')
+    def get_project_commits(self, project_id, since=None, until=None, limit=None, analyze_diffs=True, with_stats=False):
+        """Busca commits de um projeto em um período específico (otimizado)
+        
+        Retorna CommitRecords (api/records.py). Com with_stats=True a listagem
+        já traz as contagens exatas de linhas (additions/deletions) de cada commit.
+        """
         try:
             project = self.get_project(project_id)
             
-            # Converter datas para string se necessário
-            since_str = since.strftime('%Y-%m-%d') if hasattr(since, 'strftime') else since
-            until_str = until.strftime('%Y-%m-%d') if hasattr(until, 'strftime') else until
+            # Período inclusivo em dias locais (until vai até 23:59:59)
+            since_str, until_str = self._date_range_bounds(since, until)
             
             # Buscar branches disponíveis
             branches = project.branches.list(all=True, timeout=20)
@@ -144,22 +202,21 @@ class GitlabClient:
             commits = []
             total = 0
             
+            # Parâmetro extra da listagem para trazer as contagens de linhas
+            stats_params = {'with_stats': True} if with_stats else {}
+            
             try:
                 commits = project.commits.list(
                     all=True,
                     per_page=per_page,
                     since=since_str,
                     until=until_str,
-                    timeout=25  # Timeout reduzido
+                    timeout=25,  # Timeout reduzido
+                    **stats_params
                 )
+                # Registros compactos, com informação de branch
+                commits = [CommitRecord.from_gitlab(commit, 'multiple') for commit in commits]
                 total = len(commits)
-                
-                # Adicionar informação de branch aos commits
-                for commit in commits:
-                    if not hasattr(commit, 'ref_name'):
-                        commit.ref_name = 'multiple'
-                    if not hasattr(commit, 'branch_name'):
-                        commit.branch_name = 'multiple'
             except Exception as e:
                 commits = []
                 total = 0
@@ -173,16 +230,12 @@ class GitlabClient:
                         per_page=per_page,
                         since=since_str,
                         until=until_str,
-                        timeout=25
+                        timeout=25,
+                        **stats_params
                     )
+                    # Registros compactos, com informação de branch específica
+                    commits = [CommitRecord.from_gitlab(commit, branch_principal.name) for commit in commits]
                     total = len(commits)
-                    
-                    # Adicionar informação de branch específica aos commits
-                    for commit in commits:
-                        if not hasattr(commit, 'ref_name'):
-                            commit.ref_name = branch_principal.name
-                        if not hasattr(commit, 'branch_name'):
-                            commit.branch_name = branch_principal.name
                 except Exception as e:
                     commits = []
                     total = 0
@@ -208,15 +261,12 @@ class GitlabClient:
                             per_page=20,  # Reduzido para 20
                             since=since_str,
                             until=until_str,
-                            timeout=15  # Timeout reduzido
+                            timeout=15,  # Timeout reduzido
+                            **stats_params
                         )
                         
                         for item in c:
-                            if not hasattr(item, 'ref_name'):
-                                item.ref_name = b.name
-                            if not hasattr(item, 'branch_name'):
-                                item.branch_name = b.name
-                            unique_commits[item.id] = item
+                            unique_commits[item.id] = CommitRecord.from_gitlab(item, b.name)
                             
                         # Se encontrou commits suficientes, parar de buscar
                         if len(unique_commits) >= 30:  # Reduzido para 30
@@ -232,7 +282,7 @@ class GitlabClient:
         except Exception as e:
             raise Exception(f"Erro ao buscar commits: {str(e)}")
     
-    @cache_result('commits_cards')
+    @cache_result('commits_cards', project_arg='project_id')
     def get_project_commits_for_cards(self, project_id, limit=5):
         """Busca commits de um projeto otimizado para exibição em cards"""
         try:
@@ -247,274 +297,247 @@ class GitlabClient:
                 return []
             
             # Retornar apenas os dados necessários para os cards
-            card_commits = []
-            for commit in commits:
-                card_commit = {
-                    'id': commit.id,
-                    'short_id': commit.short_id,
-                    'title': commit.title,
-                    'author_name': commit.author_name,
-                    'author_email': commit.author_email,
-                    'authored_date': commit.authored_date,
-                    'created_at': getattr(commit, 'created_at', commit.authored_date),
-                    'message': commit.message,
-                    'ref_name': getattr(commit, 'ref_name', None),
-                    'branch_name': getattr(commit, 'branch_name', None)
-                }
-                card_commits.append(card_commit)
-            
-            return card_commits
+            return [commit.to_dict() for commit in commits]
             
         except Exception as e:
             return []
     
-    def get_developer_stats(self, project_id, since=None, until=None):
-        """Calcula estatísticas de desenvolvedores em um período (otimizado)"""
+    def get_developer_stats(self, project_id, since=None, until=None, progress=None, refresh=False):
+        """Calcula estatísticas de desenvolvedores em um período (otimizado)
+        
+        since e until (YYYY-MM-DD) são dias locais inclusivos, qualquer que
+        seja a origem dos dados (mirror git, banco local ou API).
+        progress, se informado, é chamado como progress(stage, done, total, **details)
+        a cada etapa: 'commits_listed', 'diffs_fetched' e 'commits_processed'.
+        refresh=True sincroniza o banco local antes, sem esperar o intervalo
+        LOCAL_STORE_SYNC_INTERVAL (usado com clear_cache).
+        """
         
         # Garantir que since e until são strings no formato correto
-        try:
-            if since and isinstance(since, str):
-                since_date = datetime.datetime.strptime(since, '%Y-%m-%d')
-                since = since_date.strftime('%Y-%m-%d')
-            
-            if until and isinstance(until, str):
-                until_date = datetime.datetime.strptime(until, '%Y-%m-%d')
-                until = until_date.strftime('%Y-%m-%d')
-        except ValueError as e:
-            # Usar datas padrão em caso de erro
-            since = (datetime.datetime.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
-            until = datetime.datetime.now().strftime('%Y-%m-%d')
+        since, until = self._normalize_date_range(since, until)
         
+        # Projetos configurados para o mirror git local não passam pela API de commits
+        if self._uses_git_mirror(project_id):
+            try:
+                stats = self._get_git_mirror_stats(project_id, since, until, progress)
+                return stats
+            except Exception as e:
+                # Fallback para a API
+                pass
+        
+        # Responder pelo banco local (sincronizado incrementalmente), se habilitado
+        if PERFORMANCE_CONFIG['USE_LOCAL_STORE']:
+            try:
+                from .commit_store import get_stored_developer_stats
+                stats = get_stored_developer_stats(self, project_id, since, until, progress=progress, force=refresh)
+                self._report_progress(progress, 'commits_processed', 1, 1)
+                return stats
+            except Exception as e:
+                # Fallback para a busca direta na API
+                pass
+        
+        table = self._get_api_commit_table(project_id, since, until, progress)
+        return table.aggregate()
+    
+    def get_commit_table(self, project_id, since=None, until=None, progress=None):
+        """CommitTable dos commits do período, da mesma origem de get_developer_stats
+        
+        Mirror git, banco local ou API, nessa ordem, com fallback. Permite
+        agrupar o mesmo lote em várias janelas sem buscar os commits de novo.
+        """
+        since, until = self._normalize_date_range(since, until)
+        
+        if self._uses_git_mirror(project_id):
+            try:
+                table = self._get_git_mirror_table(project_id, since, until, progress)
+                return table
+            except Exception as e:
+                # Fallback para a API
+                pass
+        
+        if PERFORMANCE_CONFIG['USE_LOCAL_STORE']:
+            try:
+                from .commit_store import get_stored_commit_table
+                table = get_stored_commit_table(self, project_id, since, until, progress=progress)
+                self._report_progress(progress, 'commits_processed', 1, 1)
+                return table
+            except Exception as e:
+                # Fallback para a busca direta na API
+                pass
+        
+        return self._get_api_commit_table(project_id, since, until, progress)
+    
+    def _get_api_commit_table(self, project_id, since, until, progress=None):
+        """CommitTable montada pela listagem de commits da API (e diffs da amostra)"""
         # Buscar commits com limite otimizado
         max_commits = PERFORMANCE_CONFIG['MAX_COMMITS_PER_REQUEST']
+        with_stats = PERFORMANCE_CONFIG['STATS_MODE'] == 'with_stats'
+        if with_stats:
+            # Contagens exatas vêm da própria listagem: usar páginas maiores
+            max_commits = PERFORMANCE_CONFIG['WITH_STATS_PER_PAGE']
         try:
-            commits = self.get_project_commits(project_id, since, until, limit=max_commits)
+            commits = self.get_project_commits(project_id, since, until, limit=max_commits, with_stats=with_stats)
         except Exception as e:
-            return []
+            commits = None
         
+        # Tabela colunar: os totais são agregados de uma vez no final
+        table = CommitTable()
         if not commits:
-            return []
-        
-        # Inicializa estrutura para armazenar estatísticas
-        stats = defaultdict(lambda: {
-            'name': '', 
-            'email': '', 
-            'additions': 0, 
-            'deletions': 0, 
-            'commits': 0,
-            'additions_code': 0,
-            'deletions_code': 0,
-            'additions_comments': 0,
-            'deletions_comments': 0,
-            'additions_blank': 0,
-            'deletions_blank': 0,
-        })
+            return table
+        self._report_progress(progress, 'commits_listed', len(commits), len(commits))
         
         # Processa commits em lotes otimizados
         project = self.get_project(project_id)
         batch_size = PERFORMANCE_CONFIG['BATCH_SIZE']
         
         # Selecionar uma amostra menor de commits para buscar stats detalhados
-        max_detailed = PERFORMANCE_CONFIG['MAX_COMMITS_FOR_DETAILED_ANALYSIS']
-        sample_size = max(1, min(max_detailed, len(commits) // 10))
-        sample_commits = set()
-        if len(commits) > 0:
-            # Selecionar commits mais recentes para análise detalhada
-            for i in range(min(sample_size, len(commits))):
-                sample_commits.add(commits[i].id)
+        sample_commits = self._select_sample_commits(commits)
+        
+        # Buscar todos os diffs necessários de uma vez (em paralelo) antes de agregar
+        diff_ids = [commit.id for commit in commits if self._should_use_real_diff(commit, sample_commits)]
+        diffs = self._fetch_commit_diffs(
+            project, diff_ids,
+            lambda done, total: self._report_progress(progress, 'diffs_fetched', done, total)
+        )
         
         # Processar todos os commits, mas com estratégia otimizada
         for i in range(0, len(commits), batch_size):
             batch = commits[i:i + batch_size]
             
-            # Processar lote sequencialmente para evitar problemas de concorrência
+            # Agregação sequencial: os diffs já foram buscados
             for commit in batch:
                 try:
-                    self._process_commit_stats(project, commit, stats, sample_commits)
+                    self._process_commit_stats(project, commit, table, sample_commits, diffs)
                 except Exception as e:
                     continue
+            self._report_progress(progress, 'commits_processed', len(table), len(commits), table=table)
         
-        result = list(stats.values())
-        return result
+        return table
     
-    def _process_commit_stats(self, project, commit, stats, sample_commits=None):
+    def get_developer_stats_by_window(self, project_id, windows, progress=None):
+        """Estatísticas por autor de várias janelas (início, fim) de datas, inclusivas
+        
+        Os commits do intervalo total são buscados e classificados uma única
+        vez; cada janela é apenas uma máscara sobre a mesma CommitTable.
+        Retorna uma lista de {'since', 'until', 'stats'} na ordem das janelas.
+        """
+        if not windows:
+            return []
+        
+        # since e until são inclusivos em todas as origens (API, banco local e mirror)
+        since = min(start for start, _ in windows).strftime('%Y-%m-%d')
+        until = max(end for _, end in windows).strftime('%Y-%m-%d')
+        table = self.get_commit_table(project_id, since, until, progress)
+        
+        return [
+            {'since': start, 'until': end, 'stats': stats}
+            for (start, end), stats in zip(windows, table.aggregate_windows(windows))
+        ]
+    
+    @cache_result('stats_project', project_arg='project_id')
+    def get_project_developer_stats(self, project_id, since=None, until=None):
+        """get_developer_stats com o resultado guardado por projeto e período"""
+        return self.get_developer_stats(project_id, since=since, until=until)
+    
+    def get_projects_developer_stats(self, project_ids, since=None, until=None, progress=None):
+        """Estatísticas de vários projetos, com os autores unidos por email
+        
+        Cada projeto é calculado (ou lido do cache, de forma independente) em
+        um pool de threads limitado; um projeto sem mudanças não é recalculado
+        quando o relatório é atualizado. Projetos que falham são ignorados.
+        progress é chamado com a etapa 'projects_processed'.
+        """
+        since, until = self._normalize_date_range(since, until)
+        project_ids = list(dict.fromkeys(int(project_id) for project_id in project_ids))
+        if not project_ids:
+            return []
+        
+        results = {}
+        failed = 0
+        max_workers = min(PERFORMANCE_CONFIG['GROUP_MAX_WORKERS'], MAX_WORKERS, len(project_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_project_developer_stats, project_id, since, until): project_id
+                for project_id in project_ids
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    failed += 1
+                self._report_progress(progress, 'projects_processed', len(results) + failed, len(project_ids))
+        
+        # Ordem dos projetos pedida, para um resultado estável
+        return self._merge_developer_stats(results[project_id] for project_id in project_ids if project_id in results)
+    
+    def _uses_git_mirror(self, project_id):
+        """Indica se o projeto está configurado para o backend de mirror git"""
+        try:
+            return int(project_id) in settings.GIT_MIRROR_PROJECTS
+        except (TypeError, ValueError):
+            return False
+    
+    def _get_git_mirror_stats(self, project_id, since, until, progress=None):
+        """Estatísticas calculadas pelo git log de um mirror local do projeto"""
+        return self._get_git_mirror_table(project_id, since, until, progress).aggregate()
+    
+    def _get_git_mirror_table(self, project_id, since, until, progress=None):
+        """CommitTable lida do mirror local do projeto"""
+        project_id = int(project_id)
+        source = settings.GIT_MIRROR_SOURCES.get(project_id)
+        if not source:
+            source = self.get_project(project_id).http_url_to_repo
+        
+        backend = GitMirrorBackend(self.token, code_parser=self.code_parser)
+        return backend.get_commit_table(project_id, source, since, until, progress=progress)
+    
+    def _fetch_commit_diffs(self, project, commit_ids, on_fetched=None):
+        """Busca os diffs de vários commits usando um pool de threads limitado
+        
+        on_fetched(done, total), se informado, é chamado após cada diff recebido.
+        """
+        commit_ids = list(dict.fromkeys(commit_ids))
+        if not commit_ids:
+            return {}
+        
+        diffs = {}
+        max_workers = min(PERFORMANCE_CONFIG['MAX_WORKERS'], MAX_WORKERS, len(commit_ids))
+        if not PERFORMANCE_CONFIG['PARALLEL_DIFF_FETCH'] or max_workers <= 1:
+            for commit_id in commit_ids:
+                diffs[commit_id] = self.get_commit_diff(project, commit_id)
+                if on_fetched:
+                    on_fetched(len(diffs), len(commit_ids))
+            return diffs
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.get_commit_diff, project, commit_id): commit_id
+                for commit_id in commit_ids
+            }
+            for future in as_completed(futures):
+                diffs[futures[future]] = future.result()
+                if on_fetched:
+                    on_fetched(len(diffs), len(commit_ids))
+        return diffs
+    
+    def _process_commit_stats(self, project, commit, table, sample_commits=None, diffs=None):
         """Processa estatísticas de um commit individual com contagem otimizada"""
         try:
-            # Usar apenas informações básicas do commit para evitar timeout
-            author_email = getattr(commit, 'author_email', 'unknown@example.com')
-            author_name = getattr(commit, 'author_name', 'Unknown')
-            
-            # Armazena nome e email do autor
-            stats[author_email]['name'] = author_name
-            stats[author_email]['email'] = author_email
-            stats[author_email]['commits'] += 1
-            
-            # Adicionar informações de branch se disponíveis
-            branch_name = getattr(commit, 'branch_name', None)
-            ref_name = getattr(commit, 'ref_name', None)
-            
-            # Inicializar estrutura de branches se não existir
-            if 'branches' not in stats[author_email]:
-                stats[author_email]['branches'] = {}
-            
-            # Determinar branch para contagem
-            display_branch = branch_name if branch_name else (ref_name if ref_name else 'unknown')
-            
-            # Inicializar contadores para esta branch se não existir
-            if display_branch not in stats[author_email]['branches']:
-                stats[author_email]['branches'][display_branch] = {
-                    'commits': 0,
-                    'additions': 0,
-                    'deletions': 0,
-                    'additions_code': 0,
-                    'deletions_code': 0,
-                    'additions_comments': 0,
-                    'deletions_comments': 0,
-                    'additions_blank': 0,
-                    'deletions_blank': 0,
-                }
-            
-            # Incrementar contadores da branch específica
-            stats[author_email]['branches'][display_branch]['commits'] += 1
-            
-            # Inicializar contadores gerais se não existirem
-            if 'additions_code' not in stats[author_email]:
-                stats[author_email]['additions_code'] = 0
-                stats[author_email]['deletions_code'] = 0
-                stats[author_email]['additions_comments'] = 0
-                stats[author_email]['deletions_comments'] = 0
-                stats[author_email]['additions_blank'] = 0
-                stats[author_email]['deletions_blank'] = 0
-            
             # Estratégia de otimização: usar diff real apenas para commits recentes ou importantes
-            use_real_diff = False
-            
-            # Verificar se deve usar diff real baseado em critérios
-            if sample_commits and commit.id in sample_commits:
-                use_real_diff = True
-            elif hasattr(commit, 'created_at'):
-                # Usar diff real apenas para commits dos últimos N dias (configurável)
-                try:
-                    from datetime import datetime, timedelta
-                    recent_days = PERFORMANCE_CONFIG['USE_REAL_DIFF_FOR_RECENT_DAYS']
-                    commit_date = datetime.fromisoformat(commit.created_at.replace('Z', '+00:00'))
-                    if commit_date > datetime.now() - timedelta(days=recent_days):
-                        use_real_diff = True
-                except:
-                    pass
-            
-            # Tentar obter diff real apenas se necessário
-            if use_real_diff:
+            diff = None
+            if self._should_use_real_diff(commit, sample_commits):
                 try:
-                    diff = self.get_commit_diff(project, commit.id)
-                    if diff and len(diff) > 0:
-                        # Analisar diff real
-                        total_additions = 0
-                        total_deletions = 0
-                        total_additions_code = 0
-                        total_deletions_code = 0
-                        total_additions_comments = 0
-                        total_deletions_comments = 0
-                        total_additions_blank = 0
-                        total_deletions_blank = 0
-                        
-                        for file_diff in diff:
-                            filename = file_diff.get('new_path', file_diff.get('old_path', 'unknown'))
-                            diff_content = file_diff.get('diff', '')
-                            
-                            if diff_content:
-                                file_stats = self.code_parser.analyze_diff(diff_content, filename)
-                                
-                                total_additions += file_stats['additions']
-                                total_deletions += file_stats['deletions']
-                                total_additions_code += file_stats['additions_code']
-                                total_deletions_code += file_stats['deletions_code']
-                                total_additions_comments += file_stats['additions_comments']
-                                total_deletions_comments += file_stats['deletions_comments']
-                                total_additions_blank += file_stats['additions_blank']
-                                total_deletions_blank += file_stats['deletions_blank']
-                        
-                        # Usar estatísticas reais se disponíveis
-                        if total_additions > 0 or total_deletions > 0:
-                            additions = total_additions
-                            deletions = total_deletions
-                            additions_code = total_additions_code
-                            deletions_code = total_deletions_code
-                            additions_comments = total_additions_comments
-                            deletions_comments = total_deletions_comments
-                            additions_blank = total_additions_blank
-                            deletions_blank = total_deletions_blank
-                        else:
-                            # Fallback para estimativa inteligente
-                            additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank = self._estimate_commit_stats(commit)
+                    # Usar o diff já buscado em paralelo, se disponível
+                    if diffs is not None and commit.id in diffs:
+                        diff = diffs[commit.id]
                     else:
-                        # Fallback para estimativa inteligente
-                        additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank = self._estimate_commit_stats(commit)
+                        diff = self.get_commit_diff(project, commit.id)
                 except Exception as e:
-                    # Fallback para estimativa inteligente
-                    additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank = self._estimate_commit_stats(commit)
-            else:
-                # Usar estimativa inteligente para commits antigos
-                additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank = self._estimate_commit_stats(commit)
-            
-            # Adicionar ao total geral
-            stats[author_email]['additions'] += additions
-            stats[author_email]['deletions'] += deletions
-            stats[author_email]['additions_code'] += additions_code
-            stats[author_email]['deletions_code'] += deletions_code
-            stats[author_email]['additions_comments'] += additions_comments
-            stats[author_email]['deletions_comments'] += deletions_comments
-            stats[author_email]['additions_blank'] += additions_blank
-            stats[author_email]['deletions_blank'] += deletions_blank
+                    diff = None
             
-            # Adicionar à branch específica
-            stats[author_email]['branches'][display_branch]['additions'] += additions
-            stats[author_email]['branches'][display_branch]['deletions'] += deletions
-            stats[author_email]['branches'][display_branch]['additions_code'] += additions_code
-            stats[author_email]['branches'][display_branch]['deletions_code'] += deletions_code
-            stats[author_email]['branches'][display_branch]['additions_comments'] += additions_comments
-            stats[author_email]['branches'][display_branch]['deletions_comments'] += deletions_comments
-            stats[author_email]['branches'][display_branch]['additions_blank'] += additions_blank
-            stats[author_email]['branches'][display_branch]['deletions_blank'] += deletions_blank
+            line_stats = self._commit_line_stats(commit, diff)
+            table.append(commit, line_stats)
             
         except Exception as e:
             # Se não conseguir obter as estatísticas, continua com o próximo commit
             pass
-    
-    def _estimate_commit_stats(self, commit):
-        """Estima estatísticas de commit baseado em heurísticas inteligentes"""
-        commit_message = getattr(commit, 'message', '')
-        message_length = len(commit_message)
-        
-        # Usar configurações de estimativa
-        thresholds = ESTIMATION_CONFIG['MESSAGE_THRESHOLDS']
-        estimates = ESTIMATION_CONFIG['COMMIT_ESTIMATES']
-        
-        # Determinar tipo de commit baseado no tamanho da mensagem
-        if message_length > thresholds['LARGE_COMMIT']:
-            commit_type = 'LARGE'
-        elif message_length > thresholds['MEDIUM_COMMIT']:
-            commit_type = 'MEDIUM'
-        elif message_length > thresholds['SMALL_COMMIT']:
-            commit_type = 'SMALL'
-        else:
-            commit_type = 'TINY'
-        
-        # Obter estimativas baseadas no tipo
-        additions = estimates[commit_type]['additions']
-        deletions = estimates[commit_type]['deletions']
-        
-        # Usar configurações de distribuição
-        code_pct = ESTIMATION_CONFIG['CODE_PERCENTAGE']
-        comments_pct = ESTIMATION_CONFIG['COMMENTS_PERCENTAGE']
-        blank_pct = ESTIMATION_CONFIG['BLANK_PERCENTAGE']
-        
-        # Calcular distribuição
-        additions_code = int(additions * code_pct)
-        deletions_code = int(deletions * code_pct)
-        additions_comments = int(additions * comments_pct)
-        deletions_comments = int(deletions * comments_pct)
-        additions_blank = int(additions * blank_pct)
-        deletions_blank = int(deletions * blank_pct)
-        
-        return additions, deletions, additions_code, deletions_code, additions_comments, deletions_comments, additions_blank, deletions_blank
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Cache HTTP condicional (ETag / Last-Modified) para as requisições GET ao GitLab
+"""
+
+import hashlib
+import re
+from urllib.parse import urlsplit
+from django.core.cache import cache
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from .performance_config import PERFORMANCE_CONFIG
+from .rate_limiter import RateLimitedAdapter
+
+CACHE_KEY_PREFIX = 'http_etag'
+
+# Cabeçalhos que não valem para o corpo já decodificado que armazenamos
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+# Endpoints de metadados revalidados: listas de projetos, projeto, branches e
+# usuário. Commits e diffs ficam de fora: cada combinação de filtros/páginas
+# seria um corpo novo no cache, raramente pedido de novo com a mesma URL.
+CACHEABLE_PATH = re.compile(
+    r'/api/v4/(?:'
+    r'projects'
+    r'|projects/[^/]+'
+    r'|projects/[^/]+/repository/branches(?:/[^/]+)?'
+    r'|groups/[^/]+/projects'
+    r'|user'
+    r')/?$'
+)
+
+
+class ConditionalCacheAdapter(RateLimitedAdapter):
+    """
+    Adapter do requests que revalida GETs em vez de confiar em TTLs fixos.
+
+    Respostas 200 com ETag ou Last-Modified são guardadas no cache do Django.
+    Na próxima requisição para a mesma URL (e o mesmo token) são enviados
+    If-None-Match / If-Modified-Since; um 304 é respondido com o corpo
+    armazenado, como se fosse um 200, sem baixar nem reprocessar o conteúdo.
+    Só os endpoints de metadados (CACHEABLE_PATH) são revalidados; os demais
+    vão direto à rede. As requisições de rede continuam passando pelo
+    limitador de concorrência.
+    """
+
+    def __init__(self, store=None, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store or cache
+        self.timeout = timeout or PERFORMANCE_CONFIG['HTTP_CACHE_TIMEOUT']
+
+    def _cache_key(self, request):
+        """Chave por URL completa e identidade (as respostas dependem do token)"""
+        identity = request.headers.get('PRIVATE-TOKEN') or request.headers.get('Authorization') or ''
+        digest = hashlib.sha256(f"{identity}\n{request.url}".encode('utf-8')).hexdigest()
+        return f"{CACHE_KEY_PREFIX}_{digest}"
+
+    def _is_cacheable(self, request):
+        return CACHEABLE_PATH.search(urlsplit(request.url).path) is not None
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET' or kwargs.get('stream') or not self._is_cacheable(request):
+            return super().send(request, **kwargs)
+
+        key = self._cache_key(request)
+        entry = self.store.get(key)
+        if entry:
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            cached_response = self._build_cached_response(request, entry, response)
+            # Renovar a validade da entrada revalidada
+            self.store.set(key, entry, self.timeout)
+            return cached_response
+
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.store.set(key, {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'headers': {
+                        name: value for name, value in response.headers.items()
+                        if name.lower() not in SKIPPED_HEADERS
+                    },
+                    'content': response.content,
+                    'encoding': response.encoding,
+                }, self.timeout)
+
+        return response
+
+    def _build_cached_response(self, request, entry, not_modified):
+        """Monta uma resposta 200 a partir da entrada armazenada"""
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # Cabeçalhos atuais do 304 (ex.: RateLimit-*) prevalecem sobre os armazenados
+        for name, value in not_modified.headers.items():
+            if name.lower() not in SKIPPED_HEADERS:
+                response.headers[name] = value
+        response._content = entry['content']
+        response.encoding = entry['encoding']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        not_modified.close()
+        return response
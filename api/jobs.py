@@ -0,0 +1,244 @@
+"""
+Execução em segundo plano de cálculos longos de estatísticas (sem broker externo)
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+from .client_pool import leased_gitlab_client
+from .models import StatsJob
+from .performance_config import PERFORMANCE_CONFIG
+from .serializers import DeveloperStatSerializer
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND_DEVELOPER_STATS = 'developer_stats'
+
+# Peso de cada etapa de get_developer_stats no progresso total do job
+STAGE_WEIGHTS = {
+    'commits_listed': (0.0, 0.1),
+    'diffs_fetched': (0.1, 0.6),
+    'commits_processed': (0.7, 0.3),
+}
+
+_executor = None
+_task_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Pool de threads do processo que executa os jobs de estatísticas (criado sob demanda)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PERFORMANCE_CONFIG['JOB_WORKERS'],
+                thread_name_prefix='stats-job',
+            )
+        return _executor
+
+
+def _get_task_executor():
+    """
+    Pool separado para as tarefas curtas (ex.: webhooks), que não esperam
+    atrás de jobs de estatísticas longos
+    """
+    global _task_executor
+    with _executor_lock:
+        if _task_executor is None:
+            _task_executor = ThreadPoolExecutor(
+                max_workers=PERFORMANCE_CONFIG['TASK_WORKERS'],
+                thread_name_prefix='background-task',
+            )
+        return _task_executor
+
+
+def _params_hash(kind, params, token):
+    """Identifica requisições idênticas; o token entra apenas como hash"""
+    identity = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    payload = json.dumps({'kind': kind, 'params': params, 'identity': identity}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_developer_stats(token, project_id, since, until, force=False):
+    """
+    Enfileira o cálculo de get_developer_stats e retorna o StatsJob.
+
+    Um job idêntico (mesmo projeto, período e token) ainda em andamento é
+    sempre reaproveitado; um concluído há menos de JOB_RESULT_TTL segundos
+    também, a menos que force=True; nesse caso o job novo sincroniza o
+    banco local antes (refresh de get_developer_stats).
+    """
+    params = {'project_id': project_id, 'since': since, 'until': until}
+    params_hash = _params_hash(JOB_KIND_DEVELOPER_STATS, params, token)
+    if force:
+        # Fora do hash: o resultado continua reaproveitável por pedidos sem force
+        params['refresh'] = True
+
+    if not force:
+        now = timezone.now()
+        # Um job concluído sem finished_at não tem idade conhecida: não é reaproveitado
+        reusable = (
+            StatsJob.objects
+            .filter(params_hash=params_hash, status=StatsJob.STATUS_DONE, finished_at__isnull=False)
+            .order_by('-finished_at')
+            .first()
+        )
+        if reusable is not None:
+            age = (now - reusable.finished_at).total_seconds()
+            if age < PERFORMANCE_CONFIG['JOB_RESULT_TTL']:
+                return reusable
+
+    cleanup_jobs()
+    job, created = _create_active_job(JOB_KIND_DEVELOPER_STATS, params, params_hash)
+    if created:
+        # O token fica apenas em memória, nunca no banco
+        _get_executor().submit(_run_developer_stats, job.id, token)
+    return job
+
+
+def _create_active_job(kind, params, params_hash):
+    """
+    Cria o job, ou retorna o idêntico que já está na fila/em execução.
+
+    A restrição única sobre os jobs ativos torna a verificação atômica: de
+    duas requisições simultâneas, só uma cria o job. Um job ativo abandonado
+    (is_stale) é marcado como falho para dar lugar ao novo.
+    Retorna (job, criado).
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                return StatsJob.objects.create(kind=kind, params=params, params_hash=params_hash), True
+        except IntegrityError:
+            active = StatsJob.objects.filter(
+                params_hash=params_hash, status__in=StatsJob.ACTIVE_STATUSES
+            ).first()
+            if active is None:
+                # Terminou entre a tentativa e a consulta: tentar criar de novo
+                continue
+            if not is_stale(active):
+                return active, False
+            _mark_stale(active)
+
+
+def is_stale(job):
+    """Job pendente/em execução há tempo demais: o processo que o executava provavelmente terminou"""
+    if job.status not in StatsJob.ACTIVE_STATUSES:
+        return False
+    reference = job.started_at or job.created_at
+    return (timezone.now() - reference).total_seconds() > PERFORMANCE_CONFIG['JOB_STALE_AFTER']
+
+
+def get_job(job_id):
+    """Busca o job (None se não existir), marcando como falho se estiver abandonado"""
+    try:
+        job = StatsJob.objects.get(id=job_id)
+    except (StatsJob.DoesNotExist, ValidationError, ValueError):
+        return None
+
+    if is_stale(job):
+        _mark_stale(job)
+    return job
+
+
+def _mark_stale(job):
+    """Marca como falho um job abandonado pelo processo que o executava"""
+    job.status = StatsJob.STATUS_FAILED
+    job.error = 'O job foi interrompido antes de terminar.'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+class _ProgressRecorder:
+    """Converte os eventos de progresso em uma fração gravada no job (com intervalo mínimo)"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.last_saved = 0.0
+
+    def __call__(self, stage, done=0, total=0, **details):
+        start, weight = STAGE_WEIGHTS.get(stage, (0.0, 0.0))
+        fraction = start + weight * (done / total if total else 1.0)
+
+        now = time.monotonic()
+        if now - self.last_saved < PERFORMANCE_CONFIG['JOB_PROGRESS_INTERVAL']:
+            return
+        self.last_saved = now
+        StatsJob.objects.filter(id=self.job_id).update(
+            progress=min(fraction, 0.99),
+            message=f"{stage}: {done}/{total}" if total else stage,
+        )
+
+
+def _run_developer_stats(job_id, token):
+    """Executa um job de estatísticas em uma thread do pool"""
+    close_old_connections()
+    try:
+        StatsJob.objects.filter(id=job_id).update(status=StatsJob.STATUS_RUNNING, started_at=timezone.now())
+        job = StatsJob.objects.get(id=job_id)
+        params = job.params
+        try:
+            # Reservado: o pool não descarta o cliente enquanto o job roda
+            with leased_gitlab_client(token) as client:
+                stats = client.get_developer_stats(
+                    params['project_id'],
+                    since=params['since'],
+                    until=params['until'],
+                    progress=_ProgressRecorder(job_id),
+                    refresh=params.get('refresh', False),
+                )
+            StatsJob.objects.filter(id=job_id).update(
+                status=StatsJob.STATUS_DONE,
+                result=DeveloperStatSerializer(stats, many=True).data,
+                progress=1.0,
+                message='',
+                finished_at=timezone.now(),
+            )
+        except Exception as e:
+            logger.exception("Falha no job %s", job_id)
+            StatsJob.objects.filter(id=job_id).update(
+                status=StatsJob.STATUS_FAILED,
+                error=str(e),
+                finished_at=timezone.now(),
+            )
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Executa uma tarefa curta no pool de tarefas (erros são apenas registrados no log)"""
+    return _get_task_executor().submit(_background_task(func, *args, **kwargs))
+
+
+def run_long_task(func, *args, **kwargs):
+    """Executa uma tarefa longa (ex.: backfill do banco local) no pool dos jobs de estatísticas"""
+    return _get_executor().submit(_background_task(func, *args, **kwargs))
+
+
+def _background_task(func, *args, **kwargs):
+    """Envolve a tarefa com o ciclo de conexões do banco e o registro de erros"""
+    def task():
+        close_old_connections()
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception("Falha na tarefa em segundo plano %s", getattr(func, '__name__', func))
+        finally:
+            close_old_connections()
+
+    return task
+
+
+def cleanup_jobs(max_age=None):
+    """Remove jobs finalizados há mais de max_age segundos (padrão: 1 dia)"""
+    max_age = max_age or 86400
+    threshold = timezone.now() - datetime.timedelta(seconds=max_age)
+    StatsJob.objects.filter(finished_at__lt=threshold).delete()
@@ -0,0 +1,82 @@
+"""
+Pré-aquece o cache com os dados dos projetos mais ativos do GitLab
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.client_pool import get_gitlab_client
+from api.commit_store import backfill_project_commits
+from api.performance_config import PERFORMANCE_CONFIG
+
+
+class Command(BaseCommand):
+    help = (
+        'Busca a lista de projetos e, para os N projetos com atividade mais recente, '
+        'os commits dos cards e as estatísticas do período padrão (últimos 30 dias), '
+        'deixando o cache compartilhado pronto para os primeiros acessos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Quantidade de projetos mais ativos (padrão: 10)')
+        parser.add_argument('--days', type=int, default=30, help='Período das estatísticas em dias (padrão: 30)')
+        parser.add_argument(
+            '--concurrency', type=int, default=PERFORMANCE_CONFIG['MAX_WORKERS'],
+            help='Projetos aquecidos ao mesmo tempo (padrão: MAX_WORKERS)'
+        )
+        parser.add_argument('--token', default=None, help='Token do GitLab (padrão: GITLAB_TOKEN)')
+
+    def handle(self, *args, **options):
+        token = options['token'] or settings.GITLAB_TOKEN
+        if not token:
+            raise CommandError('Nenhum token do GitLab configurado (use --token ou GITLAB_TOKEN).')
+
+        started = time.monotonic()
+        client = get_gitlab_client(token)
+
+        try:
+            projects = client.get_projects()
+        except Exception as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"{len(projects)} projetos listados em {time.monotonic() - started:.1f}s")
+
+        # Mesmo período padrão usado pela view de estatísticas
+        since = (datetime.now() - timedelta(days=options['days'])).strftime('%Y-%m-%d')
+        until = datetime.now().strftime('%Y-%m-%d')
+
+        ranked = sorted(projects, key=lambda project: getattr(project, 'last_activity_at', '') or '', reverse=True)
+        selected = ranked[:max(0, options['top'])]
+        concurrency = max(1, options['concurrency'])
+
+        failures = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(self._warm_project, client, project.id, since, until): project
+                for project in selected
+            }
+            for future in as_completed(futures):
+                project = futures[future]
+                name = getattr(project, 'path_with_namespace', project.id)
+                try:
+                    authors, elapsed = future.result()
+                    self.stdout.write(f"  {name}: {authors} autores em {elapsed:.1f}s")
+                except Exception as e:
+                    failures += 1
+                    self.stderr.write(f"  {name}: erro - {str(e)}")
+
+        total = time.monotonic() - started
+        summary = f"Cache aquecido para {len(selected) - failures}/{len(selected)} projetos em {total:.1f}s"
+        self.stdout.write(self.style.SUCCESS(summary) if not failures else self.style.WARNING(summary))
+
+    def _warm_project(self, client, project_id, since, until):
+        """Dados que as páginas iniciais pedem primeiro: projeto, commits dos cards e estatísticas"""
+        started = time.monotonic()
+        client.get_project(project_id)
+        if PERFORMANCE_CONFIG['USE_LOCAL_STORE']:
+            # Carga inicial do banco local fora das requisições (só a branch padrão)
+            backfill_project_commits(client, project_id, since=since)
+        client.get_project_commits_for_cards(project_id, limit=PERFORMANCE_CONFIG['MAX_COMMITS_FOR_CARDS'])
+        stats = client.get_developer_stats(project_id, since=since, until=until)
+        return len(stats), time.monotonic() - started
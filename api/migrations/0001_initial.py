@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Commit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha', models.CharField(max_length=64)),
+                ('short_id', models.CharField(blank=True, max_length=16)),
+                ('title', models.TextField(blank=True)),
+                ('message', models.TextField(blank=True)),
+                ('author_name', models.CharField(blank=True, max_length=255)),
+                ('author_email', models.CharField(blank=True, max_length=255)),
+                ('authored_date', models.DateTimeField(null=True)),
+                ('committed_date', models.DateTimeField(null=True)),
+                ('branch_name', models.CharField(blank=True, max_length=255)),
+                ('additions', models.IntegerField(null=True)),
+                ('deletions', models.IntegerField(null=True)),
+                ('file_stats_synced', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('path_with_namespace', models.CharField(blank=True, max_length=500)),
+                ('default_branch', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch_name', models.CharField(max_length=255)),
+                ('last_commit_sha', models.CharField(blank=True, max_length=64)),
+                ('last_committed_at', models.DateTimeField(null=True)),
+                ('synced_at', models.DateTimeField(null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_states', to='api.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CommitFileStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024)),
+                ('language', models.CharField(blank=True, max_length=32)),
+                ('additions', models.IntegerField(default=0)),
+                ('deletions', models.IntegerField(default=0)),
+                ('additions_code', models.IntegerField(default=0)),
+                ('deletions_code', models.IntegerField(default=0)),
+                ('additions_comments', models.IntegerField(default=0)),
+                ('deletions_comments', models.IntegerField(default=0)),
+                ('additions_blank', models.IntegerField(default=0)),
+                ('deletions_blank', models.IntegerField(default=0)),
+                ('commit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='file_stats', to='api.commit')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='commit',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='commits', to='api.project'),
+        ),
+        migrations.AddConstraint(
+            model_name='syncstate',
+            constraint=models.UniqueConstraint(fields=('project', 'branch_name'), name='unique_sync_state_per_branch'),
+        ),
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['project', 'branch_name', 'committed_date'], name='api_commit_project_db609e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commit',
+            index=models.Index(fields=['project', 'file_stats_synced'], name='api_commit_project_21be13_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='commit',
+            constraint=models.UniqueConstraint(fields=('project', 'sha'), name='unique_commit_per_project'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAuthorStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_email', models.CharField(max_length=255)),
+                ('author_name', models.CharField(blank=True, max_length=255)),
+                ('branch_name', models.CharField(max_length=255)),
+                ('day', models.DateField()),
+                ('commits', models.IntegerField(default=0)),
+                ('additions', models.IntegerField(default=0)),
+                ('deletions', models.IntegerField(default=0)),
+                ('additions_code', models.IntegerField(default=0)),
+                ('deletions_code', models.IntegerField(default=0)),
+                ('additions_comments', models.IntegerField(default=0)),
+                ('deletions_comments', models.IntegerField(default=0)),
+                ('additions_blank', models.IntegerField(default=0)),
+                ('deletions_blank', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyauthorstat',
+            constraint=models.UniqueConstraint(fields=('project', 'branch_name', 'day', 'author_email'), name='unique_daily_author_stat'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Mantém só o job ativo mais recente de cada params_hash (os demais não seriam aceitos pela restrição)"""
+    StatsJob = apps.get_model('api', 'StatsJob')
+    seen = set()
+    active = StatsJob.objects.filter(status__in=['pending', 'running']).order_by('-created_at')
+    for job in active:
+        if job.params_hash in seen:
+            StatsJob.objects.filter(pk=job.pk).update(status='failed', error='Job duplicado descartado.')
+        seen.add(job.params_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_stats_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='statsjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('params_hash',), name='unique_active_stats_job'),
+        ),
+    ]
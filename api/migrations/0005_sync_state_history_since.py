@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_stats_job_active_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='history_since',
+            field=models.DateField(null=True),
+        ),
+    ]
@@ -1,3 +1,154 @@
+import uuid
 from django.db import models
 
-# Create your models here.
+
+class Project(models.Model):
+    """Projeto do GitLab cujos commits estão armazenados localmente"""
+    id = models.BigIntegerField(primary_key=True)  # Mesmo ID do GitLab
+    name = models.CharField(max_length=255, blank=True)
+    path_with_namespace = models.CharField(max_length=500, blank=True)
+    default_branch = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path_with_namespace or str(self.id)
+
+
+class Commit(models.Model):
+    """Commit sincronizado de um projeto, com as contagens exatas da listagem"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='commits')
+    sha = models.CharField(max_length=64)
+    short_id = models.CharField(max_length=16, blank=True)
+    title = models.TextField(blank=True)
+    message = models.TextField(blank=True)
+    author_name = models.CharField(max_length=255, blank=True)
+    author_email = models.CharField(max_length=255, blank=True)
+    authored_date = models.DateTimeField(null=True)
+    committed_date = models.DateTimeField(null=True)
+    branch_name = models.CharField(max_length=255, blank=True)  # Branch em que o commit foi sincronizado
+    additions = models.IntegerField(null=True)  # None se a listagem não trouxe stats
+    deletions = models.IntegerField(null=True)
+    file_stats_synced = models.BooleanField(default=False)  # Diff já analisado em CommitFileStat
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'sha'], name='unique_commit_per_project'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'branch_name', 'committed_date']),
+            models.Index(fields=['project', 'file_stats_synced']),
+        ]
+
+    def __str__(self):
+        return self.short_id or self.sha
+
+
+class CommitFileStat(models.Model):
+    """Contagens de linhas de um arquivo alterado em um commit (via CodeParser)"""
+    commit = models.ForeignKey(Commit, on_delete=models.CASCADE, related_name='file_stats')
+    path = models.CharField(max_length=1024)
+    language = models.CharField(max_length=32, blank=True)
+    additions = models.IntegerField(default=0)
+    deletions = models.IntegerField(default=0)
+    additions_code = models.IntegerField(default=0)
+    deletions_code = models.IntegerField(default=0)
+    additions_comments = models.IntegerField(default=0)
+    deletions_comments = models.IntegerField(default=0)
+    additions_blank = models.IntegerField(default=0)
+    deletions_blank = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.commit_id}:{self.path}"
+
+
+class SyncState(models.Model):
+    """Ponto de sincronização incremental de um projeto/branch"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='sync_states')
+    branch_name = models.CharField(max_length=255)
+    last_commit_sha = models.CharField(max_length=64, blank=True)
+    last_committed_at = models.DateTimeField(null=True)
+    synced_at = models.DateTimeField(null=True)
+    # Dia local mais antigo coberto: todo commit a partir dele já está no banco (None até o primeiro backfill)
+    history_since = models.DateField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'branch_name'], name='unique_sync_state_per_branch'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}@{self.branch_name}"
+
+
+class DailyAuthorStat(models.Model):
+    """Totais diários por projeto, autor e branch (rollup dos commits locais)"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_stats')
+    author_email = models.CharField(max_length=255)
+    author_name = models.CharField(max_length=255, blank=True)
+    branch_name = models.CharField(max_length=255)
+    day = models.DateField()
+    commits = models.IntegerField(default=0)
+    additions = models.IntegerField(default=0)
+    deletions = models.IntegerField(default=0)
+    additions_code = models.IntegerField(default=0)
+    deletions_code = models.IntegerField(default=0)
+    additions_comments = models.IntegerField(default=0)
+    deletions_comments = models.IntegerField(default=0)
+    additions_blank = models.IntegerField(default=0)
+    deletions_blank = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'branch_name', 'day', 'author_email'],
+                name='unique_daily_author_stat',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}@{self.branch_name} {self.day} {self.author_email}"
+
+
+class StatsJob(models.Model):
+    """Cálculo de estatísticas executado em segundo plano (api/jobs.py)"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Na fila'),
+        (STATUS_RUNNING, 'Em execução'),
+        (STATUS_DONE, 'Concluído'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64)  # Identifica requisições idênticas (inclui o token)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.FloatField(default=0)  # 0 a 1
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['params_hash', 'created_at']),
+        ]
+        constraints = [
+            # No máximo um job na fila/em execução por requisição idêntica (ver jobs.enqueue_developer_stats)
+            models.UniqueConstraint(
+                fields=['params_hash'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_stats_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
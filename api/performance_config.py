@@ -9,18 +9,73 @@ PERFORMANCE_CONFIG = {
     'MAX_COMMITS_FOR_DETAILED_ANALYSIS': 3,  # Máximo de commits para análise detalhada
     'MAX_COMMITS_FOR_CARDS': 5,  # Máximo de commits para exibição em cards
     
+    # Origem das contagens de linhas por commit
+    'STATS_MODE': 'with_stats',  # 'with_stats': contagens exatas da listagem; 'estimate': heurística pela mensagem
+    'WITH_STATS_PER_PAGE': 100,  # Commits por página na listagem com with_stats (máximo do GitLab)
+    
+    # Armazenamento local de commits (api/commit_store.py)
+    # Só a branch padrão é armazenada; até o backfill cobrir o período pedido, a resposta vem da API
+    'USE_LOCAL_STORE': True,  # Responder estatísticas pelo banco local sincronizado
+    'LOCAL_STORE_SYNC_INTERVAL': 300,  # Segundos mínimos entre sincronizações de um projeto/branch
+    # Janela antes do último commit sincronizado relistada a cada sincronização: commits
+    # trazidos por merge têm data anterior ao cursor (repetidos são descartados pelo SHA)
+    'LOCAL_STORE_SYNC_OVERLAP_DAYS': 30,
+    'LOCAL_STORE_HISTORY_DAYS': 365,  # Histórico mínimo buscado no primeiro backfill (em segundo plano)
+    'LOCAL_STORE_BACKFILL_LOCK_TIMEOUT': 3600,  # Validade do lock que evita backfills simultâneos
+    'LOCAL_STORE_DIFFS_PER_SYNC': 50,  # Diffs analisados por sincronização (estatísticas por arquivo)
+    
+    # Backend de mirror git local (api/git_mirror.py), habilitado por projeto em settings.GIT_MIRROR_PROJECTS
+    'GIT_MIRROR_FETCH_INTERVAL': 300,  # Segundos mínimos entre fetches de um mirror
+    'GIT_MIRROR_TIMEOUT': 600,  # Timeout para clone/fetch
+    'GIT_MIRROR_ANALYZE_PATCH': True,  # git log --patch + CodeParser; False usa apenas --numstat
+    
     # Configurações de cache
-    'CACHE_TIMEOUT_COMMIT_DIFF': 1800,  # 30 minutos para diffs
     'CACHE_TIMEOUT_STATS': 3600,  # 1 hora para estatísticas
+    'MAX_STATS_WINDOWS': 366,  # Janelas por requisição de estatísticas por período (ex.: 1 ano por dia)
+    'L1_CACHE_MAX_BYTES': 64 * 1024 * 1024,  # Objetos já desserializados mantidos por processo (cache_manager)
+    'L1_CACHE_TTL': 60,  # Segundos que um objeto fica no L1 antes de reler do cache compartilhado
+    'L1_VERSION_CHECK_INTERVAL': 1.0,  # Segundos em que a versão conferida de um objeto do L1 vale sem reler a chave de versão
+    # Fração do orçamento de bytes (L1 e SizedLocMemCache) que cada prefixo de chave pode ocupar
+    'CACHE_PREFIX_QUOTAS': {
+        'projects': 0.2,
+        'commits': 0.5,  # Inclui commits_cards
+        'http_etag': 0.3,  # Corpos de respostas guardados para revalidação (api/http_cache.py)
+    },
     
     # Configurações de processamento
     'BATCH_SIZE': 5,  # Tamanho do lote para processamento
-    'MAX_WORKERS': 2,  # Máximo de workers para processamento paralelo
+    'MAX_WORKERS': 4,  # Máximo de threads para buscar diffs em paralelo
+    'PARALLEL_DIFF_FETCH': True,  # Buscar diffs dos commits de cada lote em paralelo
+    'ASYNC_MAX_CONCURRENCY': 20,  # Requisições simultâneas por AsyncGitlabClient
+    'GROUP_MAX_WORKERS': 4,  # Projetos calculados em paralelo nas estatísticas de grupo
     
     # Configurações de fallback
     'USE_REAL_DIFF_FOR_RECENT_DAYS': 30,  # Usar diff real apenas para commits dos últimos 30 dias
     'FALLBACK_SAMPLE_PERCENTAGE': 0.1,  # 10% dos commits para análise detalhada
     
+    # Jobs de estatísticas em segundo plano (api/jobs.py)
+    'JOB_WORKERS': 2,  # Threads por processo executando jobs
+    'TASK_WORKERS': 2,  # Threads por processo para tarefas curtas (webhooks), separadas dos jobs
+    'JOB_RESULT_TTL': 900,  # Segundos em que o resultado de um job serve requisições idênticas
+    'JOB_STALE_AFTER': 1800,  # Job sem terminar após esse tempo é considerado interrompido
+    'JOB_PROGRESS_INTERVAL': 1.0,  # Intervalo mínimo (s) entre gravações de progresso
+    
+    # Pool de clientes (api/client_pool.py)
+    'CLIENT_POOL_IDLE_TIMEOUT': 600,  # Segundos ociosos até descartar um cliente do pool
+    
+    # Cache HTTP condicional (api/http_cache.py)
+    'HTTP_CONDITIONAL_CACHE': True,  # Revalidar GETs com If-None-Match/If-Modified-Since
+    'HTTP_CACHE_TIMEOUT': 604800,  # 7 dias guardando corpo + ETag para revalidação
+    
+    # Concorrência adaptativa (AIMD) por instância do GitLab (api/rate_limiter.py)
+    'ADAPTIVE_RATE_LIMIT': True,  # Passar toda chamada pelo limitador adaptativo
+    'RATE_LIMIT_INITIAL_CONCURRENCY': 4,  # Requisições simultâneas iniciais por processo
+    'RATE_LIMIT_MIN_CONCURRENCY': 1,
+    'RATE_LIMIT_MAX_CONCURRENCY': 16,
+    'RATE_LIMIT_LATENCY_THRESHOLD': 5.0,  # Latência média (s) acima da qual o limite para de crescer
+    'RATE_LIMIT_LOW_REMAINING_RATIO': 0.1,  # Fração de RateLimit-Remaining abaixo da qual não cresce
+    'RATE_LIMIT_MAX_PAUSE': 60,  # Espera máxima (s) após 429 / cota esgotada
+    
     # Configurações de timeout
     'API_TIMEOUT': 30,  # Timeout para chamadas da API
     'DIFF_TIMEOUT': 15,  # Timeout específico para diffs
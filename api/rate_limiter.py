@@ -0,0 +1,197 @@
+"""
+Controle adaptativo (AIMD) de concorrência para as chamadas ao GitLab
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from .performance_config import PERFORMANCE_CONFIG
+
+# Intervalo (s) entre tentativas de obter uma vaga a partir do event loop
+ASYNC_POLL_INTERVAL = 0.05
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limita quantas requisições ao GitLab ficam em andamento ao mesmo tempo.
+
+    O limite cresce de forma aditiva enquanto as respostas são saudáveis
+    (+1 a cada "janela" de respostas rápidas) e cai pela metade em 429/5xx
+    ou erros de conexão. Os cabeçalhos RateLimit-* também são usados: com
+    pouca cota restante o limite para de crescer, e com a cota esgotada
+    (ou Retry-After) novas requisições aguardam o reset.
+    """
+
+    def __init__(self, initial=None, minimum=None, maximum=None, latency_threshold=None):
+        self.minimum = minimum or PERFORMANCE_CONFIG['RATE_LIMIT_MIN_CONCURRENCY']
+        self.maximum = maximum or PERFORMANCE_CONFIG['RATE_LIMIT_MAX_CONCURRENCY']
+        self.limit = float(initial or PERFORMANCE_CONFIG['RATE_LIMIT_INITIAL_CONCURRENCY'])
+        self.latency_threshold = latency_threshold or PERFORMANCE_CONFIG['RATE_LIMIT_LATENCY_THRESHOLD']
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.remaining = None
+        self.latency = None  # Média móvel exponencial (segundos)
+        self._condition = threading.Condition()
+
+    def _wait_time(self):
+        """
+        0 se há vaga agora; senão os segundos até o fim da pausa, ou None se
+        é preciso aguardar uma vaga ser liberada (chamar com o lock adquirido)
+        """
+        wait = self.paused_until - time.monotonic()
+        if wait > 0:
+            return wait
+        if self.in_flight < max(self.minimum, int(self.limit)):
+            return 0
+        return None
+
+    def _release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """Aguarda uma vaga dentro do limite atual e a libera ao final"""
+        with self._condition:
+            while True:
+                wait = self._wait_time()
+                if wait == 0:
+                    break
+                self._condition.wait(wait)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """
+        Versão de slot() para o event loop: a vaga é disputada com as threads
+        do mesmo processo, mas a espera é feita com asyncio.sleep (sem bloquear o loop)
+        """
+        while True:
+            with self._condition:
+                wait = self._wait_time()
+                if wait == 0:
+                    self.in_flight += 1
+                    break
+            await asyncio.sleep(min(wait or ASYNC_POLL_INTERVAL, ASYNC_POLL_INTERVAL))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def record(self, status_code=None, headers=None, latency=None):
+        """Ajusta o limite a partir do resultado de uma requisição (status None = erro de conexão)"""
+        headers = headers or {}
+        with self._condition:
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+            remaining = _int_header(headers, 'RateLimit-Remaining')
+            quota = _int_header(headers, 'RateLimit-Limit')
+            if remaining is not None:
+                self.remaining = remaining
+
+            if status_code is None or status_code == 429 or status_code >= 500:
+                # Diminuição multiplicativa
+                self.limit = max(float(self.minimum), self.limit / 2)
+                if status_code == 429:
+                    self._pause(headers)
+            elif remaining is not None and remaining <= self.in_flight:
+                # Cota praticamente esgotada: esperar o reset da janela
+                self._pause(headers)
+            elif remaining is not None and quota and remaining < quota * PERFORMANCE_CONFIG['RATE_LIMIT_LOW_REMAINING_RATIO']:
+                # Pouca cota restante: não crescer
+                pass
+            elif self.latency is not None and self.latency > self.latency_threshold:
+                # Servidor lento: manter o limite atual
+                pass
+            else:
+                # Aumento aditivo: ~+1 a cada `limit` respostas saudáveis
+                self.limit = min(float(self.maximum), self.limit + 1.0 / max(self.limit, 1.0))
+
+            self._condition.notify_all()
+
+    def _pause(self, headers):
+        """Suspende novas requisições até Retry-After ou RateLimit-Reset"""
+        delay = _retry_after(headers)
+        if delay is None:
+            reset = _int_header(headers, 'RateLimit-Reset')
+            if reset is not None:
+                delay = reset - time.time()
+        if delay is None:
+            delay = 1.0
+        delay = min(max(delay, 0.0), PERFORMANCE_CONFIG['RATE_LIMIT_MAX_PAUSE'])
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(headers):
+    """Retry-After em segundos (aceita número ou data HTTP)"""
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(base_url):
+    """Limitador compartilhado pelo processo para uma instância do GitLab"""
+    with _limiters_lock:
+        limiter = _limiters.get(base_url)
+        if limiter is None:
+            limiter = _limiters[base_url] = AdaptiveConcurrencyLimiter()
+        return limiter
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Adapter do requests que passa cada requisição pelo AdaptiveConcurrencyLimiter.
+
+    Fora do modo stream, o corpo é lido antes de liberar a vaga e de registrar
+    a latência; com stream=True só o tempo até os cabeçalhos é medido.
+    """
+
+    def __init__(self, limiter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+
+        with self.limiter.slot():
+            started = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+                if not kwargs.get('stream'):
+                    # O HTTPAdapter retorna ao receber os cabeçalhos: ler o corpo aqui,
+                    # para que a vaga e a latência cubram o download (listagens grandes)
+                    response.content
+            except Exception:
+                self.limiter.record(None, latency=time.monotonic() - started)
+                raise
+            self.limiter.record(response.status_code, response.headers, time.monotonic() - started)
+        return response
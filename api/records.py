@@ -0,0 +1,114 @@
+"""
+Registros compactos dos dados do GitLab guardados em cache e usados na agregação
+"""
+
+
+class CommitRecord:
+    """
+    Commit com apenas os campos usados pela aplicação.
+
+    Criado uma única vez na busca (a partir de um ProjectCommit do
+    python-gitlab ou do JSON da API) e reaproveitado pelo cache, pela
+    serialização e pela agregação de estatísticas. Não guarda referências
+    ao manager, ao projeto nem aos pais, e é serializado como uma tupla.
+    """
+
+    __slots__ = (
+        'id',
+        'short_id',
+        'title',
+        'message',
+        'author_name',
+        'author_email',
+        'authored_date',
+        'committed_date',
+        'created_at',
+        'ref_name',
+        'branch_name',
+        'additions',
+        'deletions',
+    )
+
+    def __init__(self, id, short_id='', title='', message='', author_name='', author_email='',
+                 authored_date=None, committed_date=None, created_at=None, ref_name=None,
+                 branch_name=None, additions=None, deletions=None):
+        self.id = id
+        self.short_id = short_id
+        self.title = title
+        self.message = message
+        self.author_name = author_name
+        self.author_email = author_email
+        self.authored_date = authored_date
+        self.committed_date = committed_date
+        self.created_at = created_at
+        self.ref_name = ref_name
+        self.branch_name = branch_name
+        self.additions = additions
+        self.deletions = deletions
+
+    @classmethod
+    def from_dict(cls, data, branch=None):
+        """Cria o registro a partir do JSON de um commit da API (branch preenche ref/branch ausentes)"""
+        commit_stats = data.get('stats') or {}
+        return cls(
+            id=data['id'],
+            short_id=data.get('short_id') or '',
+            title=data.get('title') or '',
+            message=data.get('message') or '',
+            author_name=data.get('author_name') or '',
+            author_email=data.get('author_email') or '',
+            authored_date=data.get('authored_date'),
+            committed_date=data.get('committed_date'),
+            created_at=data.get('created_at') or data.get('authored_date'),
+            ref_name=data.get('ref_name') or branch,
+            branch_name=data.get('branch_name') or branch,
+            additions=commit_stats.get('additions'),
+            deletions=commit_stats.get('deletions'),
+        )
+
+    @classmethod
+    def from_gitlab(cls, commit, branch=None):
+        """Cria o registro a partir de um ProjectCommit do python-gitlab"""
+        if isinstance(commit, cls):
+            return commit
+        return cls.from_dict(getattr(commit, 'attributes', None) or vars(commit), branch)
+
+    @property
+    def stats(self):
+        """Contagens da listagem com with_stats, no mesmo formato do GitLab (None se ausentes)"""
+        if self.additions is None:
+            return None
+        return {
+            'additions': self.additions,
+            'deletions': self.deletions or 0,
+            'total': self.additions + (self.deletions or 0),
+        }
+
+    def to_dict(self):
+        """Campos expostos pela API (GitlabCommitSerializer)"""
+        return {
+            'id': self.id,
+            'short_id': self.short_id,
+            'title': self.title,
+            'author_name': self.author_name,
+            'author_email': self.author_email,
+            'authored_date': self.authored_date,
+            'created_at': self.created_at or self.authored_date,
+            'message': self.message,
+            'ref_name': self.ref_name,
+            'branch_name': self.branch_name,
+        }
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other):
+        if not isinstance(other, CommitRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<CommitRecord {self.short_id or self.id} {self.author_email}>"
@@ -0,0 +1,72 @@
+"""
+Transmissão do cálculo de estatísticas como Server-Sent Events
+"""
+
+import json
+import queue
+import threading
+import time
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from .client_pool import leased_gitlab_client
+from .serializers import DeveloperStatSerializer
+
+HEARTBEAT_INTERVAL = 15  # Segundos sem eventos até enviar um keep-alive (abaixo dos timeouts de proxy)
+PARTIAL_INTERVAL = 0.5  # Intervalo mínimo (s) entre eventos de progresso da mesma etapa
+
+_DONE = object()
+
+
+def format_event(event, data):
+    """Formata um evento SSE (data em JSON)"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def stream_developer_stats(token, project_id, since, until):
+    """
+    Executa get_developer_stats em uma thread (com um cliente do pool
+    reservado até o fim do cálculo) e gera os eventos SSE:
+
+    - progress: etapa ('commits_listed', 'diffs_fetched', 'commits_processed'),
+      done e total; em 'commits_processed' inclui os totais parciais por autor;
+    - result: estatísticas finais (mesmo formato da view de estatísticas);
+    - error: mensagem de erro.
+    """
+    events = queue.Queue()
+    last_sent = {}
+
+    def progress(stage, done=0, total=0, table=None, **details):
+        finished = bool(total) and done >= total
+        now = time.monotonic()
+        if not finished and now - last_sent.get(stage, 0) < PARTIAL_INTERVAL:
+            return
+        last_sent[stage] = now
+
+        data = {'stage': stage, 'done': done, 'total': total}
+        if table is not None:
+            data['partial'] = DeveloperStatSerializer(table.aggregate(), many=True).data
+        events.put(('progress', data))
+
+    def run():
+        try:
+            with leased_gitlab_client(token) as client:
+                stats = client.get_developer_stats(project_id, since=since, until=until, progress=progress)
+            events.put(('result', DeveloperStatSerializer(stats, many=True).data))
+        except Exception as e:
+            events.put(('error', {'detail': str(e)}))
+        finally:
+            connections.close_all()  # Conexões abertas por esta thread (banco local)
+            events.put(_DONE)
+
+    threading.Thread(target=run, name=f"stats-stream-{project_id}", daemon=True).start()
+
+    yield format_event('start', {'project_id': project_id, 'since': since, 'until': until})
+    while True:
+        try:
+            item = events.get(timeout=HEARTBEAT_INTERVAL)
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        if item is _DONE:
+            break
+        yield format_event(*item)
@@ -0,0 +1,143 @@
+"""
+Benchmark do CodeParser atual contra o de uma revisão anterior do git
+
+Monta diffs no formato do GitLab (hunks com 3 linhas de contexto, remoções e
+adições) a partir de arquivos de código e mede o tempo de analyze_diff de
+cada parser (melhor de N rodadas). O parser anterior é lido com git show
+(padrão: a revisão antes do scanner de estados); sem git, só o atual é medido.
+
+Uso: python api/tests/benchmark_code_parser.py [--rounds N] [--baseline REV] [arquivos ou diretórios...]
+(padrão: os arquivos .py, .js, .html e .css do próprio repositório)
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+if str(REPO_DIR) not in sys.path:
+    # Executado como script: o pacote api fica na raiz do repositório
+    sys.path.insert(0, str(REPO_DIR))
+
+from api.code_parser import CodeParser  # noqa: E402
+
+PARSER_PATH = 'api/code_parser.py'
+DEFAULT_SUFFIXES = ('.py', '.js', '.html', '.css')
+
+
+def git(*args):
+    return subprocess.run(
+        ['git', *args], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+
+
+def default_baseline():
+    """Revisão anterior ao commit que introduziu o scanner de estados (LanguageSyntax)"""
+    commits = git('log', '-S', 'class LanguageSyntax', '--format=%H', '--reverse', '--', PARSER_PATH).split()
+    return f'{commits[0]}^' if commits else None
+
+
+def load_baseline_parser(revision):
+    """CodeParser de api/code_parser.py na revisão informada, ou None sem git"""
+    try:
+        revision = revision or default_baseline()
+        if revision is None:
+            return None
+        source = git('show', f'{revision}:{PARSER_PATH}')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    module = types.ModuleType('baseline_code_parser')
+    exec(compile(source, f'{revision}:{PARSER_PATH}', 'exec'), module.__dict__)
+    return module.CodeParser()
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files += sorted(
+                candidate for candidate in path.rglob('*')
+                if candidate.suffix in DEFAULT_SUFFIXES and candidate.is_file()
+                and 'node_modules' not in candidate.parts
+            )
+        elif path.is_file():
+            files.append(path)
+    return files
+
+
+def gitlab_shaped_diff(lines, rng):
+    """Hunks espalhados pelo arquivo, como os diffs devolvidos pela API"""
+    hunks = []
+    index = 0
+    while index < len(lines) - 60:
+        index += rng.randint(0, 40)
+        added = rng.randint(5, 40)
+        removed = rng.randint(0, 8)
+        hunks.append(f'@@ -{index},{removed + 6} +{index},{added + 6} @@')
+        hunks += [' ' + line for line in lines[index:index + 3]]
+        hunks += ['-' + line for line in lines[index + 3:index + 3 + removed]]
+        hunks += ['+' + line for line in lines[index + 3 + removed:index + 3 + removed + added]]
+        hunks += [' ' + line for line in lines[index + 3 + removed + added:index + 6 + removed + added]]
+        index += 6 + removed + added
+    return '\n'.join(hunks)
+
+
+def build_diffs(files, seed=1):
+    rng = random.Random(seed)
+    diffs = []
+    for path in files:
+        try:
+            lines = path.read_text(encoding='utf-8').split('\n')
+        except (OSError, UnicodeDecodeError):
+            continue
+        diff = gitlab_shaped_diff(lines, rng)
+        if diff:
+            diffs.append((diff, path.name))
+    return diffs
+
+
+def best_time(parser, diffs, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for diff, filename in diffs:
+            parser.analyze_diff(diff, filename)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    arguments.add_argument('paths', nargs='*', default=[REPO_DIR])
+    arguments.add_argument('--rounds', type=int, default=5)
+    arguments.add_argument('--baseline', help='revisão do git com o parser anterior')
+    options = arguments.parse_args(argv)
+
+    diffs = build_diffs(collect_files(options.paths))
+    if not diffs:
+        print('Nenhum arquivo para analisar')
+        return
+    total_lines = sum(diff.count('\n') + 1 for diff, _ in diffs)
+    print(f'{len(diffs)} arquivos, {total_lines} linhas de diff')
+
+    candidates = [('atual', CodeParser())]
+    baseline = load_baseline_parser(options.baseline)
+    if baseline is None:
+        print('Parser anterior indisponível (sem git ou revisão inválida): só o atual é medido')
+    else:
+        candidates.insert(0, ('anterior', baseline))
+    timings = {}
+    for name, candidate in candidates:
+        timings[name] = best_time(candidate, diffs, max(1, options.rounds))
+        print(f'{name}: {timings[name]:.3f}s ({timings[name] / total_lines * 1e6:.2f} us/linha)')
+    if baseline is not None:
+        print(f"razão anterior/atual: {timings['anterior'] / timings['atual']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
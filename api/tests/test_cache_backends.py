@@ -0,0 +1,265 @@
+import shutil
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from api.cache_backends import RESPCache, RESPError, SQLiteCache
+
+
+class StubRESPHandler(socketserver.StreamRequestHandler):
+    """Servidor mínimo com o protocolo do Redis: só os comandos usados pelo RESPCache"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.server.commands.append(args[0].decode())
+            self.wfile.write(self.server.execute(args[0].decode().upper(), args[1:]))
+
+
+class StubRESPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubRESPHandler)
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            del self.data[key], self.expires[key]
+        return key in self.data
+
+    def execute(self, command, args):
+        with self.lock:
+            if command == 'GET':
+                return self._bulk(self.data[args[0]] if self._alive(args[0]) else None)
+            if command == 'MGET':
+                values = [self.data[key] if self._alive(key) else None for key in args]
+                return b'*%d\r\n' % len(values) + b''.join(self._bulk(value) for value in values)
+            if command == 'SET':
+                key, value, options = args[0], args[1], [option.upper() for option in args[2:]]
+                if b'NX' in options and self._alive(key):
+                    return self._bulk(None)
+                self.data[key] = value
+                self.expires.pop(key, None)
+                if b'PX' in options:
+                    self.expires[key] = time.time() + int(options[options.index(b'PX') + 1]) / 1000
+                return b'+OK\r\n'
+            if command == 'DEL':
+                deleted = 0
+                for key in args:
+                    if self._alive(key):
+                        del self.data[key]
+                        self.expires.pop(key, None)
+                        deleted += 1
+                return b':%d\r\n' % deleted
+            if command == 'EXISTS':
+                return b':%d\r\n' % sum(self._alive(key) for key in args)
+            if command == 'PEXPIRE':
+                if not self._alive(args[0]):
+                    return b':0\r\n'
+                self.expires[args[0]] = time.time() + int(args[1]) / 1000
+                return b':1\r\n'
+            if command == 'PERSIST':
+                return b':%d\r\n' % (self._alive(args[0]) and self.expires.pop(args[0], None) is not None)
+            if command == 'INCRBY':
+                current = self.data[args[0]] if self._alive(args[0]) else b'0'
+                if not current.lstrip(b'-').isdigit():
+                    return b'-ERR value is not an integer or out of range\r\n'
+                value = int(current) + int(args[1])
+                self.data[args[0]] = str(value).encode()
+                return b':%d\r\n' % value
+            if command == 'FLUSHDB':
+                self.data.clear()
+                self.expires.clear()
+                return b'+OK\r\n'
+            if command == 'SELECT':
+                return b'+OK\r\n'
+            return b'-ERR unknown command\r\n'
+
+    @staticmethod
+    def _bulk(value):
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class SharedCacheContract:
+    """Comportamento comum aos backends compartilhados entre os workers"""
+
+    def test_set_get_and_default(self):
+        self.cache.set('relatorio', {'commits': 3}, 60)
+
+        self.assertEqual(self.cache.get('relatorio'), {'commits': 3})
+        self.assertEqual(self.cache.get('ausente', 'padrão'), 'padrão')
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('curta', 'valor', 0.05)
+        self.cache.set('longa', 'valor', 60)
+
+        time.sleep(0.1)
+
+        self.assertIsNone(self.cache.get('curta'))
+        self.assertFalse(self.cache.has_key('curta'))
+        self.assertEqual(self.cache.get('longa'), 'valor')
+        # Expirada, a chave pode ser criada de novo por add()
+        self.assertTrue(self.cache.add('curta', 'nova', 60))
+
+    def test_add_only_creates_missing_keys(self):
+        self.assertTrue(self.cache.add('lock', 'a', 60))
+        self.assertFalse(self.cache.add('lock', 'b', 60))
+        self.assertEqual(self.cache.get('lock'), 'a')
+
+    def test_get_many_and_delete_many(self):
+        self.cache.set_many({'a': 1, 'b': [2], 'c': 'três'}, 60)
+
+        self.assertEqual(self.cache.get_many(['a', 'b', 'x']), {'a': 1, 'b': [2]})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 'três'})
+
+    def test_incr_requires_existing_key(self):
+        self.cache.set('contador', 1, 60)
+
+        self.assertEqual(self.cache.incr('contador', 2), 3)
+        self.assertEqual(self.cache.get('contador'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('inexistente')
+
+    def test_touch_and_clear(self):
+        self.cache.set('chave', 'valor', 0.05)
+
+        self.assertTrue(self.cache.touch('chave', 60))
+        time.sleep(0.1)
+        self.assertEqual(self.cache.get('chave'), 'valor')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('chave'))
+
+
+class SQLiteCacheTests(SharedCacheContract, SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = str(Path(directory) / 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {'OPTIONS': {'CULL_INTERVAL': 5, 'MAX_ENTRIES': 100}})
+
+    def test_database_uses_wal(self):
+        self.cache.set('chave', 'valor')
+
+        connection = sqlite3.connect(self.path)
+        self.addCleanup(connection.close)
+        self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_other_instance_sees_writes(self):
+        # Outro worker: mesmo arquivo, conexão própria
+        other = SQLiteCache(self.path, {})
+
+        self.cache.set('compartilhada', 'valor', 60)
+
+        self.assertEqual(other.get('compartilhada'), 'valor')
+
+    def test_concurrent_readers_and_writers(self):
+        errors = []
+        writers = 4
+        writes = 50
+
+        def write(worker):
+            cache = SQLiteCache(self.path, {'OPTIONS': {'CULL_INTERVAL': 10}})
+            try:
+                for index in range(writes):
+                    cache.set(f'w{worker}-{index}', index, 60)
+                    cache.incr('total')
+            except Exception as error:  # noqa: BLE001 - falha reportada pelo teste
+                errors.append(error)
+
+        def read():
+            cache = SQLiteCache(self.path, {})
+            try:
+                for index in range(writes * 2):
+                    cache.get_many([f'w0-{index % writes}', 'total'])
+            except Exception as error:  # noqa: BLE001
+                errors.append(error)
+
+        self.cache.set('total', 0, 60)
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(writers)]
+        threads += [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.get('total'), writers * writes)
+        self.assertEqual(
+            len(self.cache.get_many([f'w{worker}-{index}' for worker in range(writers) for index in range(writes)])),
+            writers * writes,
+        )
+
+    def test_bulk_cull_removes_expired_and_oldest(self):
+        for index in range(4):
+            self.cache.set(f'expirada-{index}', index, 0.01)
+        time.sleep(0.05)
+        for index in range(120):
+            self.cache.set(f'chave-{index}', index, 60 + index)
+
+        connection = sqlite3.connect(self.path)
+        self.addCleanup(connection.close)
+        keys = [row[0] for row in connection.execute('SELECT key FROM cache_entries')]
+        self.assertFalse(any('expirada' in key for key in keys))
+        self.assertLessEqual(len(keys), 100 + self.cache.cull_interval)
+        # As mais próximas de expirar saem primeiro
+        self.assertIsNone(self.cache.get('chave-0'))
+        self.assertEqual(self.cache.get('chave-119'), 119)
+
+
+class RESPCacheTests(SharedCacheContract, SimpleTestCase):
+    def setUp(self):
+        self.server = StubRESPServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        location = f'redis://127.0.0.1:{self.server.server_address[1]}/1'
+        self.cache = RESPCache(location, {})
+
+    def test_integers_are_stored_as_text(self):
+        # INCRBY no servidor precisa do inteiro em texto, não em pickle
+        self.cache.set('contador', 41, 60)
+
+        self.assertIn(b':1:contador', self.server.data)
+        self.assertEqual(self.server.data[b':1:contador'], b'41')
+        self.assertEqual(self.cache.incr('contador'), 42)
+
+    def test_connection_selects_database_once_per_thread(self):
+        self.cache.get('a')
+        self.cache.get('b')
+        thread = threading.Thread(target=self.cache.get, args=('c',))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(self.server.commands.count('SELECT'), 2)
+
+    def test_timeout_is_sent_to_server_in_milliseconds(self):
+        self.cache.set('chave', 'valor', 2)
+        self.cache.set('eterna', 'valor', None)
+
+        self.assertAlmostEqual(self.server.expires[b':1:chave'] - time.time(), 2, delta=0.5)
+        self.assertNotIn(b':1:eterna', self.server.expires)
+
+    def test_server_error_is_raised(self):
+        self.cache.set('texto', 'não é número', 60)
+
+        with self.assertRaises(RESPError):
+            self.cache.incr('texto')
+        # A conexão continua utilizável depois do erro
+        self.assertEqual(self.cache.get('texto'), 'não é número')
@@ -0,0 +1,390 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from api import cache_manager
+from api.cache_manager import (
+    LocalObjectCache, _key_part, cache_result, invalidate_data_type, invalidate_project, local_cache,
+)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheManagerTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache_manager._refreshing.clear)
+        self.scheduled = []
+        patcher = mock.patch('api.jobs.run_in_background', lambda func, *args: self.scheduled.append(func))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def key_for(self, prefix, *parts):
+        """Chave gerada por cache_result para os argumentos (sem projeto)"""
+        generation, = cache_manager._tag_generations([cache_manager.data_type_tag(prefix)])
+        return '_'.join([prefix, *map(str, parts), f'v{cache_manager.KEY_SCHEMA_VERSION}', f'gen:{generation}'])
+
+
+class XFetchTests(SimpleTestCase):
+    def should_refresh(self, expires_in, delta, beta=1.0, draw=0.5):
+        now = 1000.0
+        entry = {'expires_at': now + expires_in, 'delta': delta}
+        with mock.patch.object(cache_manager.random, 'random', return_value=draw):
+            return cache_manager._should_refresh_early(entry, now, beta)
+
+    def test_refresh_probability_grows_with_compute_time(self):
+        # -ln(1 - 0.5) ≈ 0.69: antecipa quando delta * beta * 0.69 alcança o tempo restante
+        self.assertFalse(self.should_refresh(expires_in=10, delta=1))
+        self.assertTrue(self.should_refresh(expires_in=10, delta=20))
+        self.assertTrue(self.should_refresh(expires_in=10, delta=5, beta=3))
+
+    def test_unlucky_draw_refreshes_early(self):
+        self.assertFalse(self.should_refresh(expires_in=10, delta=1, draw=0.5))
+        self.assertTrue(self.should_refresh(expires_in=10, delta=1, draw=0.99999))
+
+    def test_disabled_without_delta_or_beta(self):
+        self.assertFalse(self.should_refresh(expires_in=0.1, delta=0, draw=0.99999))
+        self.assertFalse(self.should_refresh(expires_in=0.1, delta=10, beta=0, draw=0.99999))
+
+
+class StaleWhileRevalidateTests(CacheManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+        self.fail = False
+
+        @cache_result('stats_teste', timeout=60, stale_timeout=600, beta=0)
+        def compute(_self, project_id):
+            self.calls += 1
+            if self.fail:
+                raise RuntimeError('GitLab indisponível')
+            return {'project': project_id, 'call': self.calls}
+
+        self.compute = compute
+
+    def expired(self, seconds=61):
+        """Relógio adiantado para depois da expiração lógica (ainda dentro da janela de stale)"""
+        return mock.patch('time.time', return_value=time.time() + seconds)
+
+    def test_expired_value_is_served_while_refreshing_in_background(self):
+        self.assertEqual(self.compute(None, 7)['call'], 1)
+
+        with self.expired():
+            self.assertEqual(self.compute(None, 7)['call'], 1)
+            self.assertEqual(len(self.scheduled), 1)
+            self.assertEqual(self.calls, 1)
+
+            self.scheduled[0]()
+
+            self.assertEqual(self.compute(None, 7)['call'], 2)
+        self.assertNotIn(f"{self.key_for('stats_teste', 7)}_refresh", cache)
+
+    def test_only_one_refresh_per_key(self):
+        self.compute(None, 7)
+
+        with self.expired():
+            self.compute(None, 7)
+            self.compute(None, 7)
+
+        self.assertEqual(len(self.scheduled), 1)
+
+    def test_failed_refresh_keeps_serving_stale_value(self):
+        self.compute(None, 7)
+        self.fail = True
+
+        with self.expired():
+            self.compute(None, 7)
+            with self.assertLogs('api.cache_manager', 'WARNING'):
+                self.scheduled[0]()
+
+            self.assertEqual(self.compute(None, 7)['call'], 1)
+            # Com o lock liberado, a próxima leitura agenda outra tentativa
+            self.assertEqual(len(self.scheduled), 2)
+
+    def test_fresh_value_is_not_refreshed(self):
+        self.compute(None, 7)
+
+        self.assertEqual(self.compute(None, 7)['call'], 1)
+        self.assertEqual(self.scheduled, [])
+
+    def test_value_past_stale_window_is_recomputed_inline(self):
+        self.compute(None, 7)
+
+        with self.expired(seconds=60 + 600 + 1):
+            self.assertEqual(self.compute(None, 7)['call'], 2)
+        self.assertEqual(self.scheduled, [])
+
+
+class SingleFlightTests(CacheManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loads = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+
+        @cache_result('stats_sf', timeout=60, beta=0)
+        def load(_self, project_id):
+            self.loads += 1
+            self.started.set()
+            self.release.wait(5)
+            if self.error is not None:
+                raise self.error
+            return {'project': project_id}
+
+        self.load = load
+        self.cache_key = self.key_for('stats_sf', 7)
+
+    def call_concurrently(self, threads=8):
+        results = [None] * threads
+
+        def call(index):
+            try:
+                results[index] = self.load(None, 7)
+            except Exception as error:  # noqa: BLE001 - comparado pelo teste
+                results[index] = error
+
+        workers = [threading.Thread(target=call, args=(index,)) for index in range(threads)]
+        for worker in workers:
+            worker.start()
+        self.assertTrue(self.started.wait(5))
+        time.sleep(0.1)  # As demais threads chegam enquanto o líder calcula
+        self.release.set()
+        for worker in workers:
+            worker.join(5)
+        return results
+
+    def test_concurrent_misses_run_loader_once(self):
+        results = self.call_concurrently()
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(results, [{'project': 7}] * 8)
+        self.assertEqual(cache_manager._in_flight, {})
+
+    def test_waiters_receive_leader_exception(self):
+        self.error = RuntimeError('GitLab indisponível')
+
+        results = self.call_concurrently()
+
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(result is self.error for result in results))
+        self.assertIsNone(cache.get(f'{self.cache_key}_lock'))
+
+    def test_waits_for_other_process_then_computes_after_timeout(self):
+        # Outro processo segura o lock compartilhado e nunca grava o resultado
+        cache.add(f'{self.cache_key}_lock', 1, 60)
+        self.release.set()
+
+        with mock.patch.object(cache_manager, 'SINGLE_FLIGHT_WAIT', 0.2), \
+                mock.patch.object(cache_manager, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.01):
+            started = time.monotonic()
+            self.assertEqual(self.load(None, 7), {'project': 7})
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.loads, 1)
+
+    def test_uses_result_written_by_other_process(self):
+        cache.add(f'{self.cache_key}_lock', 1, 60)
+
+        def other_process():
+            time.sleep(0.05)
+            cache_manager._write_entry(self.cache_key, {'project': 'outro'}, 60, 60, 0.1)
+
+        writer = threading.Thread(target=other_process)
+        writer.start()
+        with mock.patch.object(cache_manager, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.01):
+            self.assertEqual(self.load(None, 7), {'project': 'outro'})
+        writer.join()
+
+        self.assertEqual(self.loads, 0)
+
+    def test_lock_released_without_result_computes_immediately(self):
+        cache.add(f'{self.cache_key}_lock', 1, 60)
+        self.release.set()
+        threading.Timer(0.05, cache.delete, args=(f'{self.cache_key}_lock',)).start()
+
+        with mock.patch.object(cache_manager, 'SINGLE_FLIGHT_POLL_INTERVAL', 0.01):
+            started = time.monotonic()
+            self.assertEqual(self.load(None, 7), {'project': 7})
+
+        self.assertLess(time.monotonic() - started, cache_manager.SINGLE_FLIGHT_WAIT)
+        self.assertEqual(self.loads, 1)
+
+
+class CountedPickle:
+    """Valor que conta quantas vezes foi serializado"""
+
+    pickles = 0
+
+    def __reduce__(self):
+        CountedPickle.pickles += 1
+        return CountedPickle, ()
+
+
+class LocalObjectCacheTests(CacheManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loads = 0
+
+        @cache_result('stats_l1', timeout=60, beta=0)
+        def load(_self, project_id):
+            self.loads += 1
+            return {'project': project_id, 'load': self.loads}
+
+        self.load = load
+        self.cache_key = self.key_for('stats_l1', 7)
+
+    def shared_cache(self):
+        """Cache compartilhado com as chamadas registradas"""
+        return mock.patch.object(cache_manager, 'cache', mock.Mock(wraps=cache))
+
+    def test_value_is_pickled_once_per_write(self):
+        CountedPickle.pickles = 0
+
+        cache_manager._write_entry('stats_pickle', CountedPickle(), 60, 60, 0.1)
+
+        self.assertEqual(CountedPickle.pickles, 1)
+        self.assertIsInstance(cache_manager._read_entry('stats_pickle')['value'], CountedPickle)
+
+    def test_hit_within_check_interval_skips_shared_cache(self):
+        first = self.load(None, 7)
+
+        with self.shared_cache() as shared:
+            self.assertIs(self.load(None, 7), first)
+
+        self.assertEqual(shared.get.call_count, 0)
+
+    def test_hit_after_check_interval_reads_only_version(self):
+        first = self.load(None, 7)
+
+        with mock.patch.object(local_cache, 'version_check_interval', 0), self.shared_cache() as shared:
+            self.assertIs(self.load(None, 7), first)
+
+        shared.get.assert_called_once_with(f'{self.cache_key}_version')
+
+    def test_new_version_from_other_process_replaces_local_object(self):
+        self.load(None, 7)
+        # Outro worker recalcula: nova versão no cache compartilhado, sem passar por este L1
+        other_l1 = LocalObjectCache()
+        with mock.patch.object(cache_manager, 'local_cache', other_l1):
+            cache_manager._write_entry(self.cache_key, {'project': 7, 'load': 'outro'}, 60, 60, 0.1)
+
+        self.assertEqual(self.load(None, 7)['load'], 1)
+        with mock.patch.object(local_cache, 'version_check_interval', 0):
+            self.assertEqual(self.load(None, 7)['load'], 'outro')
+        self.assertEqual(self.loads, 1)
+
+    def test_shared_entry_is_loaded_into_l1(self):
+        self.load(None, 7)
+        local_cache.clear()
+
+        with self.shared_cache() as shared:
+            entry = cache_manager._read_entry(self.cache_key)
+            self.assertIs(cache_manager._read_entry(self.cache_key), entry)
+
+        self.assertEqual(entry['value'], {'project': 7, 'load': 1})
+        self.assertEqual(shared.get.call_count, 1)
+
+    def test_lru_eviction_by_bytes_and_prefix_quota(self):
+        l1 = LocalObjectCache(max_bytes=100, ttl=60, quotas={'commits': 0.5})
+
+        l1.set('stats_a', 1, 'a', 40)
+        l1.set('stats_b', 1, 'b', 40)
+        l1.get('stats_a')  # a passa a ser a mais recente
+        l1.set('stats_c', 1, 'c', 40)
+
+        self.assertIsNone(l1.get('stats_b'))
+        self.assertEqual(l1.get('stats_a')[1], 'a')
+        self.assertEqual(l1.total_bytes, 80)
+
+        l1.set('commits_x', 1, 'x', 30)
+        l1.set('commits_y', 1, 'y', 30)
+        # Cota de commits (50 bytes): sai a entrada mais antiga do mesmo prefixo
+        self.assertIsNone(l1.get('commits_x'))
+        self.assertEqual(l1.get('commits_y')[1], 'y')
+
+    def test_expired_l1_entry_is_reread(self):
+        l1 = LocalObjectCache(max_bytes=100, ttl=60)
+        l1.set('stats_a', 1, 'a', 10)
+
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(l1.get('stats_a'))
+
+
+class TagInvalidationTests(CacheManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loads = []
+
+        @cache_result('commits_tag', timeout=60, beta=0, project_arg='project_id')
+        def commits(_self, project_id, branch=None):
+            self.loads.append(('commits', _key_part(project_id)))
+            return len(self.loads)
+
+        @cache_result('projects_tag', timeout=60, beta=0)
+        def projects(_self):
+            self.loads.append(('projects', None))
+            return len(self.loads)
+
+        self.commits = commits
+        self.projects = projects
+
+    def test_project_invalidation_only_affects_that_project(self):
+        first_7, first_8, first_projects = self.commits(None, 7), self.commits(None, 8), self.projects(None)
+
+        invalidate_project(7)
+
+        self.assertNotEqual(self.commits(None, 7), first_7)
+        self.assertEqual(self.commits(None, 8), first_8)
+        self.assertEqual(self.projects(None), first_projects)
+        self.assertEqual(self.loads.count(('commits', '7')), 2)
+
+    def test_project_tag_covers_every_argument_combination(self):
+        # Objeto do GitLab entra pelo id: mesma tag que o id numérico
+        project = SimpleNamespace(id=7)
+        self.commits(None, project)
+        self.commits(None, 7, branch='main')
+
+        invalidate_project(7)
+        self.commits(None, project)
+        self.commits(None, 7, branch='main')
+
+        self.assertEqual(self.loads.count(('commits', '7')), 4)
+
+    def test_data_type_invalidation_affects_all_projects(self):
+        self.commits(None, 7)
+        self.commits(None, 8)
+        first_projects = self.projects(None)
+
+        invalidate_data_type('commits_tag')
+        self.commits(None, 7)
+        self.commits(None, 8)
+
+        self.assertEqual(len(self.loads), 5)
+        self.assertEqual(self.projects(None), first_projects)
+
+    def test_lost_generation_counter_does_not_revive_old_keys(self):
+        first = self.commits(None, 7)
+        old_generation, = cache_manager._tag_generations([cache_manager.project_tag(7)])
+
+        # Contador removido do cache (ex.: LRU do backend) e recriado pelo relógio
+        cache.delete(cache_manager._tag_key(cache_manager.project_tag(7)))
+
+        self.assertNotEqual(self.commits(None, 7), first)
+        new_generation, = cache_manager._tag_generations([cache_manager.project_tag(7)])
+        self.assertGreater(new_generation, old_generation)
+
+    def test_generations_are_read_in_one_call(self):
+        self.commits(None, 7)
+
+        with mock.patch.object(cache_manager, 'cache', mock.Mock(wraps=cache)) as shared:
+            self.commits(None, 7)
+
+        shared.get_many.assert_called_once_with([
+            cache_manager._tag_key(cache_manager.data_type_tag('commits_tag')),
+            cache_manager._tag_key(cache_manager.project_tag(7)),
+        ])
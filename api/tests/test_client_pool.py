@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api import client_pool
+from api.performance_config import PERFORMANCE_CONFIG
+
+
+class FakeGitlabClient:
+    def __init__(self, token, url=None):
+        self.token = token
+        self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@override_settings(GITLAB_API_URL='https://gitlab.example.com')
+class ClientPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.addCleanup(client_pool._clients.clear)
+        for patcher in (
+            mock.patch.object(client_pool, 'GitlabClient', FakeGitlabClient),
+            mock.patch.object(client_pool.time, 'monotonic', lambda: self.now),
+            mock.patch.dict(PERFORMANCE_CONFIG, {'CLIENT_POOL_IDLE_TIMEOUT': 600}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_client_is_reused_per_token_and_url(self):
+        client = client_pool.get_gitlab_client('token')
+
+        self.assertIs(client_pool.get_gitlab_client('token'), client)
+        self.assertEqual(client.url, 'https://gitlab.example.com')
+        self.assertIsNot(client_pool.get_gitlab_client('outro'), client)
+        self.assertIsNot(client_pool.get_gitlab_client('token', url='https://outro.example.com'), client)
+
+    def test_idle_client_is_evicted_and_closed(self):
+        idle = client_pool.get_gitlab_client('ocioso')
+        self.now += 300
+        used = client_pool.get_gitlab_client('em-uso')
+
+        self.now += 301
+        client_pool.get_gitlab_client('outro')
+
+        self.assertTrue(idle.closed)
+        self.assertFalse(used.closed)
+        self.assertIsNot(client_pool.get_gitlab_client('ocioso'), idle)
+        self.assertIs(client_pool.get_gitlab_client('em-uso'), used)
+
+    def test_leased_client_is_not_evicted(self):
+        with client_pool.leased_gitlab_client('job') as client:
+            self.now += 3600
+            client_pool.get_gitlab_client('outro')
+
+            self.assertFalse(client.closed)
+            self.assertIs(client_pool.get_gitlab_client('job'), client)
+
+    def test_idle_time_counts_from_last_release(self):
+        with client_pool.leased_gitlab_client('job') as client:
+            with client_pool.leased_gitlab_client('job') as same:
+                self.assertIs(same, client)
+            self.now += 3600
+            client_pool.get_gitlab_client('outro')
+            # Ainda há uma reserva ativa
+            self.assertFalse(client.closed)
+
+        self.now += 599
+        client_pool.get_gitlab_client('outro')
+        self.assertFalse(client.closed)
+        self.now += 2
+        client_pool.get_gitlab_client('outro')
+        self.assertTrue(client.closed)
@@ -0,0 +1,191 @@
+from collections import Counter
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from api.code_parser import CodeParser
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+# Linhas que se classificam sozinhas (sem comentários ou strings de várias
+# linhas), com a classificação esperada de cada uma
+SINGLE_LINE_CASES = {
+    'a.py': [
+        ('x = 1', 'code'), ('# comentário', 'comments'), ('    return x  # fim', 'code'),
+        ('"""Docstring de uma linha."""', 'comments'), ('', 'blank'),
+    ],
+    'a.js': [
+        ('var x = 1;', 'code'), ('// comentário', 'comments'), ('/* bloco */', 'comments'),
+        ('f(); // fim', 'code'), ('   ', 'blank'),
+    ],
+    'a.java': [
+        ('int x = 1;', 'code'), ('// comentário', 'comments'), ('/* bloco */', 'comments'), ('return x;', 'code'),
+    ],
+    'a.c': [('int x;', 'code'), ('/* bloco */', 'comments'), ('// comentário', 'comments')],
+    'a.php': [('$x = 1;', 'code'), ('# comentário', 'comments'), ('// comentário', 'comments')],
+    'a.rb': [('puts 1', 'code'), ('# comentário', 'comments')],
+    'a.sql': [('select 1;', 'code'), ('-- comentário', 'comments')],
+    'a.html': [('<p>a</p>', 'code'), ('<!-- comentário -->', 'comments')],
+    'a.yaml': [('chave: valor', 'code'), ('# comentário', 'comments')],
+    # Linguagem desconhecida: só as linhas brancas não são código
+    'a.txt': [('texto qualquer', 'code'), ('# não é comentário', 'code')],
+}
+
+
+def added_hunk(lines):
+    """Hunk que só adiciona as linhas informadas"""
+    return f"@@ -0,0 +1,{len(lines)} @@\n" + '\n'.join('+' + line for line in lines)
+
+
+class CodeParserTests(SimpleTestCase):
+    """Classificação das linhas de diffs e arquivos em código, comentário e branco"""
+
+    def setUp(self):
+        self.parser = CodeParser()
+
+    def assertConsistent(self, stats):
+        for side in ('additions', 'deletions'):
+            parts = stats[f'{side}_code'] + stats[f'{side}_comments'] + stats[f'{side}_blank']
+            self.assertEqual(parts, stats[side], side)
+
+    def test_single_line_classification(self):
+        for filename, cases in SINGLE_LINE_CASES.items():
+            language = self.parser.detect_language(filename)
+            for line, kind in cases:
+                with self.subTest(filename=filename, line=line):
+                    self.assertEqual(self.parser.is_comment_line(line, language), kind == 'comments')
+                    self.assertEqual(self.parser.is_code_line(line, language), kind == 'code')
+
+    def test_single_line_diffs(self):
+        for filename, cases in SINGLE_LINE_CASES.items():
+            expected = Counter(kind for _, kind in cases)
+            with self.subTest(filename=filename):
+                stats = self.parser.analyze_diff(added_hunk([line for line, _ in cases]), filename)
+
+                self.assertEqual(stats['additions'], len(cases))
+                for kind in ('code', 'comments', 'blank'):
+                    self.assertEqual(stats[f'additions_{kind}'], expected[kind], kind)
+                self.assertEqual(stats['deletions'], 0)
+
+    def test_code_lines_are_counted_once(self):
+        # O parser anterior somava duas vezes cada linha de código
+        diff = '@@ -1,4 +1,5 @@\n import os\n+x = 1\n+# comentário\n+\n-y = 2\n+print(x)\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats, {
+            'additions': 4, 'deletions': 1,
+            'additions_code': 2, 'deletions_code': 1,
+            'additions_comments': 1, 'deletions_comments': 0,
+            'additions_blank': 1, 'deletions_blank': 0,
+        })
+
+    def test_block_comment_interior_lines_are_comments(self):
+        diff = (
+            '@@ -1,2 +1,7 @@\n class A {\n+/**\n+ * Soma dois números\n+ * e retorna\n+ */\n'
+            '+int soma(int a, int b) { return a + b; }\n }\n'
+        )
+
+        stats = self.parser.analyze_diff(diff, 'A.java')
+
+        # As linhas internas (" * ...") também são comentário
+        self.assertEqual(stats['additions_comments'], 4)
+        self.assertEqual(stats['additions_code'], 1)
+
+    def test_hunk_starting_inside_block_comment(self):
+        diff = (
+            '@@ -10,4 +10,5 @@\n  * comentário de contexto\n+ * linha nova no comentário\n'
+            '+ ainda comentário\n  */\n+int z;\n'
+        )
+
+        stats = self.parser.analyze_diff(diff, 'a.c')
+
+        self.assertEqual(stats['additions_comments'], 2)
+        self.assertEqual(stats['additions_code'], 1)
+        self.assertConsistent(stats)
+
+    def test_block_comment_across_removed_and_added_lines(self):
+        # Cada lado é lido sem as linhas do outro: o '*/' removido não fecha o comentário novo
+        diff = '@@ -1,3 +1,3 @@\n int a;\n-/* antigo */\n+/* novo\n+   continua */\n int b;\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.c')
+
+        self.assertEqual((stats['additions_comments'], stats['additions_code']), (2, 0))
+        self.assertEqual((stats['deletions_comments'], stats['deletions_code']), (1, 0))
+
+    def test_hunk_starting_inside_docstring(self):
+        diff = (
+            '@@ -3,4 +3,6 @@\n     more docs\n+    added doc line\n     """\n'
+            '+    x = 1\n+    y = compute()\n'
+        )
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions'], 3)
+        self.assertEqual(stats['additions_comments'], 1)
+        self.assertEqual(stats['additions_code'], 2)
+
+    def test_hunk_starting_inside_docstring_before_another_string(self):
+        diff = '@@ -1,2 +1,5 @@\n texto\n+fim."""\n+x = 1\n+s = """a\n+b"""\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions_comments'], 1)
+        self.assertEqual(stats['additions_code'], 3)
+
+    def test_docstring_opened_at_hunk_start_runs_to_hunk_end(self):
+        diff = '@@ -3,2 +3,4 @@\n def f():\n+    """Resumo da função.\n+\n+    Detalhes\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions_comments'], 2)
+        self.assertEqual(stats['additions_blank'], 1)
+        self.assertEqual(stats['additions_code'], 0)
+
+    def test_docstring_interior_lines_are_comments(self):
+        diff = '@@ -1 +1,5 @@\n def f():\n+    """\n+    Docstring interior\n+    """\n+    return 1\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions_comments'], 3)
+        self.assertEqual(stats['additions_code'], 1)
+
+    def test_comment_markers_inside_strings_are_code(self):
+        diff = '@@ -1 +1,3 @@\n+s = "a # b"\n+t = 1  # fim\n+u = "/* não */"\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions_code'], 3)
+        self.assertEqual(stats['additions_comments'], 0)
+
+    def test_multiline_string_lines_are_code(self):
+        # Um '#' no início de uma linha da string não é comentário
+        diff = '@@ -1 +1,3 @@\n+sql = """select 1\n+# não é comentário\n+"""\n'
+
+        stats = self.parser.analyze_diff(diff, 'a.py')
+
+        self.assertEqual(stats['additions_code'], 3)
+        self.assertEqual(stats['additions_comments'], 0)
+
+    def test_file_content_matches_added_diff(self):
+        content = 'def f():\n    """\n    Doc\n    """\n\n    # nota\n    return 1\n'
+
+        stats = self.parser.analyze_file_content(content, 'a.py')
+        diff_stats = self.parser.analyze_diff(added_hunk(content.split('\n')), 'a.py')
+
+        self.assertEqual(stats, {'total_lines': 8, 'code_lines': 2, 'comment_lines': 4, 'blank_lines': 2})
+        self.assertEqual(
+            (diff_stats['additions_code'], diff_stats['additions_comments'], diff_stats['additions_blank']),
+            (stats['code_lines'], stats['comment_lines'], stats['blank_lines']),
+        )
+
+    def test_whole_files_keep_line_and_blank_totals(self):
+        # Só a divisão entre código e comentário depende do scanner
+        for path in sorted(API_DIR.glob('*.py')):
+            lines = path.read_text(encoding='utf-8').split('\n')
+            with self.subTest(path=path.name):
+                stats = self.parser.analyze_diff(added_hunk(lines), path.name)
+
+                self.assertEqual(stats['additions'], len(lines))
+                self.assertEqual(stats['additions_blank'], sum(not line.strip() for line in lines))
+                self.assertConsistent(stats)
@@ -0,0 +1,40 @@
+import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from api.performance_config import PERFORMANCE_CONFIG
+from api.tests.test_commit_store import FakeGitlabClient
+
+
+class ShouldUseRealDiffTests(SimpleTestCase):
+    def setUp(self):
+        self.client_fake = FakeGitlabClient()
+        patcher = mock.patch.dict(PERFORMANCE_CONFIG, {'USE_REAL_DIFF_FOR_RECENT_DAYS': 7})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def should_use(self, created_at, sample_commits=None):
+        commit = SimpleNamespace(id='a1', created_at=created_at)
+        return self.client_fake._should_use_real_diff(commit, sample_commits)
+
+    def test_recent_commits_use_real_diff(self):
+        recent = timezone.now() - datetime.timedelta(days=2)
+
+        self.assertTrue(self.should_use(recent.isoformat()))
+        self.assertTrue(self.should_use(recent.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')))
+        # Sem fuso: interpretada no fuso local
+        self.assertTrue(self.should_use(timezone.localtime(recent).replace(tzinfo=None).isoformat()))
+
+    def test_old_commits_use_estimate(self):
+        old = timezone.now() - datetime.timedelta(days=30)
+
+        self.assertFalse(self.should_use(old.isoformat()))
+        self.assertTrue(self.should_use(old.isoformat(), sample_commits={'a1'}))
+
+    def test_invalid_dates_use_estimate(self):
+        for created_at in ('ontem', None, 20240301):
+            with self.subTest(created_at=created_at):
+                self.assertFalse(self.should_use(created_at))
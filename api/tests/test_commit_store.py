@@ -0,0 +1,217 @@
+import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api import commit_store
+from api.code_parser import CodeParser
+from api.commit_stats import CommitStatsMixin
+from api.models import Commit, DailyAuthorStat, Project, SyncState
+from api.performance_config import PERFORMANCE_CONFIG
+
+
+def days_ago(days, hour=12):
+    """Datetime local (aware) de days dias atrás"""
+    day = timezone.localdate() - datetime.timedelta(days=days)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+
+def api_commit(sha, author, committed_at, additions, deletions=0):
+    """Commit no formato da listagem com with_stats, com o diff correspondente às contagens"""
+    diff = '@@ -1 +1 @@\n' + '\n'.join(['+x = 1'] * additions + ['-y = 2'] * deletions)
+    return {
+        'id': sha,
+        'short_id': sha[:8],
+        'title': f'Commit {sha}',
+        'message': f'Commit {sha}',
+        'author_name': author.title(),
+        'author_email': f'{author}@example.com',
+        'authored_date': committed_at.isoformat(),
+        'committed_date': committed_at.isoformat(),
+        'stats': {'additions': additions, 'deletions': deletions, 'total': additions + deletions},
+        'diff': [{'old_path': 'app.py', 'new_path': 'app.py', 'diff': diff}],
+    }
+
+
+class FakeCommitManager:
+    """project.commits com filtros since/until (datas ISO, inclusivos) como na API do GitLab"""
+
+    def __init__(self):
+        self.commits = {}
+        self.list_calls = []
+
+    def add(self, *commits):
+        for commit in commits:
+            self.commits[commit['id']] = commit
+
+    def list(self, since=None, until=None, **kwargs):
+        self.list_calls.append({'since': since, 'until': until, **kwargs})
+        since = datetime.datetime.fromisoformat(since) if since else None
+        until = datetime.datetime.fromisoformat(until) if until else None
+        listed = []
+        for commit in self.commits.values():
+            committed_at = datetime.datetime.fromisoformat(commit['committed_date'])
+            if (since is None or committed_at >= since) and (until is None or committed_at <= until):
+                listed.append(SimpleNamespace(**commit))
+        return sorted(listed, key=lambda commit: commit.committed_date, reverse=True)
+
+
+class FakeGitlabClient(CommitStatsMixin):
+    def __init__(self):
+        self.token = 'token'
+        self.url = 'https://gitlab.example.com/'
+        self.code_parser = CodeParser()
+        self.project = SimpleNamespace(
+            id=7, name='loja', path_with_namespace='equipe/loja', default_branch='main',
+            commits=FakeCommitManager(),
+        )
+
+    def get_project(self, project_id):
+        return self.project
+
+    def _get_main_branch(self, project):
+        return project.default_branch
+
+    def _fetch_commit_diffs(self, project, commit_ids, on_fetched=None):
+        return {sha: project.commits.commits[sha]['diff'] for sha in commit_ids}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CommitStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Locks de backfill de outros testes
+        self.client_fake = FakeGitlabClient()
+        self.commits = self.client_fake.project.commits
+        self.commits.add(
+            api_commit('a1', 'ana', days_ago(3, hour=9), 10, 2),
+            api_commit('a2', 'ana', days_ago(3, hour=15), 5),
+            api_commit('b1', 'bruno', days_ago(10), 7, 1),
+            api_commit('a3', 'ana', days_ago(40), 3),
+        )
+        self.scheduled = []
+        patcher = mock.patch.object(
+            commit_store, 'run_long_task', lambda func, *args: self.scheduled.append(args)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stats(self, since_days, until_days):
+        stats = commit_store.get_stored_developer_stats(
+            self.client_fake, 7, timezone.localdate() - datetime.timedelta(days=since_days),
+            timezone.localdate() - datetime.timedelta(days=until_days),
+        )
+        return {author['email']: author for author in stats}
+
+    def test_read_before_backfill_falls_back_and_schedules_backfill(self):
+        with self.assertRaises(commit_store.LocalStoreUnavailable):
+            self.stats(30, 0)
+
+        self.assertEqual(len(self.scheduled), 1)
+        self.assertFalse(Commit.objects.exists())
+
+    def test_backfill_rolls_up_daily_totals(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+
+        state = SyncState.objects.get(project_id=7, branch_name='main')
+        self.assertEqual(state.last_commit_sha, 'a2')
+        self.assertEqual(DailyAuthorStat.objects.get(author_email='ana@example.com', day=days_ago(3).date()).commits, 2)
+
+        stats = self.stats(30, 0)
+        self.assertEqual(set(stats), {'ana@example.com', 'bruno@example.com'})
+        ana = stats['ana@example.com']
+        self.assertEqual((ana['commits'], ana['additions'], ana['deletions']), (2, 15, 2))
+        self.assertEqual(ana['additions_code'], 15)
+        self.assertEqual(ana['branches']['main']['commits'], 2)
+        self.assertEqual(stats['bruno@example.com']['commits'], 1)
+
+    def test_since_and_until_are_inclusive_local_days(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+
+        self.assertEqual(set(self.stats(10, 3)), {'ana@example.com', 'bruno@example.com'})
+        self.assertEqual(self.stats(9, 4), {})
+        self.assertEqual(self.stats(45, 0)['ana@example.com']['commits'], 3)
+
+    def test_commit_table_matches_developer_stats(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+        since = timezone.localdate() - datetime.timedelta(days=45)
+        until = timezone.localdate()
+
+        table = commit_store.get_stored_commit_table(self.client_fake, 7, since, until)
+
+        by_email = {author['email']: author for author in table.aggregate()}
+        self.assertEqual(by_email, self.stats(45, 0))
+
+    def test_older_backfill_extends_history(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+        previous_history = SyncState.objects.get().history_since
+        old_history = PERFORMANCE_CONFIG['LOCAL_STORE_HISTORY_DAYS'] + 30
+        self.commits.add(api_commit('c1', 'carla', days_ago(old_history - 10), 4))
+
+        with self.assertRaises(commit_store.LocalStoreUnavailable):
+            self.stats(old_history, 0)
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(old_history))
+
+        # Só o trecho anterior ao histórico já coberto é listado
+        self.assertEqual(self.commits.list_calls[-1]['until'][:10], previous_history.isoformat())
+        self.assertEqual(SyncState.objects.get().history_since, days_ago(old_history).date())
+        self.assertEqual(self.stats(old_history, 0)['carla@example.com']['commits'], 1)
+
+    def test_sync_fetches_merged_commits_older_than_cursor(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+        state = SyncState.objects.get()
+        # Merge de uma MR: o commit da MR tem data anterior ao último commit sincronizado
+        self.commits.add(
+            api_commit('m1', 'bruno', days_ago(5), 6),
+            api_commit('merge', 'ana', days_ago(0, hour=1), 0),
+        )
+
+        commit_store.sync_project_commits(self.client_fake, 7, force=True)
+
+        overlap = datetime.timedelta(days=PERFORMANCE_CONFIG['LOCAL_STORE_SYNC_OVERLAP_DAYS'])
+        listed_since = datetime.datetime.fromisoformat(self.commits.list_calls[-1]['since'])
+        self.assertEqual(listed_since, state.last_committed_at - overlap)
+        self.assertTrue(Commit.objects.filter(sha='m1').exists())
+        bruno = self.stats(30, 0)['bruno@example.com']
+        self.assertEqual((bruno['commits'], bruno['additions']), (2, 13))
+
+    def test_repeated_sync_does_not_duplicate_commits(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+
+        commit_store.sync_project_commits(self.client_fake, 7, force=True)
+        commit_store.sync_project_commits(self.client_fake, 7, force=True)
+
+        self.assertEqual(Commit.objects.count(), 4)
+        self.assertEqual(self.stats(45, 0)['ana@example.com']['commits'], 3)
+
+    def test_sync_is_skipped_within_interval(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+        calls = len(self.commits.list_calls)
+
+        commit_store.sync_project_commits(self.client_fake, 7)
+
+        self.assertEqual(len(self.commits.list_calls), calls)
+
+    def test_stats_read_does_not_write(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.stats(30, 0)
+
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_project_metadata_change_is_saved(self):
+        commit_store.backfill_project_commits(self.client_fake, 7, since=days_ago(60))
+        self.client_fake.project.name = 'loja-nova'
+
+        self.stats(30, 0)
+
+        self.assertEqual(Project.objects.get(id=7).name, 'loja-nova')
@@ -0,0 +1,132 @@
+import datetime
+import random
+from collections import defaultdict
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from api.commit_stats import LINE_STAT_KEYS
+from api.commit_table import CommitTable
+
+AUTHORS = [('Ana', 'ana@example.com'), ('Bruno', 'bruno@example.com'), ('Carla', 'carla@example.com')]
+BRANCHES = ['main', 'develop', None]
+OFFSETS = ['Z', '+00:00', '-03:00', '+05:30', '.123-03:00']
+
+
+def dict_aggregate(rows):
+    """Agregação de referência com dicionários (um laço em Python por commit)"""
+    stats = defaultdict(lambda: {'commits': 0, **{key: 0 for key in LINE_STAT_KEYS}})
+    for commit, line_stats in rows:
+        author = stats[commit.author_email]
+        author['name'] = commit.author_name
+        author['email'] = commit.author_email
+        author['commits'] += 1
+        branch_name = getattr(commit, 'branch_name', None) or 'unknown'
+        branch = author.setdefault('branches', {}).setdefault(
+            branch_name, {'commits': 0, **{key: 0 for key in LINE_STAT_KEYS}},
+        )
+        branch['commits'] += 1
+        for key, value in zip(LINE_STAT_KEYS, line_stats):
+            author[key] += value
+            branch[key] += value
+    return list(stats.values())
+
+
+def local_day(commit):
+    value = datetime.datetime.fromisoformat(commit.committed_date.replace('Z', '+00:00'))
+    return timezone.localtime(value).date()
+
+
+def random_commits(count, seed=42):
+    generator = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    rows = []
+    for _ in range(count):
+        name, email = generator.choice(AUTHORS)
+        if generator.random() < 0.1:
+            name = name.upper()  # Nome alterado: vale o do último commit
+        moment = start + datetime.timedelta(minutes=generator.randrange(60 * 24 * 90))
+        offset = generator.choice(OFFSETS)
+        commit = SimpleNamespace(
+            author_name=name, author_email=email, branch_name=generator.choice(BRANCHES),
+            committed_date=moment.isoformat() + offset,
+        )
+        rows.append((commit, tuple(generator.randrange(50) for _ in LINE_STAT_KEYS)))
+    return rows
+
+
+def table_of(rows):
+    table = CommitTable()
+    for commit, line_stats in rows:
+        table.append(commit, line_stats)
+    return table
+
+
+@override_settings(TIME_ZONE='America/Sao_Paulo')
+class CommitTableTests(SimpleTestCase):
+    def test_aggregate_matches_dict_aggregation(self):
+        rows = random_commits(2000)
+
+        self.assertEqual(table_of(rows).aggregate(), dict_aggregate(rows))
+
+    def test_windows_match_dict_aggregation_by_local_day(self):
+        rows = random_commits(1000, seed=7)
+        windows = [
+            (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+            (datetime.date(2024, 1, 15), datetime.date(2024, 2, 15)),  # Sobreposta
+            (datetime.date(2024, 3, 1), datetime.date(2024, 3, 1)),
+            (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)),  # Vazia
+        ]
+
+        results = table_of(rows).aggregate_windows(windows)
+
+        for (start, end), result in zip(windows, results):
+            with self.subTest(start=start, end=end):
+                expected = dict_aggregate([row for row in rows if start <= local_day(row[0]) <= end])
+                self.assertEqual(result, expected)
+
+    def test_day_boundary_follows_local_time_zone(self):
+        # 01:30Z de 2 de março ainda é 1º de março em São Paulo (-03:00)
+        rows = [(SimpleNamespace(
+            author_name='Ana', author_email='ana@example.com', committed_date='2024-03-02T01:30:00Z',
+        ), (1,) * len(LINE_STAT_KEYS))]
+
+        first, second = table_of(rows).aggregate_windows([
+            (datetime.date(2024, 3, 1), datetime.date(2024, 3, 1)),
+            (datetime.date(2024, 3, 2), datetime.date(2024, 3, 2)),
+        ])
+
+        self.assertEqual(first[0]['commits'], 1)
+        self.assertEqual(second, [])
+
+    def test_daily_rows_match_individual_commits(self):
+        rows = random_commits(300, seed=3)
+        daily = defaultdict(lambda: [0, [0] * len(LINE_STAT_KEYS), ''])
+        for commit, line_stats in rows:
+            key = (commit.author_email, commit.branch_name or 'unknown', local_day(commit))
+            daily[key][0] += 1
+            daily[key][1] = [total + value for total, value in zip(daily[key][1], line_stats)]
+            daily[key][2] = commit.author_name
+
+        table = CommitTable()
+        for (email, branch_name, day), (commits, line_stats, name) in daily.items():
+            table.append_row(email, name, branch_name, day, line_stats, commits=commits)
+
+        by_email = {author['email']: author for author in table.aggregate()}
+        expected = {author['email']: author for author in dict_aggregate(rows)}
+        for email, author in expected.items():
+            with self.subTest(email=email):
+                # O nome depende da ordem das linhas diárias; totais e branches não
+                self.assertEqual({**by_email[email], 'name': None}, {**author, 'name': None})
+        window = (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+        self.assertEqual(
+            sum(author['commits'] for author in table.aggregate_windows([window])[0]),
+            sum(window[0] <= local_day(commit) <= window[1] for commit, _ in rows),
+        )
+
+    def test_empty_table(self):
+        table = CommitTable()
+
+        self.assertEqual(table.aggregate(), [])
+        self.assertEqual(table.aggregate_windows([(datetime.date(2024, 1, 1), datetime.date(2024, 1, 2))]), [[]])
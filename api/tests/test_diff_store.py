@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.diff_store import DiffStore
+
+SHA_A = 'a' * 40
+SHA_B = 'b' * 40
+SHA_C = 'c' * 40
+
+
+def diff_of(size):
+    """Diff com conteúdo pseudoaleatório (o gzip não consegue comprimir muito)"""
+    return [{'new_path': 'app.py', 'diff': os.urandom(size).hex()}]
+
+
+class DiffStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = DiffStore(self.directory, max_bytes=10 ** 6)
+
+    def stored_files(self, pattern='*'):
+        return sorted(path for path in self.directory.rglob(pattern) if path.is_file())
+
+    def disk_total(self):
+        return sum(path.stat().st_size for path in self.stored_files('*.json.gz'))
+
+    def test_set_and_get(self):
+        diff = [{'new_path': 'app.py', 'diff': '@@ -1 +1 @@\n-a\n+b'}]
+
+        self.store.set(7, SHA_A.upper(), diff)
+
+        self.assertEqual(self.store.get(7, SHA_A), diff)
+        self.assertIsNone(self.store.get(7, SHA_B))
+        self.assertIsNone(self.store.get(8, SHA_A))
+
+    def test_invalid_keys_are_ignored(self):
+        self.store.set(7, '../../etc/passwd', diff_of(10))
+        self.store.set('projeto', SHA_A, diff_of(10))
+
+        self.assertEqual(self.stored_files(), [])
+        self.assertIsNone(self.store.get(7, '../../etc/passwd'))
+
+    def test_overwrite_replaces_previous_size(self):
+        self.store.set(7, SHA_A, diff_of(100))
+        self.store.set(7, SHA_B, diff_of(100))
+
+        self.store.set(7, SHA_A, diff_of(1000))
+        self.store.set(7, SHA_A, diff_of(10))
+
+        self.assertEqual(self.store._total_bytes, self.disk_total())
+
+    def test_failed_write_removes_temporary_file(self):
+        self.store.set(7, SHA_A, diff_of(10))
+
+        with mock.patch('api.diff_store.os.replace', side_effect=OSError('disco cheio')):
+            self.store.set(7, SHA_B, diff_of(10))
+
+        self.assertEqual(self.stored_files('*.tmp'), [])
+        self.assertIsNone(self.store.get(7, SHA_B))
+        self.assertEqual(self.store._total_bytes, self.disk_total())
+
+    def test_least_recently_used_diffs_are_evicted(self):
+        for index, sha in enumerate((SHA_A, SHA_B)):
+            self.store.set(7, sha, diff_of(1000))
+            path = self.store._path(7, sha)
+            os.utime(path, (1000 + index, 1000 + index))
+        # A leitura atualiza o mtime: B passa a ser o menos usado
+        self.store.get(7, SHA_A)
+        # Cabem dois diffs (abaixo dos 90%), não três
+        self.store.max_bytes = self.disk_total() * 5 // 4
+
+        self.store.set(7, SHA_C, diff_of(1000))
+
+        self.assertIsNone(self.store.get(7, SHA_B))
+        self.assertIsNotNone(self.store.get(7, SHA_A))
+        self.assertIsNotNone(self.store.get(7, SHA_C))
+        self.assertLessEqual(self.store._total_bytes, self.store.max_bytes * 0.9)
+        self.assertEqual(self.store._total_bytes, self.disk_total())
@@ -0,0 +1,187 @@
+import fcntl
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api.commit_table import CommitTable
+from api.git_mirror import GitMirrorBackend, GitMirrorError
+from api.gitlab_client import GitlabClient
+from api.performance_config import PERFORMANCE_CONFIG
+
+APP_V1 = 'import os\n\n# Configuração\nDEBUG = True\nPORT = 8000\n'
+APP_V2 = 'import os\n\n# Configuração\nDEBUG = False\nPORT = 8000\n'
+
+
+class FixtureRepo:
+    """Repositório git local com commits de datas e autores fixos (sem rede)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir()
+        self.git('init', '--quiet', '--initial-branch=main')
+
+    def git(self, *args, date=None, author='Ana <ana@example.com>'):
+        name, email = author[:-1].split(' <')
+        env = {
+            **os.environ,
+            'GIT_AUTHOR_NAME': name, 'GIT_AUTHOR_EMAIL': email,
+            'GIT_COMMITTER_NAME': name, 'GIT_COMMITTER_EMAIL': email,
+            'GIT_CONFIG_GLOBAL': os.devnull, 'GIT_CONFIG_NOSYSTEM': '1',
+        }
+        if date:
+            env['GIT_AUTHOR_DATE'] = env['GIT_COMMITTER_DATE'] = date
+        return subprocess.run(
+            ['git', *args], cwd=self.path, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+
+    def commit(self, message, date, author='Ana <ana@example.com>', files=None, renames=None):
+        for old, new in (renames or {}).items():
+            self.git('mv', old, new)
+        for name, content in (files or {}).items():
+            mode = 'wb' if isinstance(content, bytes) else 'w'
+            with open(self.path / name, mode) as handle:
+                handle.write(content)
+            self.git('add', name)
+        self.git('commit', '--quiet', '-m', message, date=date, author=author)
+
+
+class GitMirrorTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.repo = FixtureRepo(directory / 'source')
+        self.repo.commit('Cria app', '2024-03-01T10:00:00-03:00', files={'app.py': APP_V1})
+        self.repo.commit(
+            'Desliga debug e adiciona logo', '2024-03-05T10:00:00-03:00', author='Bruno <bruno@example.com>',
+            files={'app.py': APP_V2, 'logo.png': b'\x89PNG\r\n\x1a\n\x00\x00\x00binario'},
+        )
+        self.repo.commit('Renomeia app', '2024-03-10T23:30:00-03:00', renames={'app.py': 'main.py'})
+        self.repo.commit(
+            'Adiciona rota', '2024-03-20T10:00:00-03:00',
+            files={'main.py': APP_V2 + 'ROUTE = "/"\nTIMEOUT = 30\n'},
+        )
+        self.mirrors_dir = directory / 'mirrors'
+        self.backend = GitMirrorBackend(base_dir=self.mirrors_dir, blobless=False)
+
+    def stats(self, since, until, patch=True):
+        with mock.patch.dict(PERFORMANCE_CONFIG, {'GIT_MIRROR_ANALYZE_PATCH': patch}):
+            stats = self.backend.get_developer_stats(7, str(self.repo.path), since, until)
+        return {author['email']: author for author in stats}
+
+
+class GitMirrorStatsTests(GitMirrorTestCase):
+    def test_patch_mode_classifies_lines(self):
+        stats = self.stats('2024-03-01', '2024-03-31')
+
+        ana, bruno = stats['ana@example.com'], stats['bruno@example.com']
+        self.assertEqual((ana['commits'], ana['additions'], ana['deletions']), (3, 7, 0))
+        self.assertEqual((ana['additions_code'], ana['additions_comments'], ana['additions_blank']), (5, 1, 1))
+        # O arquivo binário não tem linhas; só a troca de DEBUG conta
+        self.assertEqual((bruno['commits'], bruno['additions'], bruno['deletions']), (1, 1, 1))
+        self.assertEqual((bruno['additions_code'], bruno['deletions_code']), (1, 1))
+
+    def test_numstat_mode_reads_exact_totals(self):
+        stats = self.stats('2024-03-01', '2024-03-31', patch=False)
+
+        ana, bruno = stats['ana@example.com'], stats['bruno@example.com']
+        self.assertEqual((ana['commits'], ana['additions'], ana['deletions']), (3, 7, 0))
+        self.assertEqual((bruno['additions'], bruno['deletions']), (1, 1))
+        self.assertEqual(ana['additions_code'] + ana['additions_comments'] + ana['additions_blank'], 7)
+
+    def test_rename_counts_only_changed_lines(self):
+        path = self.backend.ensure_mirror(7, str(self.repo.path))
+
+        for patch in (True, False):
+            with self.subTest(patch=patch):
+                commits = {
+                    commit.title: line_stats
+                    for commit, line_stats in self.backend.iter_commits(path, '2024-03-10', '2024-03-10', patch=patch)
+                }
+                self.assertEqual(list(commits), ['Renomeia app'])
+                self.assertEqual(commits['Renomeia app'][:2], (0, 0))
+
+    def test_since_and_until_are_inclusive_local_days(self):
+        # O commit das 23:30 (-03:00) de 10/03 ainda é do dia 10 no fuso local
+        stats = self.stats('2024-03-05', '2024-03-10')
+
+        self.assertEqual(stats['ana@example.com']['commits'], 1)
+        self.assertEqual(stats['bruno@example.com']['commits'], 1)
+        self.assertEqual(self.stats('2024-03-11', '2024-03-19'), {})
+
+    def test_commit_table_reports_progress(self):
+        events = []
+
+        table = self.backend.get_commit_table(
+            7, str(self.repo.path), '2024-03-01', '2024-03-31',
+            progress=lambda stage, done, total, **details: events.append((stage, done, total)),
+        )
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(events[0], ('commits_listed', 4, 4))
+        self.assertEqual(events[-1], ('commits_processed', 4, 4))
+
+
+class GitMirrorUpdateTests(GitMirrorTestCase):
+    def test_fetch_respects_interval(self):
+        self.backend.ensure_mirror(7, str(self.repo.path))
+        self.repo.commit('Novo commit', '2024-03-25T10:00:00-03:00', files={'novo.py': 'x = 1\n'})
+
+        with mock.patch.dict(PERFORMANCE_CONFIG, {'GIT_MIRROR_FETCH_INTERVAL': 3600}):
+            self.assertNotIn('ana@example.com', self.stats('2024-03-25', '2024-03-25'))
+        with mock.patch.dict(PERFORMANCE_CONFIG, {'GIT_MIRROR_FETCH_INTERVAL': 0}):
+            self.assertEqual(self.stats('2024-03-25', '2024-03-25')['ana@example.com']['additions'], 1)
+
+    def test_failed_clone_leaves_no_mirror(self):
+        with self.assertRaises(GitMirrorError):
+            self.backend.ensure_mirror(8, str(self.repo.path.parent / 'inexistente'))
+
+        self.assertFalse(self.backend.mirror_path(8).exists())
+        self.assertEqual([path.name for path in self.mirrors_dir.iterdir()], ['8.lock'])
+
+    def test_mirror_waits_for_lock_held_by_another_process(self):
+        self.mirrors_dir.mkdir()
+        # flock é por descrição de arquivo aberto: outro open() se comporta como outro worker
+        holder = open(self.mirrors_dir / '7.lock', 'a')
+        self.addCleanup(holder.close)
+        fcntl.flock(holder, fcntl.LOCK_EX)
+        thread = threading.Thread(target=self.backend.ensure_mirror, args=(7, str(self.repo.path)))
+        thread.start()
+
+        thread.join(0.3)
+        self.assertTrue(thread.is_alive())
+        self.assertFalse(self.backend.mirror_path(7).exists())
+
+        fcntl.flock(holder, fcntl.LOCK_UN)
+        thread.join(30)
+        self.assertTrue(self.backend.mirror_path(7).exists())
+
+
+class GitMirrorFallbackTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.settings_override = override_settings(
+            GIT_MIRROR_DIR=directory, GIT_MIRROR_PROJECTS={7},
+            GIT_MIRROR_SOURCES={7: str(Path(directory) / 'inexistente')}, GIT_MIRROR_BLOBLESS=False,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = GitlabClient('token', url='http://127.0.0.1:9/')
+        self.addCleanup(self.client.close)
+
+    def test_clone_failure_falls_back_to_api(self):
+        api_table = CommitTable()
+        with mock.patch.dict(PERFORMANCE_CONFIG, {'USE_LOCAL_STORE': False}), \
+                mock.patch.object(GitlabClient, '_get_api_commit_table', return_value=api_table) as api:
+            table = self.client.get_commit_table(7, '2024-03-01', '2024-03-31')
+            stats = self.client.get_developer_stats(7, '2024-03-01', '2024-03-31')
+
+        self.assertIs(table, api_table)
+        self.assertEqual(stats, [])
+        self.assertEqual(api.call_count, 2)
@@ -0,0 +1,135 @@
+import copy
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.cache_manager import invalidate_project, local_cache
+from api.gitlab_client import GitlabClient
+
+
+def author(email, commits, additions, branches, name=None):
+    line_stats = {
+        'additions': additions, 'deletions': 1, 'additions_code': additions, 'deletions_code': 1,
+        'additions_comments': 0, 'deletions_comments': 0, 'additions_blank': 0, 'deletions_blank': 0,
+    }
+    return {
+        'name': name or email.split('@')[0].title(), 'email': email, 'commits': commits, **line_stats,
+        'branches': {branch: {'commits': count, 'additions': additions} for branch, count in branches.items()},
+    }
+
+
+PROJECT_STATS = {
+    7: [
+        author('ana@example.com', 3, 10, {'main': 2, 'develop': 1}),
+        author('bruno@example.com', 1, 4, {'main': 1}),
+    ],
+    8: [author('ana@example.com', 2, 5, {'main': 2}, name='Ana Souza')],
+    9: [author('carla@example.com', 4, 7, {'feature': 4})],
+}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProjectsDeveloperStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.gitlab = GitlabClient('token', url='http://127.0.0.1:9/')
+        self.addCleanup(self.gitlab.close)
+        self.stats = copy.deepcopy(PROJECT_STATS)
+        self.computed = []
+
+        def developer_stats(project_id, since=None, until=None):
+            self.computed.append(project_id)
+            if project_id not in self.stats:
+                raise Exception(f"Projeto {project_id} não encontrado")
+            return self.stats[project_id]
+
+        patcher = mock.patch.object(self.gitlab, 'get_developer_stats', side_effect=developer_stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def merged(self, project_ids, **kwargs):
+        stats = self.gitlab.get_projects_developer_stats(project_ids, '2024-01-01', '2024-01-31', **kwargs)
+        return {entry['email']: entry for entry in stats}
+
+    def test_authors_are_merged_by_email(self):
+        stats = self.merged([7, 8, 9])
+
+        self.assertEqual(set(stats), {'ana@example.com', 'bruno@example.com', 'carla@example.com'})
+        ana = stats['ana@example.com']
+        self.assertEqual((ana['commits'], ana['additions'], ana['deletions'], ana['additions_code']), (5, 15, 2, 15))
+        self.assertEqual(ana['branches'], {
+            'main': {'commits': 4, 'additions': 15},
+            'develop': {'commits': 1, 'additions': 10},
+        })
+        # Vale o nome do último projeto na ordem pedida
+        self.assertEqual(ana['name'], 'Ana Souza')
+        self.assertEqual(stats['bruno@example.com']['commits'], 1)
+
+    def test_inputs_are_not_modified(self):
+        self.merged([7, 8])
+        self.merged([7, 8])
+
+        self.assertEqual(self.stats, PROJECT_STATS)
+
+    def test_failed_project_is_skipped(self):
+        stats = self.merged([7, 404])
+
+        self.assertEqual(stats['ana@example.com']['commits'], 3)
+        self.assertEqual(sorted(self.computed), [7, 404])
+
+    def test_projects_are_cached_independently(self):
+        self.merged([7, 8, 9])
+        self.merged(['7', 8, 8, 9])
+        self.assertEqual(sorted(self.computed), [7, 8, 9])
+
+        invalidate_project(8)
+        self.stats[8] = [author('ana@example.com', 1, 1, {'main': 1})]
+        stats = self.merged([7, 8, 9])
+
+        self.assertEqual(sorted(self.computed), [7, 8, 8, 9])
+        self.assertEqual(stats['ana@example.com']['commits'], 4)
+
+    def test_progress_counts_projects(self):
+        events = []
+
+        self.merged([7, 8, 404], progress=lambda stage, done, total, **details: events.append((stage, done, total)))
+
+        self.assertEqual(sorted(events), [('projects_processed', done, 3) for done in (1, 2, 3)])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class GroupStatsViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.gitlab = mock.Mock()
+        self.gitlab.get_projects_developer_stats.return_value = PROJECT_STATS[7]
+        self.gitlab.get_group_project_ids.return_value = [7, 8]
+        patcher = mock.patch('api.views.get_gitlab_client', return_value=self.gitlab)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_group_uses_its_projects(self):
+        response = self.client.get('/api/gitlab/groups/3/stats/', {'since': '2024-01-01', 'until': '2024-01-31'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['email'] for entry in response.json()], ['ana@example.com', 'bruno@example.com'])
+        self.gitlab.get_group_project_ids.assert_called_once_with(3)
+        self.gitlab.get_projects_developer_stats.assert_called_once_with([7, 8], since='2024-01-01', until='2024-01-31')
+
+    def test_project_list(self):
+        with mock.patch('api.views.invalidate_project') as invalidate:
+            response = self.client.get('/api/gitlab/projects/stats/', {'project_ids': '7, 9', 'clear_cache': 'true'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.gitlab.get_projects_developer_stats.call_args.args[0], [7, 9])
+        self.assertEqual([call.args[0] for call in invalidate.call_args_list], [7, 9])
+
+    def test_invalid_project_list(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            for project_ids in ('7,abc', ''):
+                with self.subTest(project_ids=project_ids):
+                    response = self.client.get('/api/gitlab/projects/stats/', {'project_ids': project_ids})
+                    self.assertEqual(response.status_code, 400)
+        self.gitlab.get_projects_developer_stats.assert_not_called()
@@ -0,0 +1,80 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from api.http_cache import ConditionalCacheAdapter
+
+
+class StubGitlabHandler(BaseHTTPRequestHandler):
+    """Servidor GitLab mínimo: responde com ETag e 304 quando If-None-Match confere"""
+
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.server.seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ConditionalCacheAdapterTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitlabHandler)
+        self.server.seen = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api/v4"
+        self.session = requests.Session()
+        self.session.headers['PRIVATE-TOKEN'] = 'token'
+        self.session.mount('http://', ConditionalCacheAdapter(store=LocMemCache('http-cache-tests', {})))
+        self.addCleanup(self.session.close)
+
+    def get_twice(self, path):
+        first = self.session.get(self.base_url + path)
+        second = self.session.get(self.base_url + path)
+        return first, second, [validator for _, validator in self.server.seen]
+
+    def test_metadata_endpoint_is_revalidated(self):
+        first, second, validators = self.get_twice('/projects/42')
+
+        self.assertEqual(validators, [None, '"v1"'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+
+    def test_project_list_and_branches_are_revalidated(self):
+        for path in ('/projects?per_page=100', '/projects/42/repository/branches', '/groups/7/projects'):
+            self.server.seen.clear()
+            _, second, validators = self.get_twice(path)
+            self.assertEqual(validators, [None, '"v1"'], path)
+            self.assertEqual(second.status_code, 200)
+
+    def test_commit_listing_is_not_cached(self):
+        _, second, validators = self.get_twice('/projects/42/repository/commits?since=2024-01-01')
+
+        self.assertEqual(validators, [None, None])
+        self.assertEqual(second.json()['path'], '/api/v4/projects/42/repository/commits?since=2024-01-01')
+
+    def test_commit_diff_is_not_cached(self):
+        _, _, validators = self.get_twice('/projects/42/repository/commits/abc123/diff')
+
+        self.assertEqual(validators, [None, None])
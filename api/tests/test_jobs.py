@@ -0,0 +1,246 @@
+import contextlib
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import jobs
+from api.models import StatsJob
+from api.performance_config import PERFORMANCE_CONFIG
+
+STATS = [{
+    'name': 'Ana', 'email': 'ana@example.com', 'additions': 10, 'deletions': 2, 'commits': 3,
+    'branches': {'main': {'commits': 3}},
+}]
+
+
+class FakeExecutor:
+    """Guarda as tarefas enviadas; o teste decide quando executá-las"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, func, *args):
+        self.submitted.append((func, args))
+
+    def run_all(self):
+        while self.submitted:
+            func, args = self.submitted.pop(0)
+            func(*args)
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+        self.error = None
+
+    def get_developer_stats(self, project_id, since, until, progress, refresh):
+        self.calls.append({'project_id': project_id, 'since': since, 'until': until, 'refresh': refresh})
+        progress('commits_listed', 3, 3)
+        progress('diffs_fetched', 1, 3)
+        if self.error is not None:
+            raise self.error
+        return STATS
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class JobsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.executor = FakeExecutor()
+        self.client_fake = FakeClient()
+
+        @contextlib.contextmanager
+        def leased_client(token):
+            yield self.client_fake
+
+        for patcher in (
+            mock.patch.object(jobs, '_get_executor', return_value=self.executor),
+            mock.patch.object(jobs, 'leased_gitlab_client', leased_client),
+            mock.patch.dict(PERFORMANCE_CONFIG, {'JOB_PROGRESS_INTERVAL': 0}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def enqueue(self, token='token', force=False):
+        return jobs.enqueue_developer_stats(token, 7, '2024-01-01', '2024-12-31', force=force)
+
+    def reload(self, job):
+        return StatsJob.objects.get(id=job.id)
+
+
+class JobLifecycleTests(JobsTestCase):
+    def test_job_runs_to_completion(self):
+        job = self.enqueue()
+
+        self.assertEqual(job.status, StatsJob.STATUS_PENDING)
+        self.assertEqual(len(self.executor.submitted), 1)
+        self.assertNotIn('token', str(job.params))
+        self.executor.run_all()
+
+        job = self.reload(job)
+        self.assertEqual(job.status, StatsJob.STATUS_DONE)
+        self.assertEqual((job.progress, job.message), (1.0, ''))
+        self.assertEqual(job.result, STATS)
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.client_fake.calls, [
+            {'project_id': 7, 'since': '2024-01-01', 'until': '2024-12-31', 'refresh': False},
+        ])
+
+    def test_progress_is_weighted_by_stage(self):
+        recorder = jobs._ProgressRecorder(self.enqueue().id)
+
+        recorder('commits_listed', 3, 3)
+        self.assertAlmostEqual(StatsJob.objects.get().progress, 0.1)
+        recorder('diffs_fetched', 1, 2)
+        job = StatsJob.objects.get()
+        self.assertAlmostEqual(job.progress, 0.4)
+        self.assertEqual(job.message, 'diffs_fetched: 1/2')
+
+    def test_failure_is_recorded(self):
+        self.client_fake.error = RuntimeError('GitLab indisponível')
+        job = self.enqueue()
+
+        with self.assertLogs('api.jobs', 'ERROR'):
+            self.executor.run_all()
+
+        job = self.reload(job)
+        self.assertEqual(job.status, StatsJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'GitLab indisponível')
+        self.assertIsNotNone(job.finished_at)
+
+
+class JobDedupeTests(JobsTestCase):
+    def test_identical_active_request_reuses_job(self):
+        first = self.enqueue()
+        second = self.enqueue()
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(len(self.executor.submitted), 1)
+        # Outro token é outra requisição (o resultado depende das permissões)
+        self.assertNotEqual(self.enqueue(token='outro').id, first.id)
+
+    def test_constraint_allows_one_active_job_per_request(self):
+        job = self.enqueue()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StatsJob.objects.create(kind=job.kind, params=job.params, params_hash=job.params_hash)
+        # Jobs finalizados não entram na restrição
+        StatsJob.objects.create(
+            kind=job.kind, params=job.params, params_hash=job.params_hash, status=StatsJob.STATUS_DONE,
+        )
+
+    def test_job_finished_during_create_is_retried(self):
+        job = self.enqueue()
+        real_filter = StatsJob.objects.filter
+        finished = []
+
+        def finish_then_filter(*args, **kwargs):
+            # O job original termina entre a falha do create e a consulta dos ativos
+            if not finished:
+                finished.append(job.id)
+                real_filter(id=job.id).update(status=StatsJob.STATUS_FAILED, finished_at=timezone.now())
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(StatsJob.objects, 'filter', side_effect=finish_then_filter):
+            new_job, created = jobs._create_active_job(job.kind, job.params, job.params_hash)
+
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.id, job.id)
+
+    def test_recent_result_is_reused_unless_forced(self):
+        job = self.enqueue()
+        self.executor.run_all()
+
+        self.assertEqual(self.enqueue().id, job.id)
+        forced = self.enqueue(force=True)
+        self.assertNotEqual(forced.id, job.id)
+        self.executor.run_all()
+        self.assertTrue(self.client_fake.calls[-1]['refresh'])
+
+    def test_expired_or_undated_result_is_not_reused(self):
+        job = self.enqueue()
+        self.executor.run_all()
+        old = timezone.now() - datetime.timedelta(seconds=PERFORMANCE_CONFIG['JOB_RESULT_TTL'] + 1)
+        StatsJob.objects.filter(id=job.id).update(finished_at=old)
+
+        self.assertNotEqual(self.enqueue().id, job.id)
+        self.executor.run_all()
+
+        StatsJob.objects.update(finished_at=None)
+        self.assertEqual(StatsJob.objects.filter(status=StatsJob.STATUS_DONE).count(), 2)
+        self.assertEqual(self.enqueue().status, StatsJob.STATUS_PENDING)
+
+
+class StaleJobTests(JobsTestCase):
+    def make_stale(self, job):
+        old = timezone.now() - datetime.timedelta(seconds=PERFORMANCE_CONFIG['JOB_STALE_AFTER'] + 1)
+        StatsJob.objects.filter(id=job.id).update(created_at=old)
+
+    def test_stale_job_is_taken_over(self):
+        stale = self.enqueue()
+        self.make_stale(stale)
+
+        job = self.enqueue()
+
+        self.assertNotEqual(job.id, stale.id)
+        stale = self.reload(stale)
+        self.assertEqual(stale.status, StatsJob.STATUS_FAILED)
+        self.assertEqual(stale.error, 'O job foi interrompido antes de terminar.')
+        self.assertEqual(len(self.executor.submitted), 2)
+
+    def test_get_job_marks_stale_job_as_failed(self):
+        job = self.enqueue()
+        self.assertEqual(jobs.get_job(job.id).status, StatsJob.STATUS_PENDING)
+        self.make_stale(job)
+
+        self.assertEqual(jobs.get_job(job.id).status, StatsJob.STATUS_FAILED)
+        self.assertIsNone(jobs.get_job('não é uuid'))
+
+
+class JobViewsTests(JobsTestCase):
+    stats_url = '/api/gitlab/projects/7/stats/'
+
+    def start_job(self):
+        response = self.client.get(self.stats_url, {'since': '2024-01-01', 'until': '2024-12-31', 'async': 'true'})
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def test_async_request_returns_job_links(self):
+        body = self.start_job()
+
+        self.assertEqual(body['status'], StatsJob.STATUS_PENDING)
+        self.assertTrue(body['status_url'].endswith(f"/api/jobs/{body['job_id']}/"))
+        self.assertTrue(body['result_url'].endswith(f"/api/jobs/{body['job_id']}/result/"))
+        self.assertEqual(self.start_job()['job_id'], body['job_id'])
+
+    def test_result_is_pending_then_done(self):
+        body = self.start_job()
+        result_url = f"/api/jobs/{body['job_id']}/result/"
+
+        self.assertEqual(self.client.get(result_url).status_code, 202)
+        self.executor.run_all()
+
+        response = self.client.get(result_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), STATS)
+        status_body = self.client.get(f"/api/jobs/{body['job_id']}/").json()
+        self.assertEqual((status_body['status'], status_body['progress']), (StatsJob.STATUS_DONE, 1.0))
+
+    def test_failed_and_unknown_jobs(self):
+        self.client_fake.error = RuntimeError('GitLab indisponível')
+        body = self.start_job()
+        with self.assertLogs('api.jobs', 'ERROR'):
+            self.executor.run_all()
+
+        missing = '00000000-0000-0000-0000-000000000000'
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.get(f"/api/jobs/{body['job_id']}/result/")
+            missing_response = self.client.get(f'/api/jobs/{missing}/result/')
+
+        self.assertEqual((response.status_code, response.json()), (400, {'detail': 'GitLab indisponível'}))
+        self.assertEqual(missing_response.status_code, 404)
@@ -0,0 +1,163 @@
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from api.performance_config import PERFORMANCE_CONFIG
+from api.rate_limiter import AdaptiveConcurrencyLimiter, RateLimitedAdapter
+
+
+class AdaptiveConcurrencyLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=10, latency_threshold=2.0)
+
+    def pause_left(self):
+        return self.limiter.paused_until - time.monotonic()
+
+    def test_healthy_responses_grow_limit_additively(self):
+        for _ in range(4):
+            self.limiter.record(200, latency=0.1)
+
+        self.assertAlmostEqual(self.limiter.limit, 5.0, delta=0.1)
+        for _ in range(100):
+            self.limiter.record(200, latency=0.1)
+        self.assertEqual(self.limiter.limit, 10.0)
+
+    def test_errors_halve_limit_down_to_minimum(self):
+        for status_code in (500, 503, None):
+            with self.subTest(status_code=status_code):
+                self.limiter.limit = 8.0
+                self.limiter.record(status_code)
+                self.assertEqual(self.limiter.limit, 4.0)
+
+        for _ in range(5):
+            self.limiter.record(502)
+        self.assertEqual(self.limiter.limit, 1.0)
+        self.assertLessEqual(self.pause_left(), 0)
+
+    def test_429_halves_and_pauses_for_retry_after(self):
+        self.limiter.record(429, {'Retry-After': '3'})
+
+        self.assertEqual(self.limiter.limit, 2.0)
+        self.assertAlmostEqual(self.pause_left(), 3, delta=0.2)
+
+    def test_retry_after_as_http_date(self):
+        self.limiter.record(429, {'Retry-After': formatdate(time.time() + 5, usegmt=True)})
+
+        self.assertAlmostEqual(self.pause_left(), 5, delta=1.1)
+
+    def test_pause_uses_reset_header_and_is_capped(self):
+        with mock.patch.dict(PERFORMANCE_CONFIG, {'RATE_LIMIT_MAX_PAUSE': 10}):
+            self.limiter.record(429, {'RateLimit-Reset': str(int(time.time()) + 3600)})
+
+        self.assertAlmostEqual(self.pause_left(), 10, delta=0.2)
+
+    def test_429_without_headers_pauses_one_second(self):
+        self.limiter.record(429)
+
+        self.assertAlmostEqual(self.pause_left(), 1, delta=0.2)
+
+    def test_exhausted_quota_pauses_until_reset(self):
+        self.limiter.in_flight = 2
+        self.limiter.record(200, {'RateLimit-Remaining': '1', 'RateLimit-Reset': str(int(time.time()) + 2)})
+
+        self.assertEqual(self.limiter.limit, 4.0)
+        self.assertGreater(self.pause_left(), 0.5)
+
+    def test_low_quota_or_slow_server_stop_growth(self):
+        self.limiter.record(200, {'RateLimit-Remaining': '50', 'RateLimit-Limit': '1000'}, latency=0.1)
+        self.limiter.record(200, latency=10)
+
+        self.assertEqual(self.limiter.limit, 4.0)
+        self.assertEqual(self.limiter.remaining, 50)
+
+    def test_slot_waits_for_pause(self):
+        self.limiter.record(429, {'Retry-After': '0.2'})
+
+        started = time.monotonic()
+        with self.limiter.slot():
+            pass
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_concurrent_slots_respect_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial=3, minimum=1, maximum=3)
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            with limiter.slot():
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=request) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+class StubGitlabHandler(BaseHTTPRequestHandler):
+    """Responde 429 com Retry-After na primeira requisição e 200 nas seguintes"""
+
+    def do_GET(self):
+        self.server.seen.append(time.monotonic())
+        if len(self.server.seen) == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.3')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RateLimitedAdapterTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitlabHandler)
+        self.server.seen = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=10)
+        self.session = requests.Session()
+        self.session.mount('http://', RateLimitedAdapter(limiter=self.limiter))
+        self.addCleanup(self.session.close)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v4/projects"
+
+    def test_429_backs_off_next_request(self):
+        self.assertEqual(self.session.get(self.url).status_code, 429)
+        self.assertEqual(self.limiter.limit, 2.0)
+
+        self.assertEqual(self.session.get(self.url).status_code, 200)
+
+        first, second = self.server.seen
+        self.assertGreaterEqual(second - first, 0.25)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_connection_error_is_recorded(self):
+        self.server.server_close()
+        self.server.shutdown()
+
+        with self.assertRaises(requests.ConnectionError):
+            self.session.get(self.url)
+
+        self.assertEqual(self.limiter.limit, 2.0)
+        self.assertEqual(self.limiter.in_flight, 0)
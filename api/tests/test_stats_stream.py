@@ -0,0 +1,105 @@
+import contextlib
+import json
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api import stats_stream
+
+ANA = {
+    'name': 'Ana', 'email': 'ana@example.com', 'additions': 10, 'deletions': 2, 'commits': 3,
+    'branches': {'main': {'commits': 3}},
+}
+
+
+class FakeClient:
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def get_developer_stats(self, project_id, since, until, progress):
+        progress('commits_listed', 2, 2)
+        self.release.wait(5)
+        progress('commits_processed', 2, 2, table=SimpleNamespace(aggregate=lambda: [ANA]))
+        if self.error is not None:
+            raise self.error
+        return [ANA]
+
+
+def parse_events(chunks):
+    """Separa o fluxo em eventos SSE: (event, data) ou ('comment', texto)"""
+    text = ''.join(chunks)
+    assert text.endswith('\n\n'), text
+    events = []
+    for block in text[:-2].split('\n\n'):
+        if block.startswith(':'):
+            events.append(('comment', block[1:].strip()))
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        assert set(fields) == {'event', 'data'}, block
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class StreamTestMixin:
+    def setUp(self):
+        self.client_fake = FakeClient()
+
+        @contextlib.contextmanager
+        def leased_client(token):
+            yield self.client_fake
+
+        patcher = mock.patch.object(stats_stream, 'leased_gitlab_client', leased_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class StreamDeveloperStatsTests(StreamTestMixin, SimpleTestCase):
+    def stream(self):
+        return list(stats_stream.stream_developer_stats('token', 7, '2024-01-01', '2024-01-31'))
+
+    def test_events_are_framed_in_order(self):
+        chunks = self.stream()
+
+        self.assertTrue(all(chunk.endswith('\n\n') for chunk in chunks))
+        self.assertEqual(parse_events(chunks), [
+            ('start', {'project_id': 7, 'since': '2024-01-01', 'until': '2024-01-31'}),
+            ('progress', {'stage': 'commits_listed', 'done': 2, 'total': 2}),
+            ('progress', {'stage': 'commits_processed', 'done': 2, 'total': 2, 'partial': [ANA]}),
+            ('result', [ANA]),
+        ])
+
+    def test_error_event(self):
+        self.client_fake.error = RuntimeError('GitLab indisponível')
+
+        self.assertEqual(parse_events(self.stream())[-1], ('error', {'detail': 'GitLab indisponível'}))
+
+    def test_keep_alive_while_waiting(self):
+        self.client_fake.release.clear()
+        threading.Timer(0.2, self.client_fake.release.set).start()
+
+        with mock.patch.object(stats_stream, 'HEARTBEAT_INTERVAL', 0.05):
+            events = parse_events(self.stream())
+
+        self.assertIn(('comment', 'keep-alive'), events)
+        self.assertEqual(events[-1], ('result', [ANA]))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class StreamViewTests(StreamTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_response_is_event_stream(self):
+        response = self.client.get('/api/gitlab/projects/7/stats/stream/', {'since': '2024-01-01', 'until': '2024-01-31'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        chunks = [chunk.decode('utf-8') for chunk in response.streaming_content]
+        self.assertEqual([event for event, _ in parse_events(chunks)], ['start', 'progress', 'progress', 'result'])
@@ -0,0 +1,103 @@
+import datetime
+from unittest import mock
+
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+
+from api.commit_table import period_windows
+from api.performance_config import PERFORMANCE_CONFIG
+from api.views import get_stats_windows
+
+date = datetime.date
+
+
+class PeriodWindowsTests(SimpleTestCase):
+    def test_month_windows_are_clipped_to_period(self):
+        self.assertEqual(period_windows(date(2024, 1, 15), date(2024, 3, 10), 'month'), [
+            (date(2024, 1, 15), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 3, 1), date(2024, 3, 10)),
+        ])
+
+    def test_week_windows_start_on_monday(self):
+        # 2024-03-06 é uma quarta-feira
+        self.assertEqual(period_windows(date(2024, 3, 6), date(2024, 3, 18), 'week'), [
+            (date(2024, 3, 6), date(2024, 3, 10)),
+            (date(2024, 3, 11), date(2024, 3, 17)),
+            (date(2024, 3, 18), date(2024, 3, 18)),
+        ])
+
+    def test_single_day_and_empty_period(self):
+        day = date(2024, 3, 6)
+
+        for granularity in ('day', 'week', 'month'):
+            with self.subTest(granularity=granularity):
+                self.assertEqual(period_windows(day, day, granularity), [(day, day)])
+                self.assertEqual(period_windows(day, day - datetime.timedelta(days=1), granularity), [])
+
+    def test_last_window_before_max_date(self):
+        self.assertEqual(
+            period_windows(date(9999, 12, 1), date.max, 'month'), [(date(9999, 12, 1), date.max)],
+        )
+        self.assertEqual(period_windows(date.max, date.max, 'week'), [(date.max, date.max)])
+
+    def test_limit_stops_after_one_extra_window(self):
+        windows = period_windows(date.min, date.max, 'day', limit=10)
+
+        self.assertEqual(len(windows), 11)
+        self.assertEqual(windows[-1], (date(1, 1, 11), date(1, 1, 11)))
+
+    def test_invalid_granularity(self):
+        with self.assertRaises(ValueError):
+            period_windows(date(2024, 1, 1), date(2024, 1, 2), 'year')
+
+
+class GetStatsWindowsTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(PERFORMANCE_CONFIG, {'MAX_STATS_WINDOWS': 3})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def windows(self, query):
+        return get_stats_windows(QueryDict(query))
+
+    def test_period_at_limit(self):
+        self.assertEqual(len(self.windows('since=2024-01-01&until=2024-03-31')), 3)
+
+        with self.assertRaisesMessage(ValueError, 'Máximo de 3 janelas'):
+            self.windows('since=2024-01-01&until=2024-04-01')
+
+    def test_huge_period_is_rejected_without_listing_every_window(self):
+        with mock.patch('api.views.period_windows', wraps=period_windows) as windows:
+            with self.assertRaisesMessage(ValueError, 'Máximo de 3 janelas'):
+                self.windows('since=1900-01-01&until=9999-12-31&granularity=day')
+
+        self.assertEqual(windows.call_args.kwargs['limit'], 3)
+
+    def test_explicit_windows(self):
+        self.assertEqual(self.windows('windows=2024-01-01:2024-01-31,2024-02-10'), [
+            (date(2024, 1, 1), date(2024, 1, 31)),
+            (date(2024, 2, 10), date(2024, 2, 10)),
+        ])
+
+    def test_explicit_windows_over_limit_or_invalid(self):
+        for query in (
+            'windows=2024-01-01,2024-01-02,2024-01-03,2024-01-04',
+            'windows=2024-02-01:2024-01-01',
+            'windows=ontem',
+        ):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                self.windows(query)
+
+
+class StatsWindowsViewTests(TestCase):
+    def test_too_many_windows_is_bad_request(self):
+        with mock.patch('api.views.get_gitlab_client') as get_client:
+            response = self.client.get(
+                '/api/gitlab/projects/7/stats/windows/',
+                {'since': '2000-01-01', 'until': '2024-12-31', 'granularity': 'day'},
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('janelas', response.json()['detail'])
+        get_client.assert_not_called()
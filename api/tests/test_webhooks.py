@@ -0,0 +1,199 @@
+import datetime
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.code_parser import CodeParser
+from api.commit_stats import CommitStatsMixin
+from api.models import Commit, DailyAuthorStat, Project, SyncState
+from api.performance_config import PERFORMANCE_CONFIG
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+WEBHOOK_SECRET = 'segredo-do-webhook'
+
+
+def load_fixture(name):
+    with open(FIXTURES / name, encoding='utf-8') as fixture:
+        return json.load(fixture)
+
+
+class FakeCommitManager:
+    """project.commits do python-gitlab, respondendo com os commits gravados em api_commits.json"""
+
+    def __init__(self, commits):
+        self.commits = commits
+        self.get_calls = []
+        self.list_calls = []
+
+    def get(self, sha, **kwargs):
+        self.get_calls.append(sha)
+        return SimpleNamespace(**self.commits[sha])
+
+    def list(self, **kwargs):
+        self.list_calls.append(kwargs)
+        return [SimpleNamespace(**commit) for commit in self.commits.values()]
+
+
+class FakeGitlabClient(CommitStatsMixin):
+    """GitlabClient com o projeto 101 e os commits das fixtures, sem acesso à rede"""
+
+    def __init__(self):
+        self.token = 'token'
+        self.url = 'https://gitlab.example.com/'
+        self.code_parser = CodeParser()
+        self.api_commits = load_fixture('api_commits.json')
+        self.project = SimpleNamespace(
+            id=101, name='metrics', path_with_namespace='equipe/metrics', default_branch='main',
+            commits=FakeCommitManager(self.api_commits),
+        )
+
+    def get_project(self, project_id):
+        return self.project
+
+    def _get_main_branch(self, project):
+        return project.default_branch
+
+    def _fetch_commit_diffs(self, project, commit_ids, on_fetched=None):
+        return {sha: self.api_commits[sha]['diff'] for sha in commit_ids}
+
+
+@override_settings(
+    GITLAB_WEBHOOK_SECRET=WEBHOOK_SECRET,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class PushWebhookTests(TestCase):
+    def setUp(self):
+        self.client_fake = FakeGitlabClient()
+
+        @contextmanager
+        def leased_client(token, url=None):
+            yield self.client_fake
+
+        # Executa o processamento do push na própria requisição, com o cliente falso
+        patches = [
+            mock.patch('api.webhooks.leased_gitlab_client', leased_client),
+            mock.patch('api.webhooks.run_in_background', lambda func, *args, **kwargs: func(*args, **kwargs)),
+            mock.patch.dict('api.webhooks.PERFORMANCE_CONFIG', {'USE_LOCAL_STORE': True}),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post_push(self, payload, token=WEBHOOK_SECRET):
+        headers = {'HTTP_X_GITLAB_TOKEN': token} if token is not None else {}
+        return self.client.post(
+            reverse('gitlab-webhook'), data=json.dumps(payload), content_type='application/json', **headers
+        )
+
+    def test_push_to_default_branch_stores_commits_and_daily_totals(self):
+        response = self.post_push(load_fixture('push_main.json'))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'status': 'queued', 'commits': 2})
+        self.assertEqual(
+            self.client_fake.project.commits.get_calls,
+            ['b6568db1bc1dcd7f8b4d5a946b0b91f9dacd7327', 'da1560886d4f094c3e6c9ef40349f7d38b5d27d7'],
+        )
+        self.assertEqual(Commit.objects.filter(project_id=101, branch_name='main').count(), 2)
+        self.assertFalse(Commit.objects.filter(file_stats_synced=False).exists())
+
+        state = SyncState.objects.get(project_id=101, branch_name='main')
+        self.assertEqual(state.last_commit_sha, 'da1560886d4f094c3e6c9ef40349f7d38b5d27d7')
+
+        daily = DailyAuthorStat.objects.get(project_id=101, branch_name='main')
+        self.assertEqual(daily.day, datetime.date(2024, 5, 6))
+        self.assertEqual(daily.author_email, 'maria@example.com')
+        self.assertEqual(daily.commits, 2)
+        self.assertEqual((daily.additions, daily.deletions), (8, 1))
+
+    def test_repeated_push_does_not_fetch_known_commits_again(self):
+        self.post_push(load_fixture('push_main.json'))
+        self.client_fake.project.commits.get_calls.clear()
+
+        self.post_push(load_fixture('push_main.json'))
+
+        self.assertEqual(self.client_fake.project.commits.get_calls, [])
+        self.assertEqual(Commit.objects.count(), 2)
+        self.assertEqual(DailyAuthorStat.objects.get().commits, 2)
+
+    def test_truncated_push_falls_back_to_forced_incremental_sync(self):
+        project = Project.objects.create(id=101, name='metrics', default_branch='main')
+        last_committed_at = timezone.make_aware(datetime.datetime(2024, 5, 1, 9, 0))
+        SyncState.objects.create(
+            project=project, branch_name='main', history_since=datetime.date(2024, 1, 1),
+            last_committed_at=last_committed_at, synced_at=timezone.now(),
+        )
+
+        response = self.post_push(load_fixture('push_truncated.json'))
+
+        self.assertEqual(response.status_code, 202)
+        commits = self.client_fake.project.commits
+        # Sincronizado há pouco: só o force=True faz a listagem acontecer
+        self.assertEqual(len(commits.list_calls), 1)
+        self.assertEqual(commits.list_calls[0]['ref_name'], 'main')
+        overlap = datetime.timedelta(days=PERFORMANCE_CONFIG['LOCAL_STORE_SYNC_OVERLAP_DAYS'])
+        self.assertEqual(datetime.datetime.fromisoformat(commits.list_calls[0]['since']), last_committed_at - overlap)
+        self.assertEqual(commits.get_calls, [])
+        self.assertEqual(Commit.objects.filter(project=project).count(), 2)
+        self.assertEqual(DailyAuthorStat.objects.get().commits, 2)
+
+    def test_push_to_untracked_branch_is_not_stored(self):
+        response = self.post_push(load_fixture('push_untracked_branch.json'))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client_fake.project.commits.get_calls, [])
+        self.assertFalse(Commit.objects.exists())
+        self.assertFalse(SyncState.objects.filter(branch_name='feature/relatorios').exists())
+
+    def test_truncated_push_to_untracked_branch_is_not_synced(self):
+        payload = load_fixture('push_untracked_branch.json')
+        payload['total_commits_count'] = 23
+
+        response = self.post_push(payload)
+
+        self.assertEqual(response.status_code, 202)
+        commits = self.client_fake.project.commits
+        self.assertEqual(commits.list_calls, [])
+        self.assertEqual(commits.get_calls, [])
+        self.assertFalse(Commit.objects.exists())
+        self.assertFalse(SyncState.objects.filter(branch_name='feature/relatorios').exists())
+
+    def test_push_to_tracked_feature_branch_is_stored(self):
+        project = Project.objects.create(id=101, name='metrics', default_branch='main')
+        SyncState.objects.create(project=project, branch_name='feature/relatorios')
+
+        response = self.post_push(load_fixture('push_untracked_branch.json'))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Commit.objects.filter(branch_name='feature/relatorios').count(), 2)
+
+    def test_push_with_wrong_or_missing_token_is_rejected(self):
+        for token in ('outro-segredo', '', None):
+            with self.subTest(token=token):
+                response = self.post_push(load_fixture('push_main.json'), token=token)
+                self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(self.client_fake.project.commits.get_calls, [])
+        self.assertFalse(Commit.objects.exists())
+
+    @override_settings(GITLAB_WEBHOOK_SECRET='')
+    def test_endpoint_is_disabled_without_configured_secret(self):
+        response = self.post_push(load_fixture('push_main.json'), token='')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Commit.objects.exists())
+
+    def test_tag_push_is_ignored(self):
+        payload = load_fixture('push_main.json')
+        payload['ref'] = 'refs/tags/v1.0.0'
+
+        response = self.post_push(payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ignored'})
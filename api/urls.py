@@ -5,14 +5,29 @@ from .views import (
     GitlabProjectDetailView,
     GitlabProjectCommitsView,
     GitlabDeveloperStatsView,
+    GitlabMultiProjectStatsView,
+    GitlabDeveloperStatsWindowsView,
     HealthCheckView,
+    GitlabWebhookView,
+    JobStatusView,
+    JobResultView,
+    developer_stats_async,
+    developer_stats_stream,
 )
 
 urlpatterns = [
     path('health/', HealthCheckView.as_view(), name='health-check'),
     path('gitlab/token/', GitlabTokenView.as_view(), name='gitlab-token'),
     path('gitlab/projects/', GitlabProjectsView.as_view(), name='gitlab-projects'),
+    path('gitlab/projects/stats/', GitlabMultiProjectStatsView.as_view(), name='gitlab-projects-stats'),
+    path('gitlab/groups/<int:group_id>/stats/', GitlabMultiProjectStatsView.as_view(), name='gitlab-group-stats'),
     path('gitlab/projects/<int:project_id>/', GitlabProjectDetailView.as_view(), name='gitlab-project-detail'),
     path('gitlab/projects/<int:project_id>/commits/', GitlabProjectCommitsView.as_view(), name='gitlab-project-commits'),
     path('gitlab/projects/<int:project_id>/stats/', GitlabDeveloperStatsView.as_view(), name='gitlab-developer-stats'),
+    path('gitlab/projects/<int:project_id>/stats/windows/', GitlabDeveloperStatsWindowsView.as_view(), name='gitlab-developer-stats-windows'),
+    path('gitlab/projects/<int:project_id>/stats/stream/', developer_stats_stream, name='gitlab-developer-stats-stream'),
+    path('gitlab/projects/<int:project_id>/stats/async/', developer_stats_async, name='gitlab-developer-stats-async'),
+    path('gitlab/webhook/', GitlabWebhookView.as_view(), name='gitlab-webhook'),
+    path('jobs/<uuid:job_id>/', JobStatusView.as_view(), name='job-status'),
+    path('jobs/<uuid:job_id>/result/', JobResultView.as_view(), name='job-result'),
 ]
@@ -5,14 +5,24 @@ from rest_framework.permissions import AllowAny
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from asgiref.sync import sync_to_async
 from .serializers import (
     GitlabTokenSerializer,
     GitlabProjectSerializer,
     GitlabCommitSerializer,
     DeveloperStatSerializer
 )
-from .gitlab_client import GitlabClient
+from .cache_manager import invalidate_project
+from .client_pool import get_gitlab_client
+from .commit_table import period_windows
+from .jobs import enqueue_developer_stats, get_job
+from .models import StatsJob
+from .performance_config import PERFORMANCE_CONFIG
+from .stats_stream import stream_developer_stats
+from .webhooks import handle_push_event, verify_token
+from .async_gitlab_client import AsyncGitlabClient
 
 class GitlabTokenView(APIView):
     permission_classes = [AllowAny]
@@ -27,7 +37,7 @@ class GitlabTokenView(APIView):
         
         try:
             # Testa a conexão com o GitLab usando o token fixo
-            client = GitlabClient(token)
+            client = get_gitlab_client(token)
             client.get_projects()
             
             # Armazena o token na sessão
@@ -51,7 +61,7 @@ class GitlabProjectsView(APIView):
         search_query = request.query_params.get('search', '').lower()
         
         try:
-            client = GitlabClient(token)
+            client = get_gitlab_client(token)
             projects = client.get_projects()
             
             # Serializa apenas os campos que queremos
@@ -100,7 +110,7 @@ class GitlabProjectDetailView(APIView):
         token = request.session.get('gitlab_token', settings.GITLAB_TOKEN)
         
         try:
-            client = GitlabClient(token)
+            client = get_gitlab_client(token)
             project = client.get_project(project_id)
             
             # Serializa apenas os campos que queremos
@@ -159,7 +169,7 @@ class GitlabProjectCommitsView(APIView):
 
         
         try:
-            client = GitlabClient(token)
+            client = get_gitlab_client(token)
             
             # Se há limite pequeno (para cards), usar método otimizado
             if limit and int(limit) <= 10:
@@ -171,27 +181,51 @@ class GitlabProjectCommitsView(APIView):
                 commits = client.get_project_commits(project_id, since=since, until=until, limit=limit)
                 
                 # Serializa apenas os campos que queremos
-                serialized_commits = []
-                for commit in commits:
-                    commit_data = {
-                        'id': commit.id,
-                        'short_id': commit.short_id,
-                        'title': commit.title,
-                        'author_name': commit.author_name,
-                        'author_email': commit.author_email,
-                        'authored_date': commit.authored_date,
-                        'created_at': getattr(commit, 'created_at', commit.authored_date),  # Usar created_at se disponível, senão authored_date
-                        'message': commit.message,
-                        'ref_name': getattr(commit, 'ref_name', None),
-                        'branch_name': getattr(commit, 'branch_name', None)
-                    }
-                    serialized_commits.append(commit_data)
+                serialized_commits = [commit.to_dict() for commit in commits]
                 
                 serializer = GitlabCommitSerializer(serialized_commits, many=True)
                 return Response(serializer.data)
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def get_stats_date_range(params):
+    """
+    Extrai o período (since, until) dos parâmetros da requisição.
+    Aceita since/until ou start_date/end_date; padrão é o último mês.
+    """
+    since = params.get('since')
+    until = params.get('until')
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    
+    # Usar since/until se fornecidos, caso contrário usar start_date/end_date
+    if not since and start_date:
+        since = start_date
+    if not until and end_date:
+        until = end_date
+    
+    # Se não especificado, usa o último mês
+    if not since:
+        since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    if not until:
+        until = datetime.now().strftime('%Y-%m-%d')
+    
+    # Garantir que as datas estão no formato correto
+    try:
+        if since and isinstance(since, str):
+            since_date = datetime.strptime(since, '%Y-%m-%d')
+            since = since_date.strftime('%Y-%m-%d')
+        
+        if until and isinstance(until, str):
+            until_date = datetime.strptime(until, '%Y-%m-%d')
+            until = until_date.strftime('%Y-%m-%d')
+    except ValueError:
+        # Usar datas padrão em caso de erro
+        since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        until = datetime.now().strftime('%Y-%m-%d')
+    
+    return since, until
+
 class GitlabDeveloperStatsView(APIView):
     """
     Busca as estatísticas de desenvolvimento por autor
@@ -203,60 +237,65 @@ class GitlabDeveloperStatsView(APIView):
         token = request.session.get('gitlab_token', settings.GITLAB_TOKEN)
         
         # Obter parâmetros de data (aceita tanto start_date/end_date quanto since/until)
-        since = request.query_params.get('since')
-        until = request.query_params.get('until')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
+        since, until = get_stats_date_range(request.query_params)
         
         # Verificar se deve limpar cache
         clear_cache = request.query_params.get('clear_cache', 'false').lower() == 'true'
         
-        # Usar since/until se fornecidos, caso contrário usar start_date/end_date
-        if not since and start_date:
-            since = start_date
-        if not until and end_date:
-            until = end_date
+        # Limpar cache se solicitado: todas as chaves do projeto (commits, projeto, ...)
+        # e, com o banco local, sincronizar os commits novos antes de responder
+        if clear_cache:
+            invalidate_project(project_id)
         
-        # Se não especificado, usa o último mês
-        if not since:
-            since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        if not until:
-            until = datetime.now().strftime('%Y-%m-%d')
+        # Períodos longos: calcular em segundo plano e responder com o job
+        if request.query_params.get('async', 'false').lower() == 'true':
+            job = enqueue_developer_stats(token, project_id, since, until, force=clear_cache)
+            return Response(serialize_job(request, job), status=status.HTTP_202_ACCEPTED)
         
-        # Garantir que as datas estão no formato correto
         try:
-            if since and isinstance(since, str):
-                since_date = datetime.strptime(since, '%Y-%m-%d')
-                since = since_date.strftime('%Y-%m-%d')
+            client = get_gitlab_client(token)
             
-            if until and isinstance(until, str):
-                until_date = datetime.strptime(until, '%Y-%m-%d')
-                until = until_date.strftime('%Y-%m-%d')
-        except ValueError:
-            # Usar datas padrão em caso de erro
-            since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            until = datetime.now().strftime('%Y-%m-%d')
-        
-        # Limpar cache se solicitado
-        if clear_cache:
-            from django.core.cache import cache
-            # Limpar cache relacionado ao projeto específico
-            cache_keys_to_clear = [
-                f'projects_{project_id}',
-                f'project_{project_id}',
-                f'commits_{project_id}',
-                f'stats_{project_id}',
-            ]
-            for key in cache_keys_to_clear:
-                cache.delete(key)
-            # Também limpar chaves com parâmetros de data
-            for key in cache_keys_to_clear:
-                cache.delete(f"{key}_since:{since}_until:{until}")
+            stats = client.get_developer_stats(project_id, since=since, until=until, refresh=clear_cache)
+            
+            serializer = DeveloperStatSerializer(stats, many=True)
+            return Response(serializer.data)
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class GitlabMultiProjectStatsView(APIView):
+    """
+    Estatísticas de desenvolvedores somadas entre projetos: de um grupo
+    (gitlab/groups/<id>/stats/) ou de uma lista (?project_ids=1,2,3)
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, group_id=None):
+        # Usar token da sessão ou token fixo se não existir
+        token = request.session.get('gitlab_token', settings.GITLAB_TOKEN)
+        since, until = get_stats_date_range(request.query_params)
         
         try:
-            client = GitlabClient(token)
+            client = get_gitlab_client(token)
+            
+            if group_id is not None:
+                project_ids = client.get_group_project_ids(group_id)
+            else:
+                raw_ids = request.query_params.get('project_ids', '')
+                try:
+                    project_ids = [int(value) for value in raw_ids.split(',') if value.strip()]
+                except ValueError:
+                    return Response({"detail": "project_ids deve ser uma lista de IDs separados por vírgula"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if not project_ids:
+                    return Response({"detail": "Informe project_ids"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Limpar cache se solicitado: apenas dos projetos envolvidos
+            if request.query_params.get('clear_cache', 'false').lower() == 'true':
+                for project_id in project_ids:
+                    invalidate_project(project_id)
             
-            stats = client.get_developer_stats(project_id, since=since, until=until)
+            stats = client.get_projects_developer_stats(project_ids, since=since, until=until)
             
             serializer = DeveloperStatSerializer(stats, many=True)
             return Response(serializer.data)
@@ -264,6 +303,185 @@ class GitlabDeveloperStatsView(APIView):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def get_stats_windows(params):
+    """
+    Janelas (início, fim) pedidas: windows=AAAA-MM-DD:AAAA-MM-DD,... ou o
+    período (since/until) dividido por granularity (day, week ou month).
+    Levanta ValueError se os parâmetros forem inválidos.
+    """
+    max_windows = PERFORMANCE_CONFIG['MAX_STATS_WINDOWS']
+    too_many = f"Máximo de {max_windows} janelas por requisição"
+    
+    raw_windows = params.get('windows')
+    if raw_windows:
+        items = raw_windows.split(',')
+        if len(items) > max_windows:
+            raise ValueError(too_many)
+        windows = []
+        for item in items:
+            start, _, end = item.strip().partition(':')
+            windows.append((
+                datetime.strptime(start, '%Y-%m-%d').date(),
+                datetime.strptime(end or start, '%Y-%m-%d').date(),
+            ))
+        if any(start > end for start, end in windows):
+            raise ValueError("O início de cada janela deve ser anterior ao fim")
+    else:
+        since, until = get_stats_date_range(params)
+        # Gera no máximo max_windows + 1 janelas, mesmo para períodos enormes
+        windows = period_windows(
+            datetime.strptime(since, '%Y-%m-%d').date(),
+            datetime.strptime(until, '%Y-%m-%d').date(),
+            params.get('granularity', 'month'),
+            limit=max_windows,
+        )
+    
+    if len(windows) > max_windows:
+        raise ValueError(too_many)
+    return windows
+
+
+class GitlabDeveloperStatsWindowsView(APIView):
+    """
+    Estatísticas de desenvolvedores de várias janelas de tempo em uma única
+    passada pelos commits (ex.: 12 meses de uma vez)
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, project_id):
+        # Usar token da sessão ou token fixo se não existir
+        token = request.session.get('gitlab_token', settings.GITLAB_TOKEN)
+        
+        try:
+            windows = get_stats_windows(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            client = get_gitlab_client(token)
+            results = client.get_developer_stats_by_window(project_id, windows)
+            
+            return Response([
+                {
+                    'since': result['since'].isoformat(),
+                    'until': result['until'].isoformat(),
+                    'stats': DeveloperStatSerializer(result['stats'], many=True).data,
+                }
+                for result in results
+            ])
+        except Exception as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+async def developer_stats_async(request, project_id):
+    """
+    Versão assíncrona das estatísticas por autor (servida via ASGI).
+    
+    Usa o AsyncGitlabClient, de modo que um único worker mantém várias
+    requisições ao GitLab em andamento sem bloquear.
+    """
+    # Sessão usa o banco (cached_db): acessar fora do event loop
+    token = await sync_to_async(request.session.get)('gitlab_token', settings.GITLAB_TOKEN)
+    since, until = get_stats_date_range(request.GET)
+    
+    try:
+        async with AsyncGitlabClient(token) as client:
+            stats = await client.get_developer_stats(project_id, since=since, until=until)
+        
+        serializer = DeveloperStatSerializer(stats, many=True)
+        return JsonResponse(serializer.data, safe=False)
+    except Exception as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+
+
+def developer_stats_stream(request, project_id):
+    """
+    Estatísticas por autor transmitidas como Server-Sent Events.
+    
+    Enquanto o cálculo roda, envia o andamento (commits listados, diffs
+    analisados) e os totais parciais por autor; ao final, o resultado.
+    
+    Precisa do gunicorn com workers gthread (ver Dockerfile): workers sync
+    são encerrados após o --timeout mesmo enviando keep-alive, e via ASGI o
+    Django acumula o gerador síncrono inteiro antes de responder.
+    """
+    token = request.session.get('gitlab_token', settings.GITLAB_TOKEN)
+    since, until = get_stats_date_range(request.GET)
+    
+    response = StreamingHttpResponse(
+        stream_developer_stats(token, project_id, since, until),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Não acumular no proxy reverso
+    return response
+
+
+def serialize_job(request, job):
+    """Estado de um job com os links de acompanhamento"""
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'progress': round(job.progress, 3),
+        'message': job.message,
+        'error': job.error or None,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+        'status_url': request.build_absolute_uri(reverse('job-status', args=[job.id])),
+        'result_url': request.build_absolute_uri(reverse('job-result', args=[job.id])),
+    }
+
+
+class JobStatusView(APIView):
+    """
+    Andamento de um job de estatísticas em segundo plano
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            return Response({"detail": "Job não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(serialize_job(request, job))
+
+
+class JobResultView(APIView):
+    """
+    Resultado de um job (202 enquanto não termina)
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            return Response({"detail": "Job não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        if job.status == StatsJob.STATUS_DONE:
+            return Response(job.result)
+        if job.status == StatsJob.STATUS_FAILED:
+            return Response({"detail": job.error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serialize_job(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+class GitlabWebhookView(APIView):
+    """
+    Recebe webhooks de push do GitLab (autenticados pelo X-Gitlab-Token)
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        if not verify_token(request.headers.get('X-Gitlab-Token')):
+            return Response({"detail": "Token do webhook inválido"}, status=status.HTTP_403_FORBIDDEN)
+        
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Payload inválido"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queued = handle_push_event(request.data)
+        if queued is None:
+            return Response({"status": "ignored"})
+        return Response({"status": "queued", "commits": queued}, status=status.HTTP_202_ACCEPTED)
+
+
 class HealthCheckView(APIView):
     """
     Endpoint de health check para monitoramento do container
@@ -0,0 +1,80 @@
+"""
+Recebimento de webhooks de push do GitLab para atualizar as métricas incrementalmente
+"""
+
+import hmac
+import logging
+from django.conf import settings
+from .cache_manager import invalidate_project
+from .client_pool import leased_gitlab_client
+from .jobs import run_in_background
+from .performance_config import PERFORMANCE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BRANCH_REF_PREFIX = 'refs/heads/'
+NULL_SHA = '0' * 40
+
+
+def verify_token(received):
+    """Compara o X-Gitlab-Token recebido com GITLAB_WEBHOOK_SECRET (em tempo constante)"""
+    secret = getattr(settings, 'GITLAB_WEBHOOK_SECRET', '')
+    if not secret or not received:
+        return False
+    return hmac.compare_digest(received.encode('utf-8'), secret.encode('utf-8'))
+
+
+def parse_push_event(payload):
+    """
+    Extrai (project_id, branch, shas, completo) de um evento de push.
+
+    Retorna None para eventos que não afetam as métricas (tags, branch
+    removida, outros tipos). "completo" é False quando o GitLab truncou a
+    lista de commits do payload (total_commits_count maior que a lista).
+    """
+    if payload.get('object_kind') != 'push':
+        return None
+
+    ref = payload.get('ref') or ''
+    if not ref.startswith(BRANCH_REF_PREFIX) or payload.get('after') == NULL_SHA:
+        return None
+
+    project_id = payload.get('project_id') or (payload.get('project') or {}).get('id')
+    if not project_id:
+        return None
+
+    shas = [commit['id'] for commit in payload.get('commits') or [] if commit.get('id')]
+    total = payload.get('total_commits_count', len(shas))
+    return int(project_id), ref[len(BRANCH_REF_PREFIX):], shas, total <= len(shas)
+
+
+def handle_push_event(payload):
+    """Agenda a atualização do projeto; retorna a quantidade de commits enfileirados (None se ignorado)"""
+    event = parse_push_event(payload)
+    if event is None:
+        return None
+
+    project_id, branch_name, shas, complete = event
+    run_in_background(process_push, project_id, branch_name, shas, complete)
+    return len(shas)
+
+
+def process_push(project_id, branch_name, shas, complete):
+    """Sincroniza os commits enviados no banco local e invalida o cache do projeto"""
+    if PERFORMANCE_CONFIG['USE_LOCAL_STORE']:
+        from .commit_store import is_tracked_branch, sync_pushed_commits, sync_project_commits
+
+        with leased_gitlab_client(settings.GITLAB_TOKEN) as client:
+            # Vale para os dois caminhos: sincronizar uma branch não acompanhada
+            # criaria o SyncState dela e a passaria a acompanhar
+            if not is_tracked_branch(client.get_project(project_id), branch_name):
+                logger.info("Push em %s/%s ignorado (branch não acompanhada)", project_id, branch_name)
+            elif complete:
+                created = sync_pushed_commits(client, project_id, branch_name, shas)
+                logger.info("Push em %s/%s sincronizado (%s commits novos)", project_id, branch_name, created)
+            else:
+                # Payload truncado: listagem incremental da branch
+                sync_project_commits(client, project_id, branch_name, force=True)
+                logger.info("Push truncado em %s/%s sincronizado pela listagem", project_id, branch_name)
+
+    invalidate_project(project_id)
@@ -26,6 +26,18 @@ else:
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Warm the shared cache in the background once the server is up (optional)
+if [ "${WARM_CACHE_ON_START:-False}" = "True" ]; then
+    echo "Scheduling cache warmup..."
+    (
+        sleep "${WARM_CACHE_DELAY:-10}"
+        python manage.py warm_metrics_cache \
+            --top "${WARM_CACHE_TOP_PROJECTS:-10}" \
+            --concurrency "${WARM_CACHE_CONCURRENCY:-4}" \
+            || echo "Cache warmup failed"
+    ) &
+fi
+
 # Start the application
 echo "Starting Gunicorn server..."
 exec "$@"
@@ -503,12 +503,6 @@ def insert_content_into_sidebar_template(content, title="Gerador de Métricas Gi
                     // Só contar requisições para a API do sistema
                     if (url.includes('/api/') || url.includes('gitlab')) {
                         activeApiRequests++;
-                        
-                        // Adicionar parâmetro clear_cache=true para requisições de stats
-                        if (url.includes('/stats/') && !url.includes('clear_cache=')) {
-                            const separator = url.includes('?') ? '&' : '?';
-                            url = url + separator + 'clear_cache=true';
-                        }
                     }
                     return originalOpen.apply(this, arguments);
                 };
@@ -539,13 +533,6 @@ def insert_content_into_sidebar_template(content, title="Gerador de Métricas Gi
             window.fetch = function(...args) {
                 let url = args[0];
                 if (typeof url === 'string' && (url.includes('/api/') || url.includes('gitlab'))) {
-                    // Adicionar parâmetro clear_cache=true para requisições de stats
-                    if (url.includes('/stats/') && !url.includes('clear_cache=')) {
-                        const separator = url.includes('?') ? '&' : '?';
-                        url = url + separator + 'clear_cache=true';
-                        args[0] = url;
-                    }
-                    
                     activeApiRequests++;
                     
                     return originalFetch.apply(this, args).finally(() => {
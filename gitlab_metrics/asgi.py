@@ -3,6 +3,12 @@ ASGI config for gitlab_metrics project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI lets the async views (e.g. ``stats/async/``, backed by
+``api.async_gitlab_client.AsyncGitlabClient``) keep many GitLab requests in
+flight on a single worker:
+
+    gunicorn -k uvicorn.workers.UvicornWorker gitlab_metrics.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -145,18 +145,43 @@ SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_COOKIE_AGE = 86400  # 24 horas
 
 # Cache settings (otimizado para performance)
+# O padrão é um arquivo SQLite compartilhado pelos workers do gunicorn (api/cache_backends.py);
+# em memória limitada por bytes (por processo): CACHE_BACKEND=api.cache_backends.SizedLocMemCache;
+# servidor Redis (ou compatível com o protocolo): CACHE_BACKEND=api.cache_backends.RESPCache e
+# CACHE_LOCATION=redis://host:6379/1
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'api.cache_backends.SQLiteCache')
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'gitlab-metrics-cache',
-        'TIMEOUT': 7200,  # 2 horas (padrão)
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'data', 'cache.sqlite3')),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 7200)),  # 2 horas (padrão)
         'OPTIONS': {
-            'MAX_ENTRIES': 5000,  # Aumentado para 5000 para melhor performance
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000)),  # Aumentado para 5000 para melhor performance
             'CULL_FREQUENCY': 3,  # 1/3 dos itens serão removidos quando MAX_ENTRIES for atingido
-        }
+            # api.cache_backends.SizedLocMemCache: limite em bytes (LRU com cotas por prefixo)
+            'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', 128 * 1024 * 1024)),
+        },
     }
 }
 
+# Diffs de commits em disco (api/diff_store.py): imutáveis por SHA, nunca expiram
+DIFF_STORE_DIR = os.environ.get('DIFF_STORE_DIR', os.path.join(BASE_DIR, 'data', 'diff_store'))
+DIFF_STORE_MAX_BYTES = int(os.environ.get('DIFF_STORE_MAX_BYTES', 512 * 1024 * 1024))  # 512 MB
+
+# Mirrors git locais (api/git_mirror.py) para projetos grandes
+GIT_MIRROR_DIR = os.environ.get('GIT_MIRROR_DIR', os.path.join(BASE_DIR, 'data', 'git_mirrors'))
+# clone --filter=blob:none; sem valor, só quando GIT_MIRROR_ANALYZE_PATCH está desligado
+# (com --patch, um mirror sem blobs busca cada blob sob demanda durante o git log)
+GIT_MIRROR_BLOBLESS = (
+    os.environ['GIT_MIRROR_BLOBLESS'] == 'True' if os.environ.get('GIT_MIRROR_BLOBLESS') else None
+)
+# IDs dos projetos que usam o mirror em vez da API REST (ex.: "12,34")
+GIT_MIRROR_PROJECTS = {
+    int(project_id) for project_id in os.environ.get('GIT_MIRROR_PROJECTS', '').split(',') if project_id.strip()
+}
+# Origem alternativa por projeto (URL ou caminho local); padrão é http_url_to_repo do projeto
+GIT_MIRROR_SOURCES = {}
+
 # Configuração de cache otimizada
 CACHE_MIDDLEWARE_ALIAS = 'default'
 CACHE_MIDDLEWARE_SECONDS = 300  # 5 minutos para middleware de cache
@@ -166,3 +191,5 @@ CACHE_MIDDLEWARE_KEY_PREFIX = 'gitlab_metrics'
 GITLAB_API_URL = 'https://git.economia.gov.br/'
 GITLAB_SSL_VERIFY = False
 GITLAB_TOKEN = 'cole-seu-token-aqui'  # Token fixo de serviço
+# Segredo configurado nos webhooks de push do GitLab (cabeçalho X-Gitlab-Token); vazio desativa o endpoint
+GITLAB_WEBHOOK_SECRET = os.environ.get('GITLAB_WEBHOOK_SECRET', '')